@@ -0,0 +1,170 @@
+"""
+Gemini image size benchmark
+Measures upload size, latency and prompt tokens for each pre-upload image size,
+and how often the diagnosis agrees with the full-resolution reference.
+Use it to pick the smallest GEMINI_IMAGE_MAX_SIDE that keeps diagnosis quality.
+
+Diagnoses are sampled at temperature 0, and the reference is diagnosed twice: how
+often it agrees with itself is the ceiling, so the remaining sampling noise isn't
+mistaken for an effect of downscaling.
+
+Usage (from backend/):
+    python -m benchmarks.bench_gemini_image_size --images path/to/sample_images
+    python -m benchmarks.bench_gemini_image_size --images samples --sizes 512 768 1024 --format WEBP
+
+Note: every image is sent once per size (plus twice for the reference), so this uses real Gemini quota.
+"""
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import google.generativeai as genai
+from PIL import Image
+
+from utils.gemini_schema import DIAGNOSIS_SCHEMA
+from utils.gemini_vision import (
+    DIAGNOSIS_PROMPT, PRIORITY_BACKGROUND, gemini_gateway, get_model,
+    is_gemini_configured, parse_diagnosis, prepare_image
+)
+from utils.disease_resolver import DiseaseResolver, load_class_names
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+# Serving's DIAGNOSIS_CONFIG, made (near-)deterministic so sizes are compared, not samples
+BENCH_DIAGNOSIS_CONFIG = genai.GenerationConfig(
+    response_mime_type="application/json",
+    response_schema=DIAGNOSIS_SCHEMA,
+    temperature=0
+)
+
+def diagnose(image_part):
+    """One Gemini diagnosis; returns (result, latency seconds, prompt tokens)"""
+    start = time.perf_counter()
+    response = gemini_gateway.call(
+        get_model().generate_content, [DIAGNOSIS_PROMPT, image_part],
+        generation_config=BENCH_DIAGNOSIS_CONFIG,
+        priority=PRIORITY_BACKGROUND
+    )
+    latency = time.perf_counter() - start
+
+    usage = getattr(response, 'usage_metadata', None)
+    tokens = getattr(usage, 'prompt_token_count', None)
+    return parse_diagnosis(response.text), latency, tokens
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Gemini pre-upload image sizes")
+    parser.add_argument('--images', required=True, help="Directory of sample plant images")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[384, 512, 768, 1024, 1536],
+                        help="Max side lengths to try (the original size is always the reference)")
+    parser.add_argument('--format', default='JPEG', choices=['JPEG', 'WEBP'])
+    parser.add_argument('--quality', type=int, default=85)
+    parser.add_argument('--min-agreement', type=float, default=0.95,
+                        help="Treatment agreement needed to recommend a size, as a fraction of the "
+                             "reference's agreement with itself")
+    parser.add_argument('--output', default='benchmarks/results/gemini_image_size.json')
+    args = parser.parse_args()
+
+    if not is_gemini_configured():
+        print("ERROR: GEMINI_API_KEY not found in .env")
+        return
+
+    paths = sorted(p for p in Path(args.images).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    if not paths:
+        print(f"ERROR: No images found in {args.images}")
+        return
+
+    # Catalog-level agreement: do both diagnoses lead to the same treatment?
+    with open("utils/pesticide_data.json", "r", encoding="utf-8") as f:
+        resolver = DiseaseResolver(json.load(f).keys(), load_class_names())
+
+    print(f"Benchmarking {len(paths)} images at sizes {args.sizes} ({args.format} q{args.quality})")
+    print("=" * 50)
+
+    def same_treatment(a, b):
+        return resolver.resolve(a['disease_name'])['key'] == resolver.resolve(b['disease_name'])['key']
+
+    # Reference: original resolution, near-lossless, diagnosed twice to measure its own repeatability
+    references = {}
+    repeat_name = repeat_treatment = 0
+    for path in paths:
+        part = prepare_image(Image.open(path), max_side=0, image_format='JPEG', quality=95)
+        references[path.name], _, _ = diagnose(part)
+        repeat, _, _ = diagnose(part)
+        repeat_name += repeat['disease_name'].lower() == references[path.name]['disease_name'].lower()
+        repeat_treatment += same_treatment(repeat, references[path.name])
+    ceiling = {
+        'name_agreement': round(repeat_name / len(paths), 3),
+        'treatment_agreement': round(repeat_treatment / len(paths), 3)
+    }
+    print(f"reference  name {ceiling['name_agreement']:.0%}  treatment {ceiling['treatment_agreement']:.0%} "
+          f"(agreement with itself - the ceiling)")
+
+    results = []
+    for size in args.sizes:
+        payload_bytes, encode_ms, latencies, tokens = [], [], [], []
+        same_name = same_treatments = 0
+
+        for path in paths:
+            img = Image.open(path)
+            start = time.perf_counter()
+            part = prepare_image(img, max_side=size, image_format=args.format, quality=args.quality)
+            encode_ms.append((time.perf_counter() - start) * 1000)
+            payload_bytes.append(len(part['data']))
+
+            result, latency, token_count = diagnose(part)
+            latencies.append(latency)
+            if token_count is not None:
+                tokens.append(token_count)
+
+            reference = references[path.name]
+            if result['disease_name'].lower() == reference['disease_name'].lower():
+                same_name += 1
+            if same_treatment(result, reference):
+                same_treatments += 1
+
+        row = {
+            'max_side': size,
+            'avg_payload_kb': round(statistics.mean(payload_bytes) / 1024, 1),
+            'avg_encode_ms': round(statistics.mean(encode_ms), 1),
+            'p50_latency_s': round(statistics.median(latencies), 3),
+            'max_latency_s': round(max(latencies), 3),
+            'avg_prompt_tokens': round(statistics.mean(tokens), 1) if tokens else None,
+            'name_agreement': round(same_name / len(paths), 3),
+            'treatment_agreement': round(same_treatments / len(paths), 3)
+        }
+        results.append(row)
+        print(f"{size:>5}px  {row['avg_payload_kb']:>8} KB  {row['p50_latency_s']:>6}s p50  "
+              f"{row['avg_prompt_tokens']} tokens  name {row['name_agreement']:.0%}  "
+              f"treatment {row['treatment_agreement']:.0%}")
+
+    required = args.min_agreement * ceiling['treatment_agreement']
+    passing = [row for row in results if row['treatment_agreement'] >= required]
+    recommended = min(passing, key=lambda row: row['max_side'])['max_side'] if passing else None
+    print("=" * 50)
+    if recommended:
+        print(f"Recommended GEMINI_IMAGE_MAX_SIDE={recommended}")
+    else:
+        print(f"No size reached {required:.0%} treatment agreement "
+              f"({args.min_agreement:.0%} of the reference's {ceiling['treatment_agreement']:.0%})")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({
+            'images': len(paths),
+            'format': args.format,
+            'quality': args.quality,
+            'reference_self_agreement': ceiling,
+            'results': results,
+            'recommended_max_side': recommended
+        }, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
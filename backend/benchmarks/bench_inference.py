@@ -0,0 +1,442 @@
+"""
+Inference benchmark suite
+Measures, over a fixed corpus of local images:
+  preprocess       - the classifier's resize/normalize transform alone
+  classifier       - PlantDiseasePredictor.predict (one image per call) vs
+                     predict_batch, for resnet50, efficientnet_b0 and mobilenet_v2
+  yolo             - YOLOServer.predict one at a time vs concurrent submits (batched by the server)
+  recommendations  - the catalog lookup behind get_recommendations()
+  predict          - the full /api/predict/ path, backend and Gemini replay server started here
+
+Each case reports throughput, latency percentiles and peak RSS, and runs in its
+own process so peak RSS belongs to that case alone. Results are saved per commit;
+pass --compare with an earlier file to see regressions.
+
+Usage (from backend/):
+    python -m benchmarks.bench_inference --images path/to/sample_images
+    python -m benchmarks.bench_inference --images samples --suites classifier yolo \
+        --compare benchmarks/results/inference_1a2b3c4.json
+
+Classifier checkpoints are built with random weights (latency doesn't depend on
+the values); pass --checkpoint models/plant_disease_model.pth to use a trained one
+for its architecture.
+"""
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import as_completed
+from datetime import datetime
+from pathlib import Path
+
+import requests
+from PIL import Image
+
+from benchmarks.load_predict import IMAGE_EXTENSIONS, percentile, run_load, serve_images
+
+SUITES = ("preprocess", "classifier", "yolo", "recommendations", "predict")
+CLASSIFIERS = ("resnet50", "efficientnet_b0", "mobilenet_v2")
+CLASS_NAMES_PATH = "models/class_names.json"
+
+# ----- measurement -----
+
+def peak_rss_mb():
+    """Peak resident memory of this process (None on Windows)"""
+    # VmHWM resets on exec; ru_maxrss on Linux would include the parent's peak from before the spawn
+    peak = process_peak_rss_mb("self")
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def summarize(latencies, items, elapsed=None):
+    """
+    Args:
+        latencies: Seconds per timed call
+        items: Images (or lookups) processed by those calls
+        elapsed: Wall time when calls overlapped; defaults to the sum of latencies
+    """
+    latencies = sorted(latencies)
+    elapsed = elapsed if elapsed is not None else sum(latencies)
+    return {
+        "calls": len(latencies),
+        "items": items,
+        "throughput_per_s": round(items / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "mean": round(statistics.mean(latencies) * 1000, 3)
+        }
+    }
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def load_images(paths):
+    images = []
+    for path in paths:
+        with Image.open(path) as img:
+            images.append(img.convert('RGB'))
+    return images
+
+def chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def run_isolated(case, **kwargs):
+    """Run case(**kwargs) in a fresh process; returns its result with the process's peak RSS"""
+    # spawn: no memory inherited from this process or earlier cases
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run_case, (case, kwargs))
+
+def _run_case(case, kwargs):
+    try:
+        result = case(**kwargs)
+    except ImportError as e:
+        return {"skipped": f"missing dependency: {e.name}"}
+    return {**result, "peak_rss_mb": peak_rss_mb()}
+
+# ----- cases (module-level so spawned processes can import them) -----
+
+def make_checkpoint(arch, path):
+    """Random-weight checkpoint in the format train_plant_disease_model.py saves"""
+    import torch
+    from torchvision import models
+
+    with open(CLASS_NAMES_PATH, "r") as f:
+        class_names = json.load(f)
+    model = models.get_model(arch, weights=None, num_classes=len(class_names))
+    torch.save({
+        'model_state_dict': model.state_dict(),
+        'class_names': class_names,
+        'num_classes': len(class_names),
+        'model_name': arch,
+        'image_size': 224
+    }, path)
+    return path
+
+def bench_preprocess(checkpoint, image_paths, iterations, warmup):
+    from models.custom_model_inference import PlantDiseasePredictor
+
+    transform = PlantDiseasePredictor(checkpoint).transform
+    images = load_images(image_paths)
+    for img in images * warmup:
+        transform(img)
+
+    latencies = [timed(transform, img) for _ in range(iterations) for img in images]
+    return summarize(latencies, len(latencies))
+
+def bench_classifier(checkpoint, image_paths, iterations, warmup, batch_size):
+    import torch
+    from models.custom_model_inference import PlantDiseasePredictor
+
+    predictor = PlantDiseasePredictor(checkpoint)
+    images = load_images(image_paths)
+    batches = chunks(images, batch_size)
+    for _ in range(warmup):
+        for batch in batches:
+            predictor.predict_batch(batch)
+
+    single = [timed(predictor.predict, img) for _ in range(iterations) for img in images]
+    batched = [timed(predictor.predict_batch, batch) for _ in range(iterations) for batch in batches]
+    return {
+        "model": predictor.model_name,
+        "device": str(predictor.device),
+        "threads": torch.get_num_threads(),
+        "batch_size": batch_size,
+        "single": summarize(single, len(single)),
+        "batched": summarize(batched, len(images) * iterations)
+    }
+
+def bench_yolo(weights, image_paths, iterations, warmup):
+    from models.yolo_inference import YOLOServer
+
+    server = YOLOServer(weights)  # Warms up on load
+    images = load_images(image_paths)
+    for img in images * warmup:
+        server.predict(img)
+
+    single = [timed(server.predict, img) for _ in range(iterations) for img in images]
+
+    # All images in flight at once: the serving worker groups them into batches
+    concurrent, elapsed = [], 0.0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        futures = [server.submit(img) for img in images]
+        for future in as_completed(futures):
+            future.result()
+            concurrent.append(time.perf_counter() - start)
+        elapsed += time.perf_counter() - start
+
+    metrics = server.metrics()
+    server.close()
+    return {
+        "weights": weights,
+        "backend": metrics["backend"],
+        "profile": metrics["profile"],
+        "imgsz": metrics["imgsz"],
+        "single": summarize(single, len(single)),
+        "concurrent": summarize(concurrent, len(concurrent), elapsed=elapsed)
+    }
+
+def bench_recommendations(iterations, warmup):
+    """
+    The lookup get_recommendations() does (catalog snapshot, resolver, entry), without
+    importing routes.predict, which would load the serving model into this process
+    """
+    from utils.pesticide_catalog import PesticideCatalog
+
+    catalog = PesticideCatalog("utils/pesticide_data.json")
+    # Names as the local models (class names) and Gemini (free text) produce them
+    gemini_names = [key.replace("_", " ").title() for key in catalog.current().data]
+    names = catalog.class_names + gemini_names + [f"Tomato {name}" for name in gemini_names] + ["Unknown Wilt"]
+
+    def lookup(name):
+        snapshot = catalog.current()
+        match = snapshot.resolver.resolve(name)
+        return snapshot.data.get(match['key'])
+
+    for name in names * warmup:
+        lookup(name)
+    latencies = [timed(lookup, name) for _ in range(iterations) for name in names]
+    return {"names": len(names), **summarize(latencies, len(latencies))}
+
+# ----- end-to-end -----
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_ready(url, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            if requests.get(url, timeout=2).ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+def process_peak_rss_mb(pid):
+    """Peak RSS of a process id or "self" (Linux /proc only)"""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def bench_predict(image_dir, rps, duration, gemini_latency_ms, log_path):
+    """Start the Gemini replay server and the backend, then drive /api/predict/ open-loop"""
+    gemini_port, api_port = free_port(), free_port()
+    api = f"http://127.0.0.1:{api_port}"
+    env = {
+        **os.environ,
+        "GEMINI_API_KEY": "replay",
+        "GEMINI_API_ENDPOINT": f"http://127.0.0.1:{gemini_port}",
+        "GEMINI_RPM": "6000",
+        "GOOGLE_CLOUD_FAKE": "1"
+    }
+
+    os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+    with open(log_path, "w") as log:
+        gemini = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.gemini_replay_server", "--port", str(gemini_port),
+             "--latency-ms", str(gemini_latency_ms), "--seed", "0"],
+            stdout=log, stderr=subprocess.STDOUT
+        )
+        backend = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(api_port), "--log-level", "warning"],
+            stdout=log, stderr=subprocess.STDOUT, env=env
+        )
+        try:
+            if not wait_ready(f"{api}/api/model-info/", backend, timeout=180):
+                return {"skipped": f"backend did not start, see {log_path}"}
+
+            model_type = requests.get(f"{api}/api/model-info/", timeout=10).json().get("model_type")
+            image_server = serve_images(image_dir)
+            host, port = image_server.server_address
+            image_urls = [
+                f"http://{host}:{port}/{p.name}"
+                for p in sorted(Path(image_dir).iterdir()) if p.suffix.lower() in IMAGE_EXTENSIONS
+            ]
+            result = run_load(api, image_urls, rps, duration, max_inflight=64, timeout=120)
+            image_server.shutdown()
+            return {
+                "model_type": model_type,
+                "gemini_latency_ms": gemini_latency_ms,
+                **result,
+                "peak_rss_mb": process_peak_rss_mb(backend.pid)
+            }
+        finally:
+            for process in (backend, gemini):
+                process.terminate()
+                process.wait(10)
+
+# ----- reporting -----
+
+def flatten(results, prefix=""):
+    """(case name, summary) for every summary in a results tree"""
+    for key, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        name = f"{prefix}{key}"
+        if "latency_ms" in value:
+            yield name, value
+        else:
+            yield from flatten(value, f"{name}/")
+
+def print_results(results):
+    print(f"\n{'case':<36}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'items/s':>10}")
+    for name, summary in flatten(results):
+        latency = summary["latency_ms"]
+        throughput = summary.get("throughput_per_s", summary.get("throughput_rps"))
+        print(f"{name:<36}{str(latency['p50']):>10}{str(latency['p95']):>10}{str(latency['p99']):>10}"
+              f"{str(throughput):>10}")
+    for name, case in results.items():
+        if "skipped" in case:
+            print(f"{name:<36}skipped: {case['skipped']}")
+        elif case.get("peak_rss_mb") is not None:
+            print(f"{name:<36}peak RSS {case['peak_rss_mb']} MB")
+
+def print_comparison(baseline, results):
+    """p50 and throughput change against a baseline run (positive p50 % = slower)"""
+    before = dict(flatten(baseline["results"]))
+    print(f"\nCompared with {baseline.get('commit')} ({baseline.get('created_at')}):")
+    print(f"{'case':<36}{'p50 ms':>20}{'change':>10}{'items/s change':>16}")
+    for name, summary in flatten(results):
+        if name not in before:
+            continue
+        old_p50, new_p50 = before[name]["latency_ms"]["p50"], summary["latency_ms"]["p50"]
+        old_tp = before[name].get("throughput_per_s", before[name].get("throughput_rps"))
+        new_tp = summary.get("throughput_per_s", summary.get("throughput_rps"))
+        p50_change = f"{(new_p50 / old_p50 - 1):+.1%}" if old_p50 and new_p50 is not None else "-"
+        tp_change = f"{(new_tp / old_tp - 1):+.1%}" if old_tp and new_tp is not None else "-"
+        print(f"{name:<36}{f'{old_p50} -> {new_p50}':>20}{p50_change:>10}{tp_change:>16}")
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference backends and /api/predict/")
+    parser.add_argument('--images', required=True, help="Directory of sample plant images (the fixed corpus)")
+    parser.add_argument('--suites', nargs='+', default=list(SUITES), choices=SUITES)
+    parser.add_argument('--models', nargs='+', default=list(CLASSIFIERS), choices=CLASSIFIERS)
+    parser.add_argument('--checkpoint', action='append', default=[],
+                        help="Trained classifier checkpoint to use for its architecture (repeatable)")
+    parser.add_argument('--yolo-weights', default=None, help="Default: the serving registry version, else yolov8s.pt")
+    parser.add_argument('--max-images', type=int, default=32)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=3, help="Timed passes over the corpus")
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed passes first")
+    parser.add_argument('--rps', type=float, default=2.0, help="predict suite: target requests per second")
+    parser.add_argument('--duration', type=float, default=30.0, help="predict suite: seconds of load")
+    parser.add_argument('--gemini-latency-ms', type=float, default=1500.0, help="predict suite: replay latency")
+    parser.add_argument('--output', default=None, help="Default: benchmarks/results/inference_<commit>.json")
+    parser.add_argument('--compare', default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    paths = sorted(str(p) for p in Path(args.images).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    paths = paths[:args.max_images]
+    if not paths:
+        print(f"ERROR: No images found in {args.images}")
+        return
+
+    commit = git_commit()
+    output = args.output or f"benchmarks/results/inference_{commit or datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    common = {"image_paths": paths, "iterations": args.iterations, "warmup": args.warmup}
+    print(f"Benchmarking {', '.join(args.suites)} on {len(paths)} images "
+          f"({args.iterations} timed passes, {args.warmup} warm-up)")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoints = {arch: os.path.join(tmp, f"{arch}.pth") for arch in args.models}
+        for path in args.checkpoint:
+            import torch
+            checkpoints[torch.load(path, map_location="cpu")['model_name']] = path
+        for arch, path in checkpoints.items():
+            if not os.path.exists(path):
+                make_checkpoint(arch, path)
+
+        if "preprocess" in args.suites:
+            print("preprocess...")
+            results["preprocess"] = run_isolated(bench_preprocess, checkpoint=next(iter(checkpoints.values())), **common)
+
+        if "classifier" in args.suites:
+            for arch in args.models:
+                print(f"classifier {arch}...")
+                results[f"classifier_{arch}"] = run_isolated(
+                    bench_classifier, checkpoint=checkpoints[arch], batch_size=args.batch_size, **common
+                )
+
+    if "yolo" in args.suites:
+        from utils.model_registry import ModelRegistry
+        weights = args.yolo_weights or ModelRegistry("yolo", legacy_path="models/best.pt").current_path() or "yolov8s.pt"
+        print(f"yolo {weights}...")
+        results["yolo"] = run_isolated(bench_yolo, weights=weights, **common)
+
+    if "recommendations" in args.suites:
+        print("recommendations...")
+        results["recommendations"] = run_isolated(
+            bench_recommendations, iterations=args.iterations * 100, warmup=args.warmup
+        )
+
+    if "predict" in args.suites:
+        print(f"predict: {args.rps} rps for {args.duration}s against the Gemini replay server...")
+        results["predict"] = bench_predict(
+            args.images, args.rps, args.duration, args.gemini_latency_ms,
+            log_path=os.path.join(os.path.dirname(output), "bench_inference_server.log")
+        )
+
+    print_results(results)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(json.load(f), results)
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "created_at": datetime.now().isoformat(),
+            "platform": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "system": platform.system(),
+                "cpu_count": os.cpu_count()
+            },
+            "images": len(paths),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "results": results
+        }, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Gemini replay server
+A local stand-in for the part of the Gemini REST API the backend uses
+(models/{model}:generateContent). Serves recorded responses with a
+configurable latency and error distribution, so /api/predict/ can be
+load-tested without network access or quota.
+
+Usage (from backend/):
+    python -m benchmarks.gemini_replay_server --port 8765 --latency-ms 1500 --error-rate 0.02
+
+    # then start the backend against it
+    GEMINI_API_KEY=replay GEMINI_API_ENDPOINT=http://127.0.0.1:8765 GEMINI_RPM=6000 python main.py
+
+Recording real responses (uses quota; GEMINI_API_KEY must be a real key):
+    python -m benchmarks.gemini_replay_server --record
+
+Requests recorded earlier are replayed exactly (matched on a hash of the
+request body); anything else gets a random recording of the same kind.
+"""
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+from collections import Counter, defaultdict
+
+import requests
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+DEFAULT_RECORDINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "gemini_recordings.jsonl")
+GEMINI_UPSTREAM = "https://generativelanguage.googleapis.com"
+
+# HTTP status -> google.rpc status, so the client raises the same exception types as in production
+ERROR_STATUSES = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE", 504: "DEADLINE_EXCEEDED"}
+
+def request_kind(body: dict) -> str:
+    """'diagnosis' for image requests, 'recommendations' for text-only ones"""
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            if "inlineData" in part or "inline_data" in part:
+                return "diagnosis"
+    return "recommendations"
+
+def request_hash(body: dict) -> str:
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+
+def response_body(text: str, usage: dict = None) -> dict:
+    """generateContent response wrapping a recorded text"""
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": "STOP",
+            "index": 0
+        }],
+        "usageMetadata": usage or {"promptTokenCount": 0, "candidatesTokenCount": 0, "totalTokenCount": 0}
+    }
+
+class RecordingStore:
+    """Recorded responses, by request hash and by kind"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.by_hash = {}
+        self.by_kind = defaultdict(list)
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add(json.loads(line))
+
+    def _add(self, recording: dict):
+        if recording.get("request_hash"):
+            self.by_hash[recording["request_hash"]] = recording
+        self.by_kind[recording["kind"]].append(recording)
+
+    def lookup(self, body: dict):
+        """(recording, exact match?) or (None, False) if nothing of this kind was recorded"""
+        recording = self.by_hash.get(request_hash(body))
+        if recording:
+            return recording, True
+        candidates = self.by_kind.get(request_kind(body))
+        return (random.choice(candidates), False) if candidates else (None, False)
+
+    def append(self, body: dict, text: str, usage: dict):
+        recording = {
+            "kind": request_kind(body),
+            "request_hash": request_hash(body),
+            "text": text,
+            "usage": usage
+        }
+        with self._lock:
+            self._add(recording)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(recording, ensure_ascii=False) + "\n")
+
+def create_app(store: RecordingStore, latency_ms: float, latency_sigma: float,
+               error_rate: float, error_status: int, record: bool) -> FastAPI:
+    app = FastAPI(title="Gemini replay server")
+    stats = Counter()
+
+    def sample_latency() -> float:
+        # Log-normal around the median, like real model latency (long right tail)
+        return latency_ms / 1000.0 * math.exp(random.gauss(0, latency_sigma))
+
+    @app.post("/{version}/models/{model}:generateContent")
+    async def generate_content(version: str, model: str, request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+
+        if record:
+            upstream = await asyncio.to_thread(
+                requests.post,
+                f"{GEMINI_UPSTREAM}/{version}/models/{model}:generateContent",
+                params={"key": os.getenv("GEMINI_API_KEY", "")},
+                json=body,
+                timeout=120
+            )
+            if upstream.ok:
+                data = upstream.json()
+                text = "".join(part.get("text", "") for part in data["candidates"][0]["content"]["parts"])
+                store.append(body, text, data.get("usageMetadata"))
+                stats["recorded"] += 1
+            return JSONResponse(upstream.json(), status_code=upstream.status_code)
+
+        await asyncio.sleep(sample_latency())
+
+        if random.random() < error_rate:
+            stats[f"error_{error_status}"] += 1
+            return JSONResponse({
+                "error": {
+                    "code": error_status,
+                    "message": "Injected by replay server",
+                    "status": ERROR_STATUSES.get(error_status, "UNKNOWN")
+                }
+            }, status_code=error_status)
+
+        recording, exact = store.lookup(body)
+        if recording is None:
+            stats["missing"] += 1
+            return JSONResponse({
+                "error": {"code": 404, "message": f"No {request_kind(body)} recordings", "status": "NOT_FOUND"}
+            }, status_code=404)
+
+        stats["exact" if exact else "substituted"] += 1
+        return response_body(recording["text"], recording.get("usage"))
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(stats)
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini generateContent API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--recordings', default=DEFAULT_RECORDINGS)
+    parser.add_argument('--latency-ms', type=float, default=1500.0, help="Median response latency")
+    parser.add_argument('--latency-sigma', type=float, default=0.4, help="Log-normal spread (0 = constant)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument('--error-status', type=int, default=429, choices=sorted(ERROR_STATUSES))
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--record', action='store_true', help="Proxy to the real API and append responses")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    store = RecordingStore(args.recordings)
+    print(f"📼 {sum(len(items) for items in store.by_kind.values())} recordings loaded "
+          f"({', '.join(f'{kind}: {len(items)}' for kind, items in store.by_kind.items()) or 'none'})")
+    if args.record:
+        print("🔴 Recording mode: proxying to the real Gemini API")
+
+    app = create_app(store, args.latency_ms, args.latency_sigma, args.error_rate, args.error_status, args.record)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
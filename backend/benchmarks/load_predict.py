@@ -0,0 +1,159 @@
+"""
+/api/predict/ load generator
+Sends prediction requests at a fixed rate (open loop) and reports latency
+percentiles and throughput. Images are served from a local directory by a
+built-in HTTP server, so together with benchmarks/gemini_replay_server.py the
+whole run works offline.
+
+Usage (from backend/, with the backend already running):
+    python -m benchmarks.load_predict --images path/to/sample_images --rps 5 --duration 60
+
+Results are merged into the output file under the server's MODEL_TYPE (or
+--label), so running once per MODEL_TYPE builds a side-by-side comparison.
+"""
+
+import argparse
+import functools
+import json
+import os
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def serve_images(directory: str) -> ThreadingHTTPServer:
+    """Serve `directory` on a free local port in a background thread"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def get_json(url):
+    try:
+        response = requests.get(url, timeout=10)
+        return response.json() if response.ok else {}
+    except requests.RequestException:
+        return {}
+
+def run_load(api, image_urls, rps, duration, max_inflight, timeout):
+    """
+    Open-loop load: request i is due at start + i/rps whether or not earlier ones finished.
+    Latency is measured from the due time, so queueing in the client counts too.
+    """
+    total = int(rps * duration)
+    latencies, statuses = [], Counter()
+    lock = threading.Lock()
+
+    def send(index, due):
+        try:
+            response = requests.post(
+                f"{api}/api/predict/",
+                json={"image_url": image_urls[index % len(image_urls)]},
+                timeout=timeout
+            )
+            status = response.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        latency = time.perf_counter() - due
+        with lock:
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(latency)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_inflight) as executor:
+        for i in range(total):
+            due = start + i / rps
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, i, due)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "target_rps": rps,
+        "duration_s": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "success_rate": round(len(latencies) / total, 4) if total else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+            "p95": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+            "p99": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+            "mean": round(statistics.mean(latencies) * 1000, 1) if latencies else None
+        },
+        "status_codes": {str(status): count for status, count in statuses.items()}
+    }
+
+def counter_delta(before: dict, after: dict) -> dict:
+    return {key: value - before.get(key, 0) for key, value in after.items() if isinstance(value, (int, float))}
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/predict/")
+    parser.add_argument('--api', default='http://127.0.0.1:8000', help="Backend base URL")
+    parser.add_argument('--images', required=True, help="Directory of sample plant images")
+    parser.add_argument('--rps', type=float, default=2.0, help="Target requests per second")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds of load")
+    parser.add_argument('--max-inflight', type=int, default=64, help="Client-side concurrency cap")
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--label', default=None, help="Result key (default: the server's MODEL_TYPE)")
+    parser.add_argument('--output', default='benchmarks/results/load_predict.json')
+    args = parser.parse_args()
+
+    paths = sorted(p.name for p in Path(args.images).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    if not paths:
+        print(f"ERROR: No images found in {args.images}")
+        return
+
+    image_server = serve_images(args.images)
+    host, port = image_server.server_address
+    image_urls = [f"http://{host}:{port}/{name}" for name in paths]
+
+    label = args.label or get_json(f"{args.api}/api/model-info/").get("model_type", "unknown")
+    gemini_before = get_json(f"{args.api}/api/gemini/stats/").get("gateway", {})
+
+    print(f"Driving {args.api}/api/predict/ ({label}) at {args.rps} rps for {args.duration}s "
+          f"with {len(image_urls)} images...")
+    result = run_load(args.api, image_urls, args.rps, args.duration, args.max_inflight, args.timeout)
+    image_server.shutdown()
+
+    result["gemini_gateway"] = counter_delta(gemini_before, get_json(f"{args.api}/api/gemini/stats/").get("gateway", {}))
+    if label == "cascade":
+        result["cascade"] = get_json(f"{args.api}/api/cascade/stats/")
+
+    latency = result["latency_ms"]
+    print(f"\n{'MODEL_TYPE':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>8}{'ok':>8}")
+    print(f"{label:<24}{str(latency['p50']):>10}{str(latency['p95']):>10}{str(latency['p99']):>10}"
+          f"{str(result['throughput_rps']):>8}{result['success_rate']:>8.1%}")
+    print(f"Status codes: {result['status_codes']}")
+
+    results = {}
+    if os.path.exists(args.output):
+        with open(args.output, "r", encoding="utf-8") as f:
+            results = json.load(f)
+    results[label] = result
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,49 @@
 from dotenv import load_dotenv
 load_dotenv()  # Load environment variables from .env file
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from routes import predict, retrain, translate, feedback, auth, stats
+from utils.google_cloud_utils import init_google_cloud, close_google_cloud
+from utils.cache_warmer import run_cache_warmer, CACHE_WARM_INTERVAL
+from utils.pesticide_catalog import watch_catalog
+from utils.model_rollout import watch_model_registry
 import uvicorn
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared Google Cloud clients live for the whole app, bound to this event loop
+    await init_google_cloud()
+    
+    # Pre-translate/synthesize the top diseases in the background (CACHE_WARM_INTERVAL=0 disables)
+    background_tasks = []
+    if CACHE_WARM_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(run_cache_warmer()))
+    
+    # Pick up pesticide catalog edits without a restart
+    background_tasks.append(asyncio.create_task(watch_catalog(predict.pesticide_catalog)))
+    
+    # Hot-swap promoted YOLO versions and evaluate canaries without a restart
+    if predict.model_rollout is not None:
+        background_tasks.append(asyncio.create_task(watch_model_registry(predict.model_rollout)))
+    
+    yield
+    
+    for task in background_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await close_google_cloud()
+
 app = FastAPI(
     title="KrushiMitra API",
     description="AI-Powered Plant Disease Detection for Farmers",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -0,0 +1,152 @@
+"""
+Cascade Calibration Script
+Fits the softmax temperature of the custom model and picks the confidence
+threshold at which its accepted predictions reach a target accuracy.
+Writes cascade_calibration.json, read by the backend in PREDICTION_MODE=cascade.
+
+Run from backend/models on a held-out, labeled image folder:
+    python calibrate_cascade.py --data "path/to/plantvillage dataset/color"
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+
+import torch
+import torch.nn.functional as F
+from PIL import Image
+from tqdm import tqdm
+
+from custom_model_inference import PlantDiseasePredictor
+
+# ==================== CONFIGURATION ====================
+class Config:
+    MODEL_PATH = "plant_disease_model.pth"
+    OUTPUT_PATH = "cascade_calibration.json"
+    TARGET_ACCURACY = 0.97      # accuracy required on locally-served predictions
+    MIN_MARGIN = 30.0           # top-1 minus top-2 (percentage points) to count as in-distribution
+    MAX_IMAGES_PER_CLASS = 50
+    BATCH_SIZE = 32
+    TEMPERATURES = [round(0.5 + 0.1 * i, 1) for i in range(46)]  # 0.5 .. 5.0
+
+# ==================== DATA ====================
+def load_samples(data_dir, class_names, max_per_class):
+    """(path, label) pairs from a class-folder layout matching the model's classes"""
+    class_to_idx = {name: idx for idx, name in enumerate(class_names)}
+    samples = []
+    random.seed(42)
+
+    for class_folder in sorted(Path(data_dir).iterdir()):
+        if not class_folder.is_dir() or class_folder.name not in class_to_idx:
+            continue
+        images = [p for p in class_folder.iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png')]
+        if len(images) > max_per_class:
+            images = random.sample(images, max_per_class)
+        samples.extend((str(p), class_to_idx[class_folder.name]) for p in images)
+
+    return samples
+
+def collect_logits(predictor, samples, batch_size):
+    """Raw model outputs for every sample"""
+    all_logits, all_labels = [], []
+
+    for start in tqdm(range(0, len(samples), batch_size), desc="Scoring"):
+        batch = samples[start:start + batch_size]
+        images = torch.stack([
+            predictor.transform(Image.open(path).convert('RGB')) for path, _ in batch
+        ]).to(predictor.device)
+
+        with torch.no_grad():
+            all_logits.append(predictor.model(images).cpu())
+        all_labels.extend(label for _, label in batch)
+
+    return torch.cat(all_logits), torch.tensor(all_labels)
+
+# ==================== CALIBRATION ====================
+def fit_temperature(logits, labels):
+    """Temperature with the lowest negative log-likelihood"""
+    best_t, best_nll = 1.0, float('inf')
+    for t in Config.TEMPERATURES:
+        nll = F.cross_entropy(logits / t, labels).item()
+        if nll < best_nll:
+            best_t, best_nll = t, nll
+    return best_t, best_nll
+
+def pick_threshold(logits, labels, temperature, target_accuracy, min_margin):
+    """
+    Lowest confidence threshold whose accepted predictions reach target accuracy
+
+    Returns:
+        (threshold %, accepted accuracy, coverage) - coverage is the share served locally
+    """
+    probs = F.softmax(logits / temperature, dim=1) * 100
+    top2 = probs.topk(2, dim=1).values
+    confidence, margin = top2[:, 0], top2[:, 0] - top2[:, 1]
+    correct = probs.argmax(dim=1).eq(labels)
+
+    # Same acceptance rule as the backend: confidence and margin must both pass
+    eligible = margin >= min_margin
+    order = confidence.argsort(descending=True)
+
+    best = (100.0, None, 0.0)
+    accepted = hits = 0
+    for idx in order.tolist():
+        if not eligible[idx]:
+            continue
+        accepted += 1
+        hits += int(correct[idx])
+        if hits / accepted >= target_accuracy:
+            best = (round(confidence[idx].item(), 2), hits / accepted, accepted / len(labels))
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the local-model-first cascade")
+    parser.add_argument('--data', required=True, help="Labeled validation folder (one sub-folder per class)")
+    parser.add_argument('--model', default=Config.MODEL_PATH)
+    parser.add_argument('--target-accuracy', type=float, default=Config.TARGET_ACCURACY)
+    parser.add_argument('--min-margin', type=float, default=Config.MIN_MARGIN)
+    parser.add_argument('--output', default=Config.OUTPUT_PATH)
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("Cascade Calibration")
+    print("=" * 50)
+
+    predictor = PlantDiseasePredictor(args.model)
+    samples = load_samples(args.data, predictor.class_names, Config.MAX_IMAGES_PER_CLASS)
+    if not samples:
+        print("❌ ERROR: No images matching the model's classes found")
+        return
+    print(f"Scoring {len(samples)} validation images...")
+
+    logits, labels = collect_logits(predictor, samples, Config.BATCH_SIZE)
+    accuracy = logits.argmax(dim=1).eq(labels).float().mean().item()
+
+    temperature, nll = fit_temperature(logits, labels)
+    threshold, accepted_accuracy, coverage = pick_threshold(
+        logits, labels, temperature, args.target_accuracy, args.min_margin
+    )
+
+    print(f"\nOverall accuracy: {accuracy:.2%}")
+    print(f"Temperature: {temperature} (NLL {nll:.4f})")
+    if accepted_accuracy is None:
+        print(f"⚠️  No threshold reaches {args.target_accuracy:.0%} - everything will escalate")
+    else:
+        print(f"Threshold: {threshold}% -> {accepted_accuracy:.2%} accurate, {coverage:.1%} served locally")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'temperature': temperature,
+            'confidence_threshold': threshold,
+            'min_margin': args.min_margin,
+            'target_accuracy': args.target_accuracy,
+            'accepted_accuracy': accepted_accuracy,
+            'expected_local_coverage': coverage,
+            'validation_images': len(samples),
+            'model_name': predictor.model_name
+        }, f, indent=2)
+    print(f"💾 Calibration saved: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Resumable training state
+Periodic full checkpoints (model, optimizer, scheduler, RNG, epoch and
+position within the epoch) written atomically, plus early stopping on a
+validation plateau. Used by the training scripts' --resume mode.
+"""
+
+import os
+import random
+import time
+
+import numpy as np
+import torch
+
+def capture_rng():
+    """RNG state of python, numpy and torch (CPU and CUDA)"""
+    return {
+        'python': random.getstate(),
+        'numpy': np.random.get_state(),
+        'torch': torch.get_rng_state(),
+        'cuda': torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None
+    }
+
+def restore_rng(state):
+    random.setstate(state['python'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'].cpu())
+    if state.get('cuda') is not None and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all([s.cpu() for s in state['cuda']])
+
+class CheckpointManager:
+    def __init__(self, path, interval_minutes=10):
+        """
+        Args:
+            path: Checkpoint file (overwritten on every save)
+            interval_minutes: Minimum time between mid-epoch checkpoints
+        """
+        self.path = path
+        self.interval = interval_minutes * 60
+        self._last_save = time.monotonic()
+
+    def due(self):
+        """Whether a mid-epoch checkpoint should be written now"""
+        return self.interval > 0 and time.monotonic() - self._last_save >= self.interval
+
+    def save(self, state):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        torch.save({**state, 'rng': capture_rng()}, tmp_path)
+        # Replace in one step: a preemption mid-write leaves the previous checkpoint intact
+        os.replace(tmp_path, self.path)
+        self._last_save = time.monotonic()
+
+    def load(self, device):
+        """Checkpoint dict (RNG already restored), or None if there is none"""
+        if not os.path.exists(self.path):
+            return None
+        state = torch.load(self.path, map_location=device, weights_only=False)
+        restore_rng(state['rng'])
+        return state
+
+class EarlyStopping:
+    """Stop when the monitored metric hasn't improved by min_delta for `patience` epochs"""
+
+    def __init__(self, patience=5, min_delta=0.0, mode='max'):
+        self.patience = patience
+        self.min_delta = min_delta
+        self.mode = mode
+        self.best = None
+        self.bad_epochs = 0
+
+    def step(self, value):
+        """Record an epoch's metric; returns True when training should stop"""
+        improved = self.best is None or (
+            value > self.best + self.min_delta if self.mode == 'max' else value < self.best - self.min_delta
+        )
+        if improved:
+            self.best = value
+            self.bad_epochs = 0
+        else:
+            self.bad_epochs += 1
+        return self.patience > 0 and self.bad_epochs >= self.patience
+
+    def state_dict(self):
+        return {'best': self.best, 'bad_epochs': self.bad_epochs}
+
+    def load_state_dict(self, state):
+        self.best = state['best']
+        self.bad_epochs = state['bad_epochs']
@@ -10,14 +10,16 @@ from PIL import Image
 import json
 
 class PlantDiseasePredictor:
-    def __init__(self, model_path, class_names_path=None):
+    def __init__(self, model_path, class_names_path=None, temperature=1.0):
         """
         Initialize the predictor
         
         Args:
             model_path: Path to the trained .pth model file
             class_names_path: Path to class_names.json (optional if included in model)
+            temperature: Softmax temperature from calibration (1.0 = uncalibrated)
         """
+        self.temperature = temperature
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
         # Load model checkpoint
@@ -90,40 +92,50 @@ class PlantDiseasePredictor:
                 'all_predictions': list of top 5 predictions
             }
         """
-        # Load image
-        if isinstance(image_path_or_pil, str):
-            image = Image.open(image_path_or_pil).convert('RGB')
-        else:
-            image = image_path_or_pil.convert('RGB')
+        return self.predict_batch([image_path_or_pil])[0]
+    
+    def predict_batch(self, images):
+        """
+        Predict diseases for several images in one forward pass
+        
+        Args:
+            images: List of image paths or PIL Image objects
         
-        # Preprocess
-        image_tensor = self.transform(image).unsqueeze(0).to(self.device)
+        Returns:
+            list: One predict()-style dict per image, in order
+        """
+        # Load and preprocess
+        tensors = []
+        for image in images:
+            if isinstance(image, str):
+                image = Image.open(image)
+            tensors.append(self.transform(image.convert('RGB')))
+        batch = torch.stack(tensors).to(self.device)
         
         # Predict
         with torch.no_grad():
-            outputs = self.model(image_tensor)
-            probabilities = torch.nn.functional.softmax(outputs, dim=1)
+            outputs = self.model(batch)
+            probabilities = torch.nn.functional.softmax(outputs / self.temperature, dim=1)
             
-            # Get top 5 predictions
+            # Get top 5 predictions (one device-to-host copy for the whole batch)
             top5_prob, top5_idx = torch.topk(probabilities, min(5, self.num_classes))
+            top5_prob, top5_idx = top5_prob.cpu().tolist(), top5_idx.cpu().tolist()
+        
+        results = []
+        for probs, indices in zip(top5_prob, top5_idx):
+            top5_predictions = [
+                {'disease': self.class_names[idx], 'confidence': prob * 100}
+                for prob, idx in zip(probs, indices)
+            ]
             
-            top5_predictions = []
-            for prob, idx in zip(top5_prob[0], top5_idx[0]):
-                top5_predictions.append({
-                    'disease': self.class_names[idx.item()],
-                    'confidence': prob.item() * 100
-                })
-            
-            # Get best prediction
-            best_idx = top5_idx[0][0].item()
-            best_prob = top5_prob[0][0].item() * 100
-            disease_name = self.class_names[best_idx]
-        
-        return {
-            'disease_name': disease_name,
-            'confidence': round(best_prob, 2),
-            'all_predictions': top5_predictions
-        }
+            # Best prediction is the first of the top 5
+            results.append({
+                'disease_name': self.class_names[indices[0]],
+                'confidence': round(probs[0] * 100, 2),
+                'all_predictions': top5_predictions
+            })
+        
+        return results
     
     def predict_from_url(self, image_url):
         """
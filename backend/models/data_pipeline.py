@@ -0,0 +1,197 @@
+"""
+Training data pipeline
+Parallel DataLoaders plus augmentation applied to whole batches as tensor
+ops (on the training device), instead of per-image PIL transforms in the
+loader. Workers only read/decode; the model's device does the rest.
+"""
+
+import math
+import os
+import platform
+import time
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.data import DataLoader, Sampler
+
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+
+# Luma weights (ITU-R 601), as torchvision uses for grayscale
+GRAY_WEIGHTS = [0.299, 0.587, 0.114]
+
+def default_num_workers():
+    """
+    Loader processes for this machine
+
+    Windows/macOS start workers with spawn (slow startup, whole script re-imported),
+    so they get fewer; one core is left for the training loop itself.
+    """
+    cores = os.cpu_count() or 1
+    if cores <= 2:
+        return 0
+    cap = 4 if platform.system() in ("Windows", "Darwin") else 8
+    return min(cap, cores - 1)
+
+class EpochSampler(Sampler):
+    """
+    Shuffled order that depends only on (seed, epoch), so a resumed run can
+    skip the samples an interrupted epoch already trained on
+    """
+
+    def __init__(self, num_samples, seed=42):
+        self.num_samples = num_samples
+        self.seed = seed
+        self.epoch = 0
+        self.start = 0
+
+    def set_epoch(self, epoch, start=0):
+        """Select the epoch's permutation and the sample position to start from"""
+        self.epoch = epoch
+        self.start = min(start, self.num_samples)
+
+    def __iter__(self):
+        generator = torch.Generator().manual_seed(self.seed + self.epoch)
+        order = torch.randperm(self.num_samples, generator=generator)
+        return iter(order[self.start:].tolist())
+
+    def __len__(self):
+        return self.num_samples - self.start
+
+def make_loader(dataset, batch_size, shuffle, device, num_workers=None, prefetch_factor=4, seed=42):
+    """
+    DataLoader with persistent workers, pinned memory (CUDA) and prefetching
+    Shuffled loaders use an EpochSampler (loader.sampler.set_epoch before each epoch).
+    """
+    num_workers = default_num_workers() if num_workers is None else num_workers
+    options = {}
+    if num_workers > 0:
+        options = {"persistent_workers": True, "prefetch_factor": prefetch_factor}
+    return DataLoader(
+        dataset,
+        batch_size=batch_size,
+        sampler=EpochSampler(len(dataset), seed) if shuffle else None,
+        num_workers=num_workers,
+        pin_memory=(device.type == 'cuda'),
+        **options
+    )
+
+def normalize_batch(images):
+    """uint8 (B, 3, H, W) -> normalized float batch"""
+    x = images.float().div_(255)
+    mean = x.new_tensor(IMAGENET_MEAN).view(1, 3, 1, 1)
+    std = x.new_tensor(IMAGENET_STD).view(1, 3, 1, 1)
+    return (x - mean) / std
+
+def _factors(batch, strength, device):
+    """Per-image factors uniform in [1 - strength, 1 + strength]"""
+    return 1 + (torch.rand(batch, 1, 1, 1, device=device) * 2 - 1) * strength
+
+class BatchAugment(nn.Module):
+    """
+    Random flips, rotation/translation and color jitter for a whole uint8 batch
+    Each image gets its own random parameters; output is normalized float.
+    """
+
+    def __init__(self, hflip=0.5, vflip=0.0, degrees=0.0, translate=0.0,
+                 brightness=0.0, contrast=0.0, saturation=0.0, hue=0.0):
+        super().__init__()
+        self.hflip = hflip
+        self.vflip = vflip
+        self.degrees = degrees
+        self.translate = translate
+        self.brightness = brightness
+        self.contrast = contrast
+        self.saturation = saturation
+        self.hue = hue
+
+    def _flip(self, x, p, dim):
+        mask = torch.rand(x.shape[0], device=x.device) < p
+        return torch.where(mask.view(-1, 1, 1, 1), x.flip(dim), x)
+
+    def _affine(self, x):
+        batch = x.shape[0]
+        angle = (torch.rand(batch, device=x.device) * 2 - 1) * math.radians(self.degrees)
+        # Grid coordinates span [-1, 1], so a shift of t * width is 2t
+        shift = (torch.rand(batch, 2, device=x.device) * 2 - 1) * 2 * self.translate
+        cos, sin = torch.cos(angle), torch.sin(angle)
+        theta = torch.stack([
+            torch.stack([cos, -sin, shift[:, 0]], dim=1),
+            torch.stack([sin, cos, shift[:, 1]], dim=1)
+        ], dim=1)
+        grid = F.affine_grid(theta, x.shape, align_corners=False)
+        return F.grid_sample(x, grid, mode='bilinear', padding_mode='zeros', align_corners=False)
+
+    def _gray(self, x):
+        return (x * x.new_tensor(GRAY_WEIGHTS).view(1, 3, 1, 1)).sum(dim=1, keepdim=True)
+
+    def _hue(self, x):
+        # Rotate chroma in YIQ space - a cheap, differentiable stand-in for an HSV hue shift
+        batch = x.shape[0]
+        angle = (torch.rand(batch, device=x.device) * 2 - 1) * self.hue * 2 * math.pi
+        to_yiq = x.new_tensor([[0.299, 0.587, 0.114], [0.596, -0.274, -0.322], [0.211, -0.523, 0.312]])
+        from_yiq = torch.linalg.inv(to_yiq)
+        cos, sin = torch.cos(angle), torch.sin(angle)
+        ones, zeros = torch.ones_like(cos), torch.zeros_like(cos)
+        rotation = torch.stack([
+            torch.stack([ones, zeros, zeros], dim=1),
+            torch.stack([zeros, cos, -sin], dim=1),
+            torch.stack([zeros, sin, cos], dim=1)
+        ], dim=1)
+        matrix = from_yiq @ rotation @ to_yiq  # (B, 3, 3)
+        return torch.einsum('bij,bjhw->bihw', matrix, x)
+
+    @torch.no_grad()
+    def forward(self, images):
+        x = images.float().div_(255)
+        batch = x.shape[0]
+
+        if self.hflip:
+            x = self._flip(x, self.hflip, 3)
+        if self.vflip:
+            x = self._flip(x, self.vflip, 2)
+        if self.degrees or self.translate:
+            x = self._affine(x)
+
+        if self.brightness:
+            x = (x * _factors(batch, self.brightness, x.device)).clamp_(0, 1)
+        if self.contrast:
+            mean = self._gray(x).mean(dim=(2, 3), keepdim=True)
+            x = ((x - mean) * _factors(batch, self.contrast, x.device) + mean).clamp_(0, 1)
+        if self.saturation:
+            gray = self._gray(x)
+            x = ((x - gray) * _factors(batch, self.saturation, x.device) + gray).clamp_(0, 1)
+        if self.hue:
+            x = self._hue(x).clamp_(0, 1)
+
+        mean = x.new_tensor(IMAGENET_MEAN).view(1, 3, 1, 1)
+        std = x.new_tensor(IMAGENET_STD).view(1, 3, 1, 1)
+        return (x - mean) / std
+
+class ThroughputMeter:
+    """Images/sec for an epoch, and how much of it was spent waiting on the loader"""
+
+    def __init__(self):
+        self.images = 0
+        self.data_time = 0.0
+        self.start = time.perf_counter()
+        self._mark = self.start
+
+    def batch_ready(self):
+        now = time.perf_counter()
+        self.data_time += now - self._mark
+
+    def step_done(self, batch_size):
+        self.images += batch_size
+        self._mark = time.perf_counter()
+
+    @property
+    def images_per_sec(self):
+        elapsed = time.perf_counter() - self.start
+        return self.images / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        elapsed = time.perf_counter() - self.start
+        wait_pct = 100.0 * self.data_time / elapsed if elapsed > 0 else 0.0
+        return f"{self.images_per_sec:.1f} images/sec ({wait_pct:.0f}% waiting on data)"
@@ -0,0 +1,173 @@
+"""
+Pre-decoded dataset cache for training
+Decodes and resizes every image once into a single uint8 memory-mapped array
+(N x IMAGE_SIZE x IMAGE_SIZE x 3) with a label array and an index file.
+Later epochs read pixels straight from the page cache instead of decoding JPEGs.
+
+Used by train_plant_disease_model.py and train_subset_model.py (Config.USE_CACHE).
+Can also be built ahead of time:
+    python dataset_cache.py --data "path/to/plantvillage dataset" --size 224
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+from PIL import Image
+from torch.utils.data import Dataset
+from tqdm import tqdm
+
+IMAGES_FILE = "images.u8"
+LABELS_FILE = "labels.npy"
+INDEX_FILE = "index.json"
+
+def cache_key(image_paths, labels, image_size):
+    """Identity of a cache: the exact image list, labels and size"""
+    digest = hashlib.sha256(str(image_size).encode())
+    for path, label in zip(image_paths, labels):
+        digest.update(f"{path}\t{label}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def _decode(path, image_size):
+    # PIL releases the GIL while decoding/resizing, so threads scale here
+    with Image.open(path) as image:
+        image.draft('RGB', (image_size, image_size))  # JPEG: decode at reduced scale when possible
+        return np.asarray(image.convert('RGB').resize((image_size, image_size), Image.BILINEAR), dtype=np.uint8)
+
+def _decode_all(images, image_paths, indices, image_size, workers, desc):
+    """Decode images[idx] for each index; unreadable ones are zeroed and returned"""
+    failed = []
+
+    def load(idx):
+        try:
+            images[idx] = _decode(image_paths[idx], image_size)
+        except Exception as e:
+            print(f"Error loading {image_paths[idx]}: {e}")
+            images[idx] = 0
+            failed.append(idx)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        list(tqdm(executor.map(load, indices), total=len(indices), desc=desc))
+    images.flush()
+    return sorted(failed)
+
+def _write_index(index_path, index):
+    with open(index_path, "w") as f:
+        json.dump(index, f)
+
+def compile_dataset_cache(image_paths, labels, cache_root, image_size, class_names=None, workers=None):
+    """
+    Decode and resize all images into a memory-mapped cache (skipped if an identical cache exists)
+    Images that failed to decode before are retried when an existing cache is reused;
+    MemmapDataset leaves out whichever still fail.
+
+    Args:
+        image_paths: List of image file paths
+        labels: Class index per image
+        cache_root: Directory holding caches; each image list/size gets its own subdirectory
+        image_size: Square side length in pixels
+        class_names: Stored in the index for reference
+        workers: Decoder threads (default: all cores)
+
+    Returns:
+        str: Directory of the cache, for MemmapDataset
+    """
+    key = cache_key(image_paths, labels, image_size)
+    cache_dir = os.path.join(cache_root, f"{image_size}px_{key}")
+    index_path = os.path.join(cache_dir, INDEX_FILE)
+    if os.path.exists(index_path):
+        with open(index_path, "r") as f:
+            index = json.load(f)
+        if index.get("key") == key:
+            if index.get("failed"):
+                print(f"🔁 Retrying {len(index['failed'])} images that failed to decode last time")
+                images = np.memmap(os.path.join(cache_dir, IMAGES_FILE), dtype=np.uint8, mode='r+',
+                                   shape=(index["count"], image_size, image_size, 3))
+                index["failed"] = _decode_all(images, image_paths, index["failed"], image_size, workers, "Retrying")
+                del images
+                _write_index(index_path, index)
+            print(f"✅ Using dataset cache: {cache_dir} ({len(index.get('failed', []))} unreadable images left out)")
+            return cache_dir
+
+    os.makedirs(cache_dir, exist_ok=True)
+    count = len(image_paths)
+    print(f"📦 Compiling dataset cache: {count} images at {image_size}x{image_size} -> {cache_dir}")
+
+    images = np.memmap(os.path.join(cache_dir, IMAGES_FILE), dtype=np.uint8, mode='w+',
+                       shape=(count, image_size, image_size, 3))
+    failed = _decode_all(images, image_paths, range(count), image_size, workers, "Decoding")
+    del images
+    np.save(os.path.join(cache_dir, LABELS_FILE), np.asarray(labels, dtype=np.int64))
+
+    # Index last: a cache without a matching index is treated as incomplete
+    _write_index(index_path, {
+        "key": key,
+        "count": count,
+        "image_size": image_size,
+        "class_names": class_names,
+        "paths": list(image_paths),
+        "failed": failed
+    })
+
+    size_gb = count * image_size * image_size * 3 / 1024 ** 3
+    print(f"✅ Dataset cache ready ({size_gb:.2f} GB, {len(failed)} unreadable images left out)")
+    return cache_dir
+
+class MemmapDataset(Dataset):
+    """
+    Dataset over a compiled cache
+    Returns (uint8 CHW tensor viewing the memmap, label), so nothing is decoded
+    or copied until the batch is collated (augmentation runs per batch, see data_pipeline.py).
+    Images that failed to decode (blank in the cache) are left out.
+    """
+
+    def __init__(self, cache_dir, indices=None, transform=None):
+        with open(os.path.join(cache_dir, INDEX_FILE), "r") as f:
+            index = json.load(f)
+        self.cache_dir = cache_dir
+        self.image_size = index["image_size"]
+        self.count = index["count"]
+        self.labels = np.load(os.path.join(cache_dir, LABELS_FILE))
+        indices = np.arange(self.count) if indices is None else np.asarray(indices)
+        failed = index.get("failed") or []
+        self.indices = indices[~np.isin(indices, failed)] if failed else indices
+        self.transform = transform
+        self._images = None  # opened lazily, once per DataLoader worker
+
+    def _open(self):
+        # Copy-on-write mapping: writable views for torch.from_numpy, file never modified
+        self._images = np.memmap(os.path.join(self.cache_dir, IMAGES_FILE), dtype=np.uint8, mode='c',
+                                 shape=(self.count, self.image_size, self.image_size, 3))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_images"] = None
+        return state
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, idx):
+        if self._images is None:
+            self._open()
+        row = int(self.indices[idx])
+        image = torch.from_numpy(self._images[row]).permute(2, 0, 1)
+        if self.transform:
+            image = self.transform(image)
+        return image, int(self.labels[row])
+
+if __name__ == "__main__":
+    import argparse
+    from train_plant_disease_model import load_dataset
+
+    parser = argparse.ArgumentParser(description="Compile the PlantVillage dataset cache")
+    parser.add_argument('--data', required=True, help="PlantVillage dataset root")
+    parser.add_argument('--size', type=int, default=224)
+    parser.add_argument('--output', default="dataset_cache", help="Cache root directory")
+    args = parser.parse_args()
+
+    paths, labels, class_names = load_dataset(args.data)
+    compile_dataset_cache(paths, labels, args.output, args.size, class_names)
@@ -0,0 +1,148 @@
+"""
+Dataset manifest for PlantVillage
+One os.scandir pass per class folder (folders scanned in parallel) instead of
+a glob per extension. Records path, label, size, mtime and a content hash per
+image, cached on disk and refreshed incrementally: only new or changed files
+are hashed again, so re-indexing the ~160k-image tree takes seconds.
+
+Used by train_plant_disease_model.py and train_subset_model.py.
+Can also be refreshed ahead of time:
+    python dataset_manifest.py --data "path/to/plantvillage dataset"
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+def file_hash(path, chunk_size=1 << 20):
+    """Content hash of a file (BLAKE2b, 128-bit hex)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _scan_folder(folder, previous):
+    """
+    List the images in one class folder, reusing hashes of unchanged files
+
+    Args:
+        folder: Class folder path
+        previous: {file name: [size, mtime_ns, hash]} from the last manifest
+
+    Returns:
+        tuple: ({file name: [size, mtime_ns, hash]}, number of files hashed)
+    """
+    files = {}
+    hashed = 0
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            stat = entry.stat()
+            old = previous.get(entry.name)
+            if old and old[0] == stat.st_size and old[1] == stat.st_mtime_ns:
+                digest = old[2]
+            else:
+                digest = file_hash(entry.path)
+                hashed += 1
+            files[entry.name] = [stat.st_size, stat.st_mtime_ns, digest]
+    return dict(sorted(files.items())), hashed
+
+def _load_manifest(manifest_path, root):
+    if not manifest_path or not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Ignoring unreadable manifest {manifest_path}: {e}")
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("root") != root:
+        return {}
+    return manifest.get("folders", {})
+
+def _save_manifest(manifest_path, root, folders):
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": MANIFEST_VERSION, "root": root, "folders": folders}, f)
+    # Replace in one step so an interrupted run never leaves a half-written manifest
+    os.replace(tmp_path, manifest_path)
+
+def build_manifest(dataset_path, image_types, manifest_path=None, workers=None):
+    """
+    Index all images under dataset_path/<image_type>/<class_name>/
+
+    Args:
+        dataset_path: PlantVillage dataset root
+        image_types: Subfolders holding class folders, e.g. ['color', 'grayscale', 'segmented']
+        manifest_path: Cached manifest to reuse and update (None = always hash everything, don't save)
+        workers: Folder scanning threads (default: 4 per core, up to 32)
+
+    Returns:
+        list: [{'path', 'image_type', 'class_name', 'size', 'mtime_ns', 'hash'}], ordered
+              by image type (as given), class name, then file name
+    """
+    start = time.perf_counter()
+    root = os.path.abspath(dataset_path)
+    previous = _load_manifest(manifest_path, root)
+
+    folders = []
+    for image_type in image_types:
+        type_dir = os.path.join(root, image_type)
+        if not os.path.isdir(type_dir):
+            continue
+        with os.scandir(type_dir) as entries:
+            class_dirs = sorted(entry.name for entry in entries if entry.is_dir())
+        folders.extend((image_type, class_name) for class_name in class_dirs)
+
+    def scan(folder):
+        image_type, class_name = folder
+        key = f"{image_type}/{class_name}"
+        return key, _scan_folder(os.path.join(root, image_type, class_name), previous.get(key, {}))
+
+    # Stat calls and hashing are I/O bound and release the GIL, so threads scale here
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as executor:
+        results = list(executor.map(scan, folders))
+
+    # Folders of other image types stay in the manifest for runs that index them
+    current = {key: files for key, files in previous.items() if key.split("/")[0] not in image_types}
+    current.update((key, files) for key, (files, _) in results)
+    hashed = sum(count for _, (_, count) in results)
+    if manifest_path and current != previous:
+        _save_manifest(manifest_path, root, current)
+
+    entries = []
+    for (image_type, class_name), (_, (files, _)) in zip(folders, results):
+        folder = os.path.join(root, image_type, class_name)
+        for name, (size, mtime_ns, digest) in files.items():
+            entries.append({
+                'path': os.path.join(folder, name),
+                'image_type': image_type,
+                'class_name': class_name,
+                'size': size,
+                'mtime_ns': mtime_ns,
+                'hash': digest
+            })
+
+    print(f"🗂️  Indexed {len(entries)} images in {len(folders)} folders "
+          f"({hashed} new or changed) in {time.perf_counter() - start:.1f}s")
+    return entries
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or refresh the PlantVillage dataset manifest")
+    parser.add_argument('--data', required=True, help="PlantVillage dataset root")
+    parser.add_argument('--types', nargs='+', default=['color', 'grayscale', 'segmented'])
+    parser.add_argument('--output', default=os.path.join("dataset_cache", MANIFEST_FILE), help="Manifest file")
+    args = parser.parse_args()
+
+    build_manifest(args.data, args.types, args.output)
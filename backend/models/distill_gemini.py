@@ -0,0 +1,437 @@
+"""
+Gemini Distillation Script
+Fine-tunes the local MobileNetV2 classifier on images Gemini labeled with high
+confidence, so more traffic can be answered locally at CPU speed.
+
+1. Harvest   - Gemini predictions from the predictions table (confidence >= MIN_CONFIDENCE,
+               or confirmed/corrected by a user, whose label wins)
+2. Map       - each (crop type, disease name) onto the model's class vocabulary; labels
+               that match no class but recur often enough become new classes
+3. Fine-tune - on the harvested images (plus optional PlantVillage replay), via the
+               shared training engine; the best epoch is picked on a validation slice of
+               the training images, so the holdout stays unseen until step 4
+4. Evaluate  - agreement with Gemini on a fixed holdout (every HOLDOUT_EVERY-th prediction id),
+               overall and on what the cascade would serve locally, for the current and
+               the distilled model
+
+Run from backend/models:
+    python distill_gemini.py                  # writes plant_disease_model_distilled.pth + report
+    python distill_gemini.py --deploy         # also replaces plant_disease_model.pth if it agrees more
+
+Restart the backend to serve a deployed model, and re-run calibrate_cascade.py when the
+class list changed.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import sqlite3
+from collections import Counter, defaultdict
+from datetime import datetime
+from io import BytesIO
+
+import requests
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from PIL import Image
+from torchvision import models
+from tqdm import tqdm
+
+from custom_model_inference import PlantDiseasePredictor
+from dataset_cache import compile_dataset_cache, MemmapDataset
+from dataset_manifest import build_manifest, MANIFEST_FILE
+from data_pipeline import BatchAugment, default_num_workers, make_loader
+from training_engine import TrainingEngine
+
+# ==================== CONFIGURATION ====================
+class Config:
+    DB_PATH = "../database/predictions.db"
+    MODEL_PATH = "plant_disease_model.pth"          # Current local model (the student's starting point)
+    OUTPUT_PATH = "plant_disease_model_distilled.pth"
+    CLASS_NAMES_FILE = "class_names.json"
+    REPORT_PATH = "distillation_report.json"
+    CALIBRATION_PATH = "cascade_calibration.json"   # Defines what "served locally" means
+    IMAGE_DIR = "../datasets/distill/images"        # Downloaded Gemini-labeled images, <prediction id>.jpg
+    CACHE_DIR = "dataset_cache"
+
+    # Harvest
+    MIN_CONFIDENCE = 85.0       # Gemini confidence (%) required for unverified predictions
+    MIN_MATCH_SCORE = 0.75      # Token overlap (Dice) needed to map a label onto an existing class
+    NEW_CLASS_MIN_SAMPLES = 30  # Unmapped labels seen this often become new classes (0 = never add classes)
+    HOLDOUT_EVERY = 5           # Prediction ids divisible by this are held out for evaluation
+    VAL_FRACTION = 0.1          # Of the training images, kept aside to pick the best epoch
+    MIN_TRAIN_SAMPLES = 50
+
+    # Optional PlantVillage replay, so fine-tuning doesn't forget the original classes
+    REPLAY_DATASET_PATH = None  # e.g. "path/to/plantvillage dataset"
+    REPLAY_IMAGES_PER_CLASS = 50
+
+    # Fine-tuning
+    IMAGE_SIZE = 224
+    BATCH_SIZE = 32
+    EPOCHS = 4
+    LEARNING_RATE = 0.0003      # Small steps from trained weights
+    NUM_WORKERS = default_num_workers()
+    PRECISION = "auto"
+    CHANNELS_LAST = True
+
+    # Cascade defaults when no calibration file exists (see utils/cascade.py)
+    DEFAULT_CONFIDENCE_THRESHOLD = 90.0
+    DEFAULT_MIN_MARGIN = 30.0
+
+# ==================== HARVEST ====================
+def harvest(db_path, min_confidence):
+    """Gemini-labeled predictions: high-confidence ones, plus any a user verified (corrections win)"""
+    # Read-only: the backend may be writing to the database
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(predictions)")]
+    if "source" not in columns:
+        conn.close()
+        return []
+    rows = conn.execute("""
+        SELECT id, image_url, COALESCE(feedback, disease_name), crop_type, confidence, verified
+        FROM predictions
+        WHERE source = 'gemini_vision' AND (confidence >= ? OR verified = 1)
+        ORDER BY id
+    """, (min_confidence,)).fetchall()
+    conn.close()
+    return [
+        {"id": row[0], "image_url": row[1], "label": row[2], "crop_type": row[3] or "",
+         "confidence": row[4], "verified": bool(row[5])}
+        for row in rows
+    ]
+
+# ==================== CLASS VOCABULARY ====================
+STOPWORDS = {"disease", "diseases", "infection", "plant", "of", "the", "and", "on", "in", "including"}
+
+def tokens(text):
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS]
+
+def dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+class ClassVocabulary:
+    """Maps Gemini (crop type, disease name) labels onto PlantVillage-style "Crop___Disease" classes"""
+
+    def __init__(self, class_names, min_score):
+        self.class_names = list(class_names)
+        self.min_score = min_score
+        # class name -> (crop prefix, crop tokens, disease tokens)
+        self.parsed = {}
+        for name in self.class_names:
+            crop, _, disease = name.partition("___")
+            self.parsed[name] = (crop, set(tokens(crop.replace("_", " "))), set(tokens(disease.replace("_", " "))))
+
+    def _crop(self, crop_type, label_tokens):
+        """PlantVillage crop prefix for a Gemini crop type (or for crop words inside the label)"""
+        wanted = (set(tokens(crop_type)) - {"unknown"}) or set(label_tokens)
+        for crop, crop_tokens, _ in self.parsed.values():
+            if crop_tokens & wanted:
+                return crop, crop_tokens
+        return None, set()
+
+    def match(self, label, crop_type):
+        """
+        Returns:
+            tuple: (class name, 'matched'), (proposed new class name, 'new')
+                   or (None, 'no_disease' | 'ambiguous' | 'unknown_crop')
+        """
+        label_tokens = tokens(label.replace("_", " "))
+        crop, crop_tokens = self._crop(crop_type, label_tokens)
+        crop_words = set(tokens(crop_type)) - {"unknown"}
+        disease = set(label_tokens) - crop_tokens - crop_words
+        if not disease:
+            return None, "no_disease"
+
+        if crop:
+            scored = sorted(
+                ((dice(disease, class_disease), name) for name, (class_crop, _, class_disease) in self.parsed.items()
+                 if class_crop == crop),
+                reverse=True
+            )
+            if scored and scored[0][0] >= self.min_score and (len(scored) == 1 or scored[1][0] < scored[0][0]):
+                return scored[0][1], "matched"
+            if scored and scored[0][0] > 0:
+                # Partly like an existing class ("Rust" vs "Common_rust_"): neither a match nor a new class
+                return None, "ambiguous"
+
+        crop_name = crop or "_".join(word.capitalize() for word in tokens(crop_type) if word in crop_words)
+        if not crop_name:
+            return None, "unknown_crop"
+        disease_name = "_".join(token for token in label_tokens if token in disease).capitalize()
+        return f"{crop_name}___{disease_name}", "new"
+
+def build_vocabulary(samples, class_names):
+    """
+    Label every sample with a class, adding recurring unmapped labels as new classes
+
+    Returns:
+        tuple: (labeled samples, class names (existing first), skip reasons)
+    """
+    vocabulary = ClassVocabulary(class_names, Config.MIN_MATCH_SCORE)
+    matched, proposed, skipped = [], defaultdict(list), Counter()
+    for sample in samples:
+        class_name, reason = vocabulary.match(sample["label"], sample["crop_type"])
+        if reason == "matched":
+            matched.append({**sample, "class_name": class_name})
+        elif reason == "new":
+            proposed[class_name].append(sample)
+        else:
+            skipped[reason] += 1
+
+    class_names = list(class_names)
+    for class_name, group in sorted(proposed.items()):
+        if Config.NEW_CLASS_MIN_SAMPLES and len(group) >= Config.NEW_CLASS_MIN_SAMPLES:
+            class_names.append(class_name)
+            matched.extend({**sample, "class_name": class_name} for sample in group)
+        else:
+            skipped["rare_label"] += len(group)
+    return matched, class_names, skipped
+
+# ==================== IMAGES ====================
+def download_images(samples):
+    """Fetch each sample's image once into IMAGE_DIR; returns the samples whose image is available"""
+    os.makedirs(Config.IMAGE_DIR, exist_ok=True)
+    available = []
+    for sample in tqdm(samples, desc="Downloading", ncols=100):
+        path = os.path.join(Config.IMAGE_DIR, f"{sample['id']}.jpg")
+        if not os.path.exists(path):
+            try:
+                response = requests.get(sample["image_url"], timeout=30)
+                response.raise_for_status()
+                Image.open(BytesIO(response.content)).convert('RGB').save(path, quality=95)
+            except Exception as e:
+                print(f"Skipping prediction {sample['id']}: {e}")
+                continue
+        available.append({**sample, "path": path})
+    return available
+
+def replay_samples(class_names):
+    """A few PlantVillage images per existing class (empty without REPLAY_DATASET_PATH)"""
+    if not Config.REPLAY_DATASET_PATH:
+        return []
+    entries = build_manifest(Config.REPLAY_DATASET_PATH, ['color'], os.path.join(Config.CACHE_DIR, MANIFEST_FILE))
+    by_class = defaultdict(list)
+    for entry in entries:
+        by_class[entry['class_name']].append(entry['path'])
+
+    rng = random.Random(42)
+    replay = []
+    for class_name in class_names:
+        paths = by_class.get(class_name, [])
+        for path in rng.sample(paths, min(len(paths), Config.REPLAY_IMAGES_PER_CLASS)):
+            replay.append({"path": path, "class_name": class_name})
+    return replay
+
+# ==================== MODEL ====================
+def load_student(class_names, device):
+    """
+    The current model with its head widened to class_names (new rows start at zero),
+    or ImageNet MobileNetV2 if the current model isn't a MobileNetV2
+    """
+    model = models.mobilenet_v2(weights=None)
+    old_head = None
+    if os.path.exists(Config.MODEL_PATH):
+        checkpoint = torch.load(Config.MODEL_PATH, map_location=device)
+        if checkpoint['model_name'] == "mobilenet_v2":
+            model.classifier[1] = nn.Linear(model.last_channel, checkpoint['num_classes'])
+            model.load_state_dict(checkpoint['model_state_dict'])
+            old_head = model.classifier[1]
+            print(f"Student: {Config.MODEL_PATH} ({checkpoint['num_classes']} classes)")
+    if old_head is None:
+        print(f"Student: ImageNet MobileNetV2 ({Config.MODEL_PATH} is missing or not a MobileNetV2)")
+        model = models.mobilenet_v2(weights=models.MobileNet_V2_Weights.DEFAULT)
+
+    head = nn.Linear(model.last_channel, len(class_names))
+    if old_head is not None:
+        with torch.no_grad():
+            nn.init.zeros_(head.weight)
+            nn.init.zeros_(head.bias)
+            head.weight[:old_head.out_features] = old_head.weight
+            head.bias[:old_head.out_features] = old_head.bias
+    model.classifier[1] = head
+    return model
+
+def save_model(model, class_names, path, extra):
+    torch.save({
+        'model_state_dict': model.state_dict(),
+        'class_names': class_names,
+        'num_classes': len(class_names),
+        'model_name': "mobilenet_v2",
+        'image_size': Config.IMAGE_SIZE,
+        **extra
+    }, path)
+
+# ==================== EVALUATION ====================
+def load_cascade_settings():
+    settings = {
+        'temperature': 1.0,
+        'confidence_threshold': Config.DEFAULT_CONFIDENCE_THRESHOLD,
+        'min_margin': Config.DEFAULT_MIN_MARGIN
+    }
+    if os.path.exists(Config.CALIBRATION_PATH):
+        with open(Config.CALIBRATION_PATH, "r") as f:
+            calibration = json.load(f)
+        settings.update({key: calibration[key] for key in settings if calibration.get(key) is not None})
+    return settings
+
+def evaluate(model_path, holdout, cascade):
+    """
+    Agreement with Gemini on the holdout, overall and on what the cascade would serve locally
+
+    Returns:
+        dict: {'samples', 'agreement', 'local_coverage', 'local_agreement'}
+    """
+    predictor = PlantDiseasePredictor(model_path, temperature=cascade['temperature'])
+    agree = local = local_agree = 0
+    for start in tqdm(range(0, len(holdout), Config.BATCH_SIZE), desc="Evaluating", ncols=100):
+        batch = holdout[start:start + Config.BATCH_SIZE]
+        for sample, result in zip(batch, predictor.predict_batch([sample['path'] for sample in batch])):
+            hit = result['disease_name'] == sample['class_name']
+            agree += hit
+
+            # Same acceptance rule as utils/cascade.py
+            predictions = result['all_predictions']
+            runner_up = predictions[1]['confidence'] if len(predictions) > 1 else 0.0
+            if (result['confidence'] >= cascade['confidence_threshold']
+                    and result['confidence'] - runner_up >= cascade['min_margin']):
+                local += 1
+                local_agree += hit
+
+    return {
+        'samples': len(holdout),
+        'agreement': round(agree / len(holdout), 4),
+        'local_coverage': round(local / len(holdout), 4),
+        'local_agreement': round(local_agree / local, 4) if local else None
+    }
+
+# ==================== MAIN ====================
+def distill(deploy=False, min_confidence=Config.MIN_CONFIDENCE):
+    print("=" * 60)
+    print("🧪 GEMINI DISTILLATION")
+    print("=" * 60)
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    if os.path.exists(Config.MODEL_PATH):
+        base_classes = torch.load(Config.MODEL_PATH, map_location='cpu')['class_names']
+    else:
+        with open(Config.CLASS_NAMES_FILE, "r") as f:
+            base_classes = json.load(f)
+
+    # 1-2. Harvest and map onto the class vocabulary
+    harvested = harvest(Config.DB_PATH, min_confidence)
+    print(f"Harvested {len(harvested)} Gemini-labeled predictions (confidence >= {min_confidence}% or verified)")
+    labeled, class_names, skipped = build_vocabulary(harvested, base_classes)
+    new_classes = class_names[len(base_classes):]
+    print(f"Mapped {len(labeled)} onto {len(class_names)} classes ({len(new_classes)} new), skipped {dict(skipped)}")
+    for class_name in new_classes:
+        print(f"   + {class_name}")
+
+    samples = download_images(labeled)
+    holdout = [sample for sample in samples if sample['id'] % Config.HOLDOUT_EVERY == 0]
+    train = [sample for sample in samples if sample['id'] % Config.HOLDOUT_EVERY != 0]
+    replay = replay_samples(base_classes)
+    if len(train) < Config.MIN_TRAIN_SAMPLES or not holdout:
+        print(f"❌ Not enough data yet: {len(train)} training images, holdout {len(holdout)} "
+              f"(need {Config.MIN_TRAIN_SAMPLES} training images and a non-empty holdout)")
+        return None
+
+    # Checkpoint selection gets its own slice: choosing the epoch on the holdout would bias the deploy gate
+    random.Random(42).shuffle(train)
+    val_size = max(1, int(len(train) * Config.VAL_FRACTION))
+    val, train = train[:val_size], train[val_size:]
+    print(f"Training on {len(train)} Gemini + {len(replay)} replay images, validation {len(val)}, holdout {len(holdout)}")
+
+    # 3. Fine-tune
+    class_to_idx = {name: idx for idx, name in enumerate(class_names)}
+    train_paths = [sample['path'] for sample in train + replay]
+    train_labels = [class_to_idx[sample['class_name']] for sample in train + replay]
+    train_cache = compile_dataset_cache(train_paths, train_labels, Config.CACHE_DIR, Config.IMAGE_SIZE, class_names)
+    val_cache = compile_dataset_cache(
+        [sample['path'] for sample in val], [class_to_idx[sample['class_name']] for sample in val],
+        Config.CACHE_DIR, Config.IMAGE_SIZE, class_names
+    )
+    train_loader = make_loader(MemmapDataset(train_cache), Config.BATCH_SIZE, shuffle=True, device=device,
+                               num_workers=Config.NUM_WORKERS)
+    val_loader = make_loader(MemmapDataset(val_cache), Config.BATCH_SIZE, shuffle=False, device=device,
+                             num_workers=Config.NUM_WORKERS)
+
+    model = load_student(class_names, device)
+    optimizer = optim.Adam(model.parameters(), lr=Config.LEARNING_RATE)
+    engine = TrainingEngine(model, nn.CrossEntropyLoss(), optimizer, device,
+                            precision=Config.PRECISION, channels_last=Config.CHANNELS_LAST)
+    augment = BatchAugment(hflip=0.5, degrees=15, brightness=0.2, contrast=0.2, saturation=0.2)
+
+    best_acc = -1.0
+    for epoch in range(Config.EPOCHS):
+        print(f"\n📍 Epoch {epoch+1}/{Config.EPOCHS}")
+        train_loader.sampler.set_epoch(epoch)
+        train_loss, train_acc, _ = engine.train_epoch(train_loader, augment)
+        val_loss, val_acc = engine.validate(val_loader)
+        print(f"   Train - Loss: {train_loss:.4f} | Acc: {train_acc:.2f}%")
+        print(f"   Val   - Loss: {val_loss:.4f} | Acc: {val_acc:.2f}%")
+        if val_acc > best_acc:
+            best_acc = val_acc
+            save_model(model, class_names, Config.OUTPUT_PATH, {'epoch': epoch, 'best_acc': best_acc})
+
+    # 4. Evaluate both models the way the backend serves them, on the untouched holdout
+    cascade = load_cascade_settings()
+    distilled = evaluate(Config.OUTPUT_PATH, holdout, cascade)
+    baseline = evaluate(Config.MODEL_PATH, holdout, cascade) if os.path.exists(Config.MODEL_PATH) else None
+
+    print("\n" + "=" * 60)
+    print(f"{'':<12}{'agreement':>12}{'served locally':>16}{'local agreement':>18}")
+    for name, result in (("current", baseline), ("distilled", distilled)):
+        if result:
+            print(f"{name:<12}{result['agreement']:>12.1%}{result['local_coverage']:>16.1%}"
+                  f"{str(result['local_agreement']):>18}")
+
+    improved = baseline is None or distilled['agreement'] > baseline['agreement']
+    deployed = False
+    if deploy and improved:
+        if os.path.exists(Config.MODEL_PATH):
+            os.makedirs("backup", exist_ok=True)
+            shutil.copy(Config.MODEL_PATH, f"backup/plant_disease_model_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pth")
+        shutil.copy(Config.OUTPUT_PATH, Config.MODEL_PATH)
+        with open(Config.CLASS_NAMES_FILE, 'w') as f:
+            json.dump(class_names, f, indent=2)
+        deployed = True
+        print(f"✅ Deployed to {Config.MODEL_PATH} - restart the backend to serve it")
+        if new_classes:
+            print("   Class list changed: re-run calibrate_cascade.py")
+    elif deploy:
+        print(f"⚠️  Distilled model doesn't agree with Gemini more than the current one - not deployed")
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'min_confidence': min_confidence,
+        'harvested': len(harvested),
+        'mapped': len(labeled),
+        'skipped': dict(skipped),
+        'train_images': len(train),
+        'replay_images': len(replay),
+        'val_images': len(val),
+        'holdout_images': len(holdout),
+        'new_classes': new_classes,
+        'cascade': cascade,
+        'current': baseline,
+        'distilled': distilled,
+        'deployed': deployed
+    }
+    with open(Config.REPORT_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Report saved: {Config.REPORT_PATH}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill Gemini labels into the local classifier")
+    parser.add_argument('--deploy', action='store_true',
+                        help=f"Replace {Config.MODEL_PATH} if the distilled model agrees with Gemini more")
+    parser.add_argument('--min-confidence', type=float, default=Config.MIN_CONFIDENCE)
+    args = parser.parse_args()
+
+    distill(deploy=args.deploy, min_confidence=args.min_confidence)
@@ -9,15 +9,18 @@ Upload this to Google Colab and run to train the model
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader, Dataset
+from torch.utils.data import Dataset
 from torchvision import transforms, models
 from PIL import Image
 import os
 import json
-from pathlib import Path
-from tqdm import tqdm
 import numpy as np
 from sklearn.model_selection import train_test_split
+from dataset_cache import compile_dataset_cache, MemmapDataset
+from dataset_manifest import build_manifest, MANIFEST_FILE
+from data_pipeline import BatchAugment, default_num_workers, make_loader
+from training_engine import TrainingEngine
+from checkpointing import CheckpointManager, EarlyStopping
 
 # ==================== CONFIGURATION ====================
 class Config:
@@ -30,7 +33,7 @@ class Config:
     BATCH_SIZE = 32
     EPOCHS = 5
     LEARNING_RATE = 0.001
-    NUM_WORKERS = 0  # Set to 0 for Windows
+    NUM_WORKERS = default_num_workers()  # Loader processes (platform-aware; 0 = load in this process)
     
     # Model architecture
     MODEL_NAME = "efficientnet_b0"  # Options: resnet50, efficientnet_b0, mobilenet_v2
@@ -38,6 +41,22 @@ class Config:
     # Output
     OUTPUT_PATH = "plant_disease_model.pth"  # For local
     CLASS_NAMES_FILE = "class_names.json"
+    
+    # Training engine (see training_engine.py)
+    PRECISION = "auto"  # auto = bfloat16 autocast where the CPU/GPU supports it, else fp32
+    CHANNELS_LAST = True
+    ACCUMULATION_STEPS = 1  # Effective batch size = BATCH_SIZE x ACCUMULATION_STEPS
+    COMPILE = False  # torch.compile the model (slow first epoch, faster afterwards)
+    
+    # Checkpointing and early stopping (see checkpointing.py); resume with --resume
+    CHECKPOINT_PATH = "training_checkpoint.pth"
+    CHECKPOINT_INTERVAL_MINUTES = 10  # Mid-epoch checkpoints; one is always written after each epoch
+    EARLY_STOPPING_PATIENCE = 5  # Epochs without val_acc improvement before stopping (0 = off)
+    EARLY_STOPPING_MIN_DELTA = 0.1  # Accuracy points that count as an improvement
+    
+    # Decode/resize images once into a memory-mapped cache (see dataset_cache.py)
+    USE_CACHE = True
+    CACHE_DIR = "dataset_cache"
 
 # ==================== DATASET CLASS ====================
 class PlantDiseaseDataset(Dataset):
@@ -63,40 +82,16 @@ def load_dataset(dataset_path):
     """Load PlantVillage dataset from directory structure"""
     print("Loading dataset...")
     
-    image_paths = []
-    labels = []
-    class_names = set()  # Use a set to store unique class names
-    
-    dataset_path = Path(dataset_path)
     image_types = ['color', 'grayscale', 'segmented']  # Subfolders containing class folders
+    manifest_path = os.path.join(Config.CACHE_DIR, MANIFEST_FILE)
+    entries = build_manifest(dataset_path, image_types, manifest_path)
     
-    # First, find all unique class names across all image types
-    for image_type in image_types:
-        image_type_folder = dataset_path / image_type
-        if image_type_folder.is_dir():
-            class_folders_in_type = [f.name for f in image_type_folder.iterdir() if f.is_dir()]
-            class_names.update(class_folders_in_type)
-    
-    class_names = sorted(list(class_names))  # Convert set to sorted list
+    # Unique class names across all image types
+    class_names = sorted({entry['class_name'] for entry in entries})
     class_to_idx = {name: idx for idx, name in enumerate(class_names)}
     
-    # Now, load images from the specified subfolders within each class folder
-    for image_type in image_types:
-        image_type_folder = dataset_path / image_type
-        if image_type_folder.is_dir():
-            for class_name in class_names:
-                class_folder = image_type_folder / class_name
-                if class_folder.is_dir():
-                    class_idx = class_to_idx[class_name]
-                    for img_file in class_folder.glob('*.jpg'):
-                        image_paths.append(str(img_file))
-                        labels.append(class_idx)
-                    for img_file in class_folder.glob('*.JPG'):
-                        image_paths.append(str(img_file))
-                        labels.append(class_idx)
-                    for img_file in class_folder.glob('*.png'):
-                        image_paths.append(str(img_file))
-                        labels.append(class_idx)
+    image_paths = [entry['path'] for entry in entries]
+    labels = [class_to_idx[entry['class_name']] for entry in entries]
     
     print(f"Found {len(image_paths)} images across {len(class_names)} classes")
     print(f"Classes: {class_names}")
@@ -104,24 +99,17 @@ def load_dataset(dataset_path):
     return image_paths, labels, class_names
 
 # ==================== DATA TRANSFORMS ====================
-def get_transforms():
+def get_transforms(cached=False):
     """Data augmentation and normalization"""
-    train_transform = transforms.Compose([
-        transforms.Resize((Config.IMAGE_SIZE, Config.IMAGE_SIZE)),
-        transforms.RandomHorizontalFlip(),
-        transforms.RandomRotation(15),
-        transforms.ColorJitter(brightness=0.2, contrast=0.2, saturation=0.2),
-        transforms.ToTensor(),
-        transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
-    ])
-    
-    val_transform = transforms.Compose([
+    # Loader workers only decode/resize to uint8; augmentation and normalization
+    # run on whole batches on the training device (data_pipeline.BatchAugment)
+    sample_transform = None if cached else transforms.Compose([
         transforms.Resize((Config.IMAGE_SIZE, Config.IMAGE_SIZE)),
-        transforms.ToTensor(),
-        transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+        transforms.PILToTensor()
     ])
+    train_augment = BatchAugment(hflip=0.5, degrees=15, brightness=0.2, contrast=0.2, saturation=0.2)
     
-    return train_transform, val_transform
+    return sample_transform, train_augment
 
 # ==================== MODEL ARCHITECTURE ====================
 def create_model(num_classes):
@@ -145,66 +133,9 @@ def create_model(num_classes):
     
     return model
 
-# ==================== TRAINING FUNCTIONS ====================
-def train_epoch(model, dataloader, criterion, optimizer, device):
-    """Train for one epoch"""
-    model.train()
-    running_loss = 0.0
-    correct = 0
-    total = 0
-    
-    pbar = tqdm(dataloader, desc="Training")
-    for images, labels in pbar:
-        images, labels = images.to(device), labels.to(device)
-        
-        optimizer.zero_grad()
-        outputs = model(images)
-        loss = criterion(outputs, labels)
-        loss.backward()
-        optimizer.step()
-        
-        running_loss += loss.item()
-        _, predicted = outputs.max(1)
-        total += labels.size(0)
-        correct += predicted.eq(labels).sum().item()
-        
-        pbar.set_postfix({
-            'loss': f'{running_loss/len(dataloader):.4f}',
-            'acc': f'{100.*correct/total:.2f}%'
-        })
-    
-    return running_loss/len(dataloader), 100.*correct/total
-
-def validate(model, dataloader, criterion, device):
-    """Validate the model"""
-    model.eval()
-    running_loss = 0.0
-    correct = 0
-    total = 0
-    
-    with torch.no_grad():
-        pbar = tqdm(dataloader, desc="Validation")
-        for images, labels in pbar:
-            images, labels = images.to(device), labels.to(device)
-            
-            outputs = model(images)
-            loss = criterion(outputs, labels)
-            
-            running_loss += loss.item()
-            _, predicted = outputs.max(1)
-            total += labels.size(0)
-            correct += predicted.eq(labels).sum().item()
-            
-            pbar.set_postfix({
-                'loss': f'{running_loss/len(dataloader):.4f}',
-                'acc': f'{100.*correct/total:.2f}%'
-            })
-    
-    return running_loss/len(dataloader), 100.*correct/total
-
 # ==================== MAIN TRAINING LOOP ====================
-def train_model():
-    """Main training function"""
+def train_model(resume=False):
+    """Main training function (resume: continue from Config.CHECKPOINT_PATH)"""
     print("="*50)
     print("Plant Disease Detection Model Training")
     print("="*50)
@@ -216,34 +147,32 @@ def train_model():
     # Load dataset
     image_paths, labels, class_names = load_dataset(Config.DATASET_PATH)
     
-    # Split dataset
-    train_paths, val_paths, train_labels, val_labels = train_test_split(
-        image_paths, labels, test_size=0.2, random_state=42, stratify=labels
+    # Split dataset (by index, so the same split applies to the cache and to file paths)
+    train_idx, val_idx = train_test_split(
+        np.arange(len(labels)), test_size=0.2, random_state=42, stratify=labels
     )
     
-    print(f"Training samples: {len(train_paths)}")
-    print(f"Validation samples: {len(val_paths)}")
-    
-    # Get transforms
-    train_transform, val_transform = get_transforms()
+    print(f"Training samples: {len(train_idx)}")
+    print(f"Validation samples: {len(val_idx)}")
     
     # Create datasets
-    train_dataset = PlantDiseaseDataset(train_paths, train_labels, train_transform)
-    val_dataset = PlantDiseaseDataset(val_paths, val_labels, val_transform)
+    sample_transform, train_augment = get_transforms(cached=Config.USE_CACHE)
+    if Config.USE_CACHE:
+        cache_dir = compile_dataset_cache(image_paths, labels, Config.CACHE_DIR, Config.IMAGE_SIZE, class_names)
+        train_dataset = MemmapDataset(cache_dir, train_idx)
+        val_dataset = MemmapDataset(cache_dir, val_idx)
+    else:
+        train_dataset = PlantDiseaseDataset(
+            [image_paths[i] for i in train_idx], [labels[i] for i in train_idx], sample_transform
+        )
+        val_dataset = PlantDiseaseDataset(
+            [image_paths[i] for i in val_idx], [labels[i] for i in val_idx], sample_transform
+        )
     
     # Create dataloaders
-    train_loader = DataLoader(
-        train_dataset, 
-        batch_size=Config.BATCH_SIZE, 
-        shuffle=True, 
-        num_workers=Config.NUM_WORKERS
-    )
-    val_loader = DataLoader(
-        val_dataset, 
-        batch_size=Config.BATCH_SIZE, 
-        shuffle=False, 
-        num_workers=Config.NUM_WORKERS
-    )
+    train_loader = make_loader(train_dataset, Config.BATCH_SIZE, shuffle=True, device=device, num_workers=Config.NUM_WORKERS)
+    val_loader = make_loader(val_dataset, Config.BATCH_SIZE, shuffle=False, device=device, num_workers=Config.NUM_WORKERS)
+    print(f"Data loading: {Config.NUM_WORKERS} workers")
     
     # Create model
     model = create_model(len(class_names))
@@ -252,6 +181,15 @@ def train_model():
     # Loss and optimizer
     criterion = nn.CrossEntropyLoss()
     optimizer = optim.Adam(model.parameters(), lr=Config.LEARNING_RATE)
+    engine = TrainingEngine(
+        model, criterion, optimizer, device,
+        precision=Config.PRECISION,
+        channels_last=Config.CHANNELS_LAST,
+        accumulation_steps=Config.ACCUMULATION_STEPS,
+        compile_model=Config.COMPILE
+    )
+    checkpoints = CheckpointManager(Config.CHECKPOINT_PATH, Config.CHECKPOINT_INTERVAL_MINUTES)
+    stopper = EarlyStopping(Config.EARLY_STOPPING_PATIENCE, Config.EARLY_STOPPING_MIN_DELTA)
     scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, mode='max', patience=3)
     
     # Training loop
@@ -260,19 +198,60 @@ def train_model():
         'train_loss': [],
         'train_acc': [],
         'val_loss': [],
-        'val_acc': []
+        'val_acc': [],
+        'train_images_per_sec': []
     }
+    start_epoch, start_step, stopped = 0, 0, False
+    
+    def training_state(epoch, step):
+        return {
+            'epoch': epoch,
+            'step': step,
+            'engine': engine.state_dict(),
+            'scheduler': scheduler.state_dict(),
+            'early_stopping': stopper.state_dict(),
+            'stopped': stopped,
+            'best_acc': best_acc,
+            'history': history,
+            'class_names': class_names
+        }
+    
+    def checkpoint_if_due(step):
+        if checkpoints.due():
+            checkpoints.save(training_state(epoch, step))
+    
+    if resume:
+        state = checkpoints.load(device)
+        if state is None:
+            print(f"No checkpoint at {Config.CHECKPOINT_PATH} - starting from scratch")
+        elif state['class_names'] != class_names:
+            raise ValueError(f"Checkpoint {Config.CHECKPOINT_PATH} was trained on different classes")
+        else:
+            engine.load_state_dict(state['engine'])
+            scheduler.load_state_dict(state['scheduler'])
+            stopper.load_state_dict(state['early_stopping'])
+            best_acc, history, stopped = state['best_acc'], state['history'], state['stopped']
+            start_epoch, start_step = state['epoch'], state['step']
+            if stopped:
+                print("Checkpointed run already stopped early - nothing to resume")
+                start_epoch = Config.EPOCHS
+            else:
+                print(f"Resuming at epoch {start_epoch+1}, batch {start_step}")
     
     print("\nStarting training...")
-    for epoch in range(Config.EPOCHS):
+    for epoch in range(start_epoch, Config.EPOCHS):
         print(f"\nEpoch {epoch+1}/{Config.EPOCHS}")
         print("-" * 50)
         
-        # Train
-        train_loss, train_acc = train_epoch(model, train_loader, criterion, optimizer, device)
+        # Train (the sampler skips batches a resumed epoch already trained on)
+        train_loader.sampler.set_epoch(epoch, start=start_step * Config.BATCH_SIZE)
+        train_loss, train_acc, train_speed = engine.train_epoch(
+            train_loader, train_augment, start_step=start_step, on_step=checkpoint_if_due
+        )
+        start_step = 0
         
         # Validate
-        val_loss, val_acc = validate(model, val_loader, criterion, device)
+        val_loss, val_acc = engine.validate(val_loader)
         
         # Update learning rate
         scheduler.step(val_acc)
@@ -282,6 +261,7 @@ def train_model():
         history['train_acc'].append(train_acc)
         history['val_loss'].append(val_loss)
         history['val_acc'].append(val_acc)
+        history['train_images_per_sec'].append(train_speed)
         
         print(f"\nTrain Loss: {train_loss:.4f} | Train Acc: {train_acc:.2f}%")
         print(f"Val Loss: {val_loss:.4f} | Val Acc: {val_acc:.2f}%")
@@ -307,6 +287,13 @@ def train_model():
             # Save class names separately
             with open(Config.CLASS_NAMES_FILE, 'w') as f:
                 json.dump(class_names, f, indent=2)
+        
+        # Early stopping, then a full checkpoint for --resume
+        stopped = stopper.step(val_acc)
+        checkpoints.save(training_state(epoch + 1, 0))
+        if stopped:
+            print(f"Early stopping: no val_acc improvement for {stopper.patience} epochs")
+            break
     
     print("\n" + "="*50)
     print(f"Training completed!")
@@ -347,8 +334,12 @@ if __name__ == "__main__":
     except:
         pass
     
-    # Train model
-    model, class_names, history = train_model()
+    # Train model (parse_known_args: Colab/Jupyter pass their own arguments)
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the plant disease classifier")
+    parser.add_argument('--resume', action='store_true', help=f"Continue from {Config.CHECKPOINT_PATH}")
+    args, _ = parser.parse_known_args()
+    model, class_names, history = train_model(resume=args.resume)
     
     print("\nTraining Summary:")
     print(f"Total classes: {len(class_names)}")
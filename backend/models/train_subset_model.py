@@ -8,15 +8,19 @@ Better coverage + reasonable training time - perfect for hybrid mode!
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader, Dataset
+from torch.utils.data import Dataset
 from torchvision import transforms, models
 from PIL import Image
 import os
 import json
-from pathlib import Path
-from tqdm import tqdm
+import random
 import numpy as np
 from sklearn.model_selection import train_test_split
+from dataset_cache import compile_dataset_cache, MemmapDataset
+from dataset_manifest import build_manifest, MANIFEST_FILE
+from data_pipeline import BatchAugment, default_num_workers, make_loader
+from training_engine import TrainingEngine
+from checkpointing import CheckpointManager, EarlyStopping
 
 # ==================== CONFIGURATION ====================
 class Config:
@@ -31,7 +35,7 @@ class Config:
     BATCH_SIZE = 32  # Good for CPU
     EPOCHS = 5  # 5 epochs for decent accuracy
     LEARNING_RATE = 0.001
-    NUM_WORKERS = 0
+    NUM_WORKERS = default_num_workers()  # Loader processes (platform-aware; 0 = load in this process)
     MAX_IMAGES_PER_CLASS = 400  # 400 images per class - balanced for all classes
     
     # Model architecture - using MobileNet for faster CPU training
@@ -40,6 +44,22 @@ class Config:
     # Output
     OUTPUT_PATH = "plant_disease_model.pth"
     CLASS_NAMES_FILE = "class_names.json"
+    
+    # Training engine (see training_engine.py)
+    PRECISION = "auto"  # auto = bfloat16 autocast where the CPU/GPU supports it, else fp32
+    CHANNELS_LAST = True
+    ACCUMULATION_STEPS = 1  # Effective batch size = BATCH_SIZE x ACCUMULATION_STEPS
+    COMPILE = False  # torch.compile the model (slow first epoch, faster afterwards)
+    
+    # Checkpointing and early stopping (see checkpointing.py); resume with --resume
+    CHECKPOINT_PATH = "training_checkpoint.pth"
+    CHECKPOINT_INTERVAL_MINUTES = 10  # Mid-epoch checkpoints; one is always written after each epoch
+    EARLY_STOPPING_PATIENCE = 3  # Epochs without val_acc improvement before stopping (0 = off)
+    EARLY_STOPPING_MIN_DELTA = 0.1  # Accuracy points that count as an improvement
+    
+    # Decode/resize images once into a memory-mapped cache (see dataset_cache.py)
+    USE_CACHE = True
+    CACHE_DIR = "dataset_cache"
 
 # ==================== DATASET CLASS ====================
 class PlantDiseaseDataset(Dataset):
@@ -63,89 +83,70 @@ class PlantDiseaseDataset(Dataset):
         except Exception as e:
             print(f"Error loading {self.image_paths[idx]}: {e}")
             # Return a black image as fallback
-            return torch.zeros((3, Config.IMAGE_SIZE, Config.IMAGE_SIZE)), self.labels[idx]
+            return torch.zeros((3, Config.IMAGE_SIZE, Config.IMAGE_SIZE), dtype=torch.uint8), self.labels[idx]
 
 # ==================== DATA LOADING ====================
 def load_dataset(dataset_path):
     """Load PlantVillage dataset - ALL CLASSES or SELECTED CLASSES"""
-    dataset_path = Path(dataset_path)
     image_types = ['color']  # Use only color images for speed
+    manifest_path = os.path.join(Config.CACHE_DIR, MANIFEST_FILE)
+    entries = build_manifest(dataset_path, image_types, manifest_path)
     
     # Auto-discover all classes if SELECTED_CLASSES is None
     if Config.SELECTED_CLASSES is None:
         print("🔍 Auto-discovering ALL disease classes...")
-        all_classes = set()
-        for image_type in image_types:
-            image_type_folder = dataset_path / image_type
-            if image_type_folder.is_dir():
-                for class_folder in image_type_folder.iterdir():
-                    if class_folder.is_dir():
-                        all_classes.add(class_folder.name)
-        selected_classes = sorted(list(all_classes))
+        selected_classes = sorted({entry['class_name'] for entry in entries})
         print(f"✅ Found {len(selected_classes)} disease classes")
     else:
         selected_classes = Config.SELECTED_CLASSES
         print(f"📋 Using {len(selected_classes)} selected disease classes")
     
-    image_paths = []
-    labels = []
     class_to_idx = {name: idx for idx, name in enumerate(selected_classes)}
     
-    # Load images for selected classes
-    for image_type in image_types:
-        image_type_folder = dataset_path / image_type
-        if image_type_folder.is_dir():
-            for class_name in selected_classes:
-                class_folder = image_type_folder / class_name
-                if class_folder.is_dir():
-                    class_idx = class_to_idx[class_name]
-                    class_images = []
-                    
-                    # Collect all images for this class
-                    for ext in ['*.jpg', '*.JPG', '*.png', '*.PNG']:
-                        class_images.extend(list(class_folder.glob(ext)))
-                    
-                    # Limit images per class
-                    if len(class_images) > Config.MAX_IMAGES_PER_CLASS:
-                        import random
-                        random.seed(42)
-                        class_images = random.sample(class_images, Config.MAX_IMAGES_PER_CLASS)
-                    
-                    for img_file in class_images:
-                        image_paths.append(str(img_file))
-                        labels.append(class_idx)
+    # Group manifest entries by class (manifest order is sorted, so sampling is reproducible)
+    class_images = {name: [] for name in selected_classes}
+    for entry in entries:
+        if entry['class_name'] in class_images:
+            class_images[entry['class_name']].append(entry['path'])
+    
+    image_paths = []
+    labels = []
+    rng = random.Random(42)
+    for class_name in selected_classes:
+        paths = class_images[class_name]
+        
+        # Limit images per class
+        if len(paths) > Config.MAX_IMAGES_PER_CLASS:
+            paths = rng.sample(paths, Config.MAX_IMAGES_PER_CLASS)
+        
+        image_paths.extend(paths)
+        labels.extend([class_to_idx[class_name]] * len(paths))
     
     print(f"✓ Total images: {len(image_paths)}")
     print(f"✓ Total classes: {len(selected_classes)}")
     print(f"✓ Average per class: {len(image_paths)//len(selected_classes)} images")
     print(f"\n📊 Disease Classes:")
+    counts = np.bincount(labels, minlength=len(selected_classes))
     for i, cls in enumerate(selected_classes):
-        count = labels.count(i)
-        print(f"  {i+1}. {cls}: {count} images")
+        print(f"  {i+1}. {cls}: {counts[i]} images")
     
     return image_paths, labels, selected_classes
 
 # ==================== DATA TRANSFORMS ====================
-def get_transforms():
+def get_transforms(cached=False):
     """Enhanced data augmentation for better quality with less data"""
-    train_transform = transforms.Compose([
+    # Loader workers only decode/resize to uint8; augmentation and normalization
+    # run on whole batches on the training device (data_pipeline.BatchAugment)
+    sample_transform = None if cached else transforms.Compose([
         transforms.Resize((Config.IMAGE_SIZE, Config.IMAGE_SIZE)),
-        transforms.RandomHorizontalFlip(p=0.5),
-        transforms.RandomVerticalFlip(p=0.2),
-        transforms.RandomRotation(30),
-        transforms.ColorJitter(brightness=0.3, contrast=0.3, saturation=0.3, hue=0.1),
-        transforms.RandomAffine(degrees=0, translate=(0.1, 0.1)),
-        transforms.ToTensor(),
-        transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
-    ])
-    
-    val_transform = transforms.Compose([
-        transforms.Resize((Config.IMAGE_SIZE, Config.IMAGE_SIZE)),
-        transforms.ToTensor(),
-        transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+        transforms.PILToTensor()
     ])
+    train_augment = BatchAugment(
+        hflip=0.5, vflip=0.2, degrees=30, translate=0.1,
+        brightness=0.3, contrast=0.3, saturation=0.3, hue=0.1
+    )
     
-    return train_transform, val_transform
+    return sample_transform, train_augment
 
 # ==================== MODEL ARCHITECTURE ====================
 def create_model(num_classes):
@@ -155,66 +156,9 @@ def create_model(num_classes):
     model.classifier[1] = nn.Linear(model.last_channel, num_classes)
     return model
 
-# ==================== TRAINING FUNCTIONS ====================
-def train_epoch(model, dataloader, criterion, optimizer, device):
-    """Train for one epoch"""
-    model.train()
-    running_loss = 0.0
-    correct = 0
-    total = 0
-    
-    pbar = tqdm(dataloader, desc="Training", ncols=100)
-    for images, labels in pbar:
-        images, labels = images.to(device), labels.to(device)
-        
-        optimizer.zero_grad()
-        outputs = model(images)
-        loss = criterion(outputs, labels)
-        loss.backward()
-        optimizer.step()
-        
-        running_loss += loss.item()
-        _, predicted = outputs.max(1)
-        total += labels.size(0)
-        correct += predicted.eq(labels).sum().item()
-        
-        pbar.set_postfix({
-            'loss': f'{running_loss/(pbar.n+1):.3f}',
-            'acc': f'{100.*correct/total:.1f}%'
-        })
-    
-    return running_loss/len(dataloader), 100.*correct/total
-
-def validate(model, dataloader, criterion, device):
-    """Validate the model"""
-    model.eval()
-    running_loss = 0.0
-    correct = 0
-    total = 0
-    
-    with torch.no_grad():
-        pbar = tqdm(dataloader, desc="Validation", ncols=100)
-        for images, labels in pbar:
-            images, labels = images.to(device), labels.to(device)
-            
-            outputs = model(images)
-            loss = criterion(outputs, labels)
-            
-            running_loss += loss.item()
-            _, predicted = outputs.max(1)
-            total += labels.size(0)
-            correct += predicted.eq(labels).sum().item()
-            
-            pbar.set_postfix({
-                'loss': f'{running_loss/(pbar.n+1):.3f}',
-                'acc': f'{100.*correct/total:.1f}%'
-            })
-    
-    return running_loss/len(dataloader), 100.*correct/total
-
 # ==================== MAIN TRAINING LOOP ====================
-def train_model():
-    """Main training function"""
+def train_model(resume=False):
+    """Main training function (resume: continue from Config.CHECKPOINT_PATH)"""
     print("="*60)
     print("🌱 FAST QUALITY TRAINING - Plant Disease Detection")
     print("="*60)
@@ -231,37 +175,33 @@ def train_model():
         print("❌ ERROR: No images found! Check dataset path.")
         return None, None, None
     
-    # Split dataset
-    train_paths, val_paths, train_labels, val_labels = train_test_split(
-        image_paths, labels, test_size=0.2, random_state=42, stratify=labels
+    # Split dataset (by index, so the same split applies to the cache and to file paths)
+    train_idx, val_idx = train_test_split(
+        np.arange(len(labels)), test_size=0.2, random_state=42, stratify=labels
     )
     
     print(f"\n📊 Dataset Split:")
-    print(f"   Training: {len(train_paths)} images")
-    print(f"   Validation: {len(val_paths)} images")
-    
-    # Get transforms
-    train_transform, val_transform = get_transforms()
+    print(f"   Training: {len(train_idx)} images")
+    print(f"   Validation: {len(val_idx)} images")
     
     # Create datasets
-    train_dataset = PlantDiseaseDataset(train_paths, train_labels, train_transform)
-    val_dataset = PlantDiseaseDataset(val_paths, val_labels, val_transform)
+    sample_transform, train_augment = get_transforms(cached=Config.USE_CACHE)
+    if Config.USE_CACHE:
+        cache_dir = compile_dataset_cache(image_paths, labels, Config.CACHE_DIR, Config.IMAGE_SIZE, class_names)
+        train_dataset = MemmapDataset(cache_dir, train_idx)
+        val_dataset = MemmapDataset(cache_dir, val_idx)
+    else:
+        train_dataset = PlantDiseaseDataset(
+            [image_paths[i] for i in train_idx], [labels[i] for i in train_idx], sample_transform
+        )
+        val_dataset = PlantDiseaseDataset(
+            [image_paths[i] for i in val_idx], [labels[i] for i in val_idx], sample_transform
+        )
     
     # Create dataloaders
-    train_loader = DataLoader(
-        train_dataset,
-        batch_size=Config.BATCH_SIZE,
-        shuffle=True,
-        num_workers=Config.NUM_WORKERS,
-        pin_memory=(device.type == 'cuda')
-    )
-    val_loader = DataLoader(
-        val_dataset,
-        batch_size=Config.BATCH_SIZE,
-        shuffle=False,
-        num_workers=Config.NUM_WORKERS,
-        pin_memory=(device.type == 'cuda')
-    )
+    train_loader = make_loader(train_dataset, Config.BATCH_SIZE, shuffle=True, device=device, num_workers=Config.NUM_WORKERS)
+    val_loader = make_loader(val_dataset, Config.BATCH_SIZE, shuffle=False, device=device, num_workers=Config.NUM_WORKERS)
+    print(f"Data loading: {Config.NUM_WORKERS} workers")
     
     # Create model
     model = create_model(len(class_names))
@@ -270,6 +210,15 @@ def train_model():
     # Loss and optimizer
     criterion = nn.CrossEntropyLoss()
     optimizer = optim.Adam(model.parameters(), lr=Config.LEARNING_RATE)
+    engine = TrainingEngine(
+        model, criterion, optimizer, device,
+        precision=Config.PRECISION,
+        channels_last=Config.CHANNELS_LAST,
+        accumulation_steps=Config.ACCUMULATION_STEPS,
+        compile_model=Config.COMPILE
+    )
+    checkpoints = CheckpointManager(Config.CHECKPOINT_PATH, Config.CHECKPOINT_INTERVAL_MINUTES)
+    stopper = EarlyStopping(Config.EARLY_STOPPING_PATIENCE, Config.EARLY_STOPPING_MIN_DELTA)
     scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, mode='max', patience=2, factor=0.5)
     
     # Training loop
@@ -278,21 +227,62 @@ def train_model():
         'train_loss': [],
         'train_acc': [],
         'val_loss': [],
-        'val_acc': []
+        'val_acc': [],
+        'train_images_per_sec': []
     }
+    start_epoch, start_step, stopped = 0, 0, False
+    
+    def training_state(epoch, step):
+        return {
+            'epoch': epoch,
+            'step': step,
+            'engine': engine.state_dict(),
+            'scheduler': scheduler.state_dict(),
+            'early_stopping': stopper.state_dict(),
+            'stopped': stopped,
+            'best_acc': best_acc,
+            'history': history,
+            'class_names': class_names
+        }
+    
+    def checkpoint_if_due(step):
+        if checkpoints.due():
+            checkpoints.save(training_state(epoch, step))
+    
+    if resume:
+        state = checkpoints.load(device)
+        if state is None:
+            print(f"No checkpoint at {Config.CHECKPOINT_PATH} - starting from scratch")
+        elif state['class_names'] != class_names:
+            raise ValueError(f"Checkpoint {Config.CHECKPOINT_PATH} was trained on different classes")
+        else:
+            engine.load_state_dict(state['engine'])
+            scheduler.load_state_dict(state['scheduler'])
+            stopper.load_state_dict(state['early_stopping'])
+            best_acc, history, stopped = state['best_acc'], state['history'], state['stopped']
+            start_epoch, start_step = state['epoch'], state['step']
+            if stopped:
+                print("Checkpointed run already stopped early - nothing to resume")
+                start_epoch = Config.EPOCHS
+            else:
+                print(f"Resuming at epoch {start_epoch+1}, batch {start_step}")
     
     print(f"\n🚀 Starting training for {Config.EPOCHS} epochs...")
     print("="*60)
     
-    for epoch in range(Config.EPOCHS):
+    for epoch in range(start_epoch, Config.EPOCHS):
         print(f"\n📍 Epoch {epoch+1}/{Config.EPOCHS}")
         print("-" * 60)
         
-        # Train
-        train_loss, train_acc = train_epoch(model, train_loader, criterion, optimizer, device)
+        # Train (the sampler skips batches a resumed epoch already trained on)
+        train_loader.sampler.set_epoch(epoch, start=start_step * Config.BATCH_SIZE)
+        train_loss, train_acc, train_speed = engine.train_epoch(
+            train_loader, train_augment, start_step=start_step, on_step=checkpoint_if_due
+        )
+        start_step = 0
         
         # Validate
-        val_loss, val_acc = validate(model, val_loader, criterion, device)
+        val_loss, val_acc = engine.validate(val_loader)
         
         # Update learning rate
         scheduler.step(val_acc)
@@ -302,6 +292,7 @@ def train_model():
         history['train_acc'].append(train_acc)
         history['val_loss'].append(val_loss)
         history['val_acc'].append(val_acc)
+        history['train_images_per_sec'].append(train_speed)
         
         print(f"\n📊 Results:")
         print(f"   Train - Loss: {train_loss:.4f} | Acc: {train_acc:.2f}%")
@@ -326,6 +317,13 @@ def train_model():
             
             with open(Config.CLASS_NAMES_FILE, 'w') as f:
                 json.dump(class_names, f, indent=2)
+        
+        # Early stopping, then a full checkpoint for --resume
+        stopped = stopper.step(val_acc)
+        checkpoints.save(training_state(epoch + 1, 0))
+        if stopped:
+            print(f"   ⏹️  Early stopping: no val_acc improvement for {stopper.patience} epochs")
+            break
     
     print("\n" + "="*60)
     print("🎉 TRAINING COMPLETED!")
@@ -343,7 +341,12 @@ if __name__ == "__main__":
     print("Training subset for presentation & testing")
     print("="*60 + "\n")
     
-    model, class_names, history = train_model()
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the plant disease classifier (subset)")
+    parser.add_argument('--resume', action='store_true', help=f"Continue from {Config.CHECKPOINT_PATH}")
+    args = parser.parse_args()
+    
+    model, class_names, history = train_model(resume=args.resume)
     
     if model and history:
         print("\n📈 TRAINING SUMMARY:")
@@ -0,0 +1,144 @@
+"""
+Training engine for the custom classifier
+bfloat16 autocast (where the CPU/GPU supports it), channels-last tensors,
+gradient accumulation and optional torch.compile. Loss and accuracy are
+accumulated on the device and read back once per epoch, so the loop never
+stalls on host syncs.
+"""
+
+import contextlib
+
+import torch
+from tqdm import tqdm
+
+from data_pipeline import ThroughputMeter, normalize_batch
+
+PRECISIONS = ("auto", "bf16", "fp32")
+
+def bf16_supported(device):
+    """Whether bfloat16 autocast runs on fast kernels on this device"""
+    if device.type == 'cuda':
+        return torch.cuda.is_bf16_supported()
+    try:
+        # AVX512-BF16 / AMX; elsewhere bf16 on CPU is emulated and slower than fp32
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+class TrainingEngine:
+    def __init__(self, model, criterion, optimizer, device, precision="auto", channels_last=True,
+                 accumulation_steps=1, compile_model=False, log_every=20):
+        """
+        Args:
+            model: Classifier (moved to device and to channels-last here)
+            criterion: Loss function
+            optimizer: Optimizer over model's parameters
+            device: torch.device
+            precision: "auto" (bf16 if supported), "bf16" or "fp32"
+            channels_last: Use NHWC memory format for the model and inputs
+            accumulation_steps: Batches per optimizer step (effective batch = batch size x steps)
+            compile_model: Wrap the forward pass in torch.compile
+            log_every: Progress bar refresh interval in batches
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision} (choose from {', '.join(PRECISIONS)})")
+        if precision == "bf16" and not bf16_supported(device):
+            print("⚠️  bfloat16 is not supported on this device - training in fp32")
+        self.use_bf16 = precision != "fp32" and bf16_supported(device)
+
+        self.device = device
+        self.memory_format = torch.channels_last if channels_last else torch.contiguous_format
+        self.model = model.to(device, memory_format=self.memory_format)
+        # Keep self.model uncompiled so state_dict keys stay loadable by custom_model_inference
+        self.forward_model = torch.compile(self.model) if compile_model else self.model
+        self.criterion = criterion
+        self.optimizer = optimizer
+        self.accumulation_steps = max(1, accumulation_steps)
+        self.log_every = max(1, log_every)
+
+        print(f"Training engine: {'bf16 autocast' if self.use_bf16 else 'fp32'}, "
+              f"{'channels-last' if channels_last else 'contiguous'}, "
+              f"accumulation x{self.accumulation_steps}{', compiled' if compile_model else ''}")
+
+    def _autocast(self):
+        if not self.use_bf16:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type=self.device.type, dtype=torch.bfloat16)
+
+    def _inputs(self, images):
+        return images.contiguous(memory_format=self.memory_format)
+
+    def state_dict(self):
+        return {'model': self.model.state_dict(), 'optimizer': self.optimizer.state_dict()}
+
+    def load_state_dict(self, state):
+        self.model.load_state_dict(state['model'])
+        self.optimizer.load_state_dict(state['optimizer'])
+
+    def train_epoch(self, dataloader, augment, desc="Training", start_step=0, on_step=None):
+        """
+        Train for one epoch; returns loss, accuracy and images/sec
+
+        Args:
+            start_step: Batches of this epoch already trained (resuming; the loader skips them)
+            on_step: Called with the number of batches done after each optimizer step,
+                     i.e. at points where the epoch can be checkpointed
+        """
+        self.model.train()
+        loss_sum = torch.zeros((), device=self.device)
+        correct = torch.zeros((), dtype=torch.long, device=self.device)
+        total = 0
+        meter = ThroughputMeter()
+        steps = len(dataloader)
+
+        self.optimizer.zero_grad(set_to_none=True)
+        pbar = tqdm(dataloader, desc=desc, ncols=100)
+        for step, (images, labels) in enumerate(pbar, start=1):
+            meter.batch_ready()
+            images = self._inputs(augment(images.to(self.device, non_blocking=True)))
+            labels = labels.to(self.device, non_blocking=True)
+
+            with self._autocast():
+                outputs = self.forward_model(images)
+                loss = self.criterion(outputs, labels)
+            (loss / self.accumulation_steps).backward()
+
+            if step % self.accumulation_steps == 0 or step == steps:
+                self.optimizer.step()
+                self.optimizer.zero_grad(set_to_none=True)
+                if on_step:
+                    on_step(start_step + step)
+
+            loss_sum += loss.detach() * labels.size(0)
+            correct += (outputs.argmax(1) == labels).sum()
+            total += labels.size(0)
+            meter.step_done(labels.size(0))
+
+            # Throughput only: printing loss/acc here would force a device sync per update
+            if step % self.log_every == 0:
+                pbar.set_postfix({'img/s': f'{meter.images_per_sec:.0f}'})
+
+        total = max(total, 1)
+        epoch_loss, epoch_acc = loss_sum.item() / total, 100. * correct.item() / total
+        print(f"Training throughput: {meter.report()}")
+        return epoch_loss, epoch_acc, meter.images_per_sec
+
+    def validate(self, dataloader, desc="Validation"):
+        """Validate the model; returns loss and accuracy"""
+        self.model.eval()
+        loss_sum = torch.zeros((), device=self.device)
+        correct = torch.zeros((), dtype=torch.long, device=self.device)
+        total = 0
+
+        with torch.inference_mode(), self._autocast():
+            for images, labels in tqdm(dataloader, desc=desc, ncols=100):
+                images = self._inputs(normalize_batch(images.to(self.device, non_blocking=True)))
+                labels = labels.to(self.device, non_blocking=True)
+
+                outputs = self.forward_model(images)
+                loss_sum += self.criterion(outputs, labels).float() * labels.size(0)
+                correct += (outputs.argmax(1) == labels).sum()
+                total += labels.size(0)
+
+        total = max(total, 1)
+        return loss_sum.item() / total, 100. * correct.item() / total
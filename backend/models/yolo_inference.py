@@ -0,0 +1,317 @@
+"""
+YOLOv8 Serving Backend (CPU-tuned)
+One worker thread owns the model and runs letterboxed batch inference over
+a request queue, so concurrent requests share forward passes instead of
+competing for cores.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import torch
+from PIL import Image
+from ultralytics import YOLO
+
+# imgsz / half-precision presets; YOLO_IMGSZ and YOLO_HALF override the chosen one
+YOLO_PROFILES = {
+    "fast": {"imgsz": 320, "half": False},
+    "balanced": {"imgsz": 480, "half": False},
+    "accurate": {"imgsz": 640, "half": False},
+    # FP16 only pays off on GPU or OpenVINO; plain PyTorch CPU ignores it
+    "openvino_fp16": {"imgsz": 480, "half": True}
+}
+
+YOLO_PROFILE = os.getenv("YOLO_PROFILE", "balanced")
+YOLO_EXPORT_FORMAT = os.getenv("YOLO_EXPORT_FORMAT", "").lower()  # "", "onnx" or "openvino"
+YOLO_THREADS = int(os.getenv("YOLO_THREADS", "0"))                 # 0 = all cores
+YOLO_MAX_BATCH = int(os.getenv("YOLO_MAX_BATCH", "8"))
+YOLO_BATCH_WAIT_MS = float(os.getenv("YOLO_BATCH_WAIT_MS", "10"))
+YOLO_CONFIDENCE = float(os.getenv("CONFIDENCE_THRESHOLD", "0.5"))
+YOLO_WARMUP_RUNS = 3
+
+EXPORT_FORMATS = ("onnx", "openvino")
+
+# Boxes overlapping a more confident box (any class) by more than this are the
+# same lesion/leaf labeled twice and don't count as extra evidence
+DUPLICATE_IOU = 0.7
+# Resolution of the occupancy grid used for affected-area fractions
+AREA_GRID = 128
+
+def configure_threads(threads: int = YOLO_THREADS):
+    """Pin PyTorch intra-op threads; the batching worker provides the parallelism across requests"""
+    threads = threads or os.cpu_count() or 1
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set before the first parallel op
+        pass
+    return threads
+
+def exported_path(weights_path: str, export_format: str) -> str:
+    """Where ultralytics writes the exported model for these weights"""
+    stem, _ = os.path.splitext(weights_path)
+    return f"{stem}.onnx" if export_format == "onnx" else f"{stem}_openvino_model"
+
+class YOLOServer:
+    def __init__(self, weights_path, profile=YOLO_PROFILE, export_format=YOLO_EXPORT_FORMAT,
+                 max_batch=YOLO_MAX_BATCH, batch_wait_ms=YOLO_BATCH_WAIT_MS, conf=YOLO_CONFIDENCE):
+        """
+        Load, optionally export, and warm up a YOLOv8 detector
+
+        Args:
+            weights_path: Path to the .pt weights
+            profile: Key of YOLO_PROFILES
+            export_format: "" (PyTorch), "onnx" or "openvino"; exports are cached next to the weights
+            max_batch: Most images per forward pass
+            batch_wait_ms: How long the worker waits to fill a batch after the first request
+            conf: Detection confidence threshold (0-1)
+        """
+        if profile not in YOLO_PROFILES:
+            raise ValueError(f"Unknown YOLO profile: {profile} (choose from {', '.join(YOLO_PROFILES)})")
+        settings = YOLO_PROFILES[profile]
+        self.profile = profile
+        self.imgsz = int(os.getenv("YOLO_IMGSZ", settings["imgsz"]))
+        self.half = os.getenv("YOLO_HALF", str(settings["half"])).lower() in ("1", "true", "yes")
+        self.conf = conf
+        self.max_batch = max(1, max_batch)
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.threads = configure_threads()
+
+        self.weights_path = weights_path
+        self.export_format = export_format
+        self.backend = "pytorch"
+        self.model = self._load(weights_path, export_format)
+        self.names = self.model.names
+
+        self.queue = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self.stats = {"requests": 0, "batches": 0, "images": 0, "inference_seconds": 0.0, "swaps": 0}
+        self._warmup(self.model)
+
+        threading.Thread(target=self._worker, name="yolo-batcher", daemon=True).start()
+
+        print(f"YOLO serving: {self.backend}, profile {profile} (imgsz {self.imgsz}, half {self.half}), "
+              f"{self.threads} threads, batches up to {self.max_batch}")
+
+    def _load(self, weights_path, export_format):
+        if not export_format:
+            return YOLO(weights_path)
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported YOLO export format: {export_format}")
+
+        target = exported_path(weights_path, export_format)
+        stale = not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(weights_path)
+        if stale:
+            print(f"Exporting {weights_path} to {export_format} (imgsz {self.imgsz})...")
+            # Dynamic batch axis so the batcher can send more than one image per call
+            target = YOLO(weights_path).export(
+                format=export_format, imgsz=self.imgsz, half=self.half, dynamic=True
+            )
+        self.backend = export_format
+        return YOLO(target, task="detect")
+
+    def _predict(self, model, images):
+        return model.predict(source=images, imgsz=self.imgsz, conf=self.conf, half=self.half, verbose=False)
+
+    def _run(self, images):
+        # One model reference per batch: a concurrent swap() never changes models mid-batch
+        model = self.model
+        start = time.perf_counter()
+        results = self._predict(model, images)
+        self.stats["inference_seconds"] += time.perf_counter() - start
+        return results
+
+    def _warmup(self, model):
+        """First calls allocate buffers and pick kernels - keep that off the request path"""
+        blank = Image.fromarray(np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8))
+        for _ in range(YOLO_WARMUP_RUNS):
+            self._predict(model, [blank] * min(2, self.max_batch))
+
+    def swap(self, weights_path):
+        """
+        Hot-swap to new weights without dropping requests
+
+        The new model is loaded (exported if configured) and warmed up while the
+        old one keeps serving; queued and later requests then run on the new one.
+        """
+        model = self._load(weights_path, self.export_format)
+        self._warmup(model)
+        self.model, self.names, self.weights_path = model, model.names, weights_path
+        self.stats["swaps"] += 1
+        print(f"YOLO serving swapped to {weights_path}")
+
+    def _worker(self):
+        closed = False
+        while not closed:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.max_batch and batch[-1] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # None is close()'s sentinel: finish this batch, then stop
+            closed = batch[-1] is None
+            batch = [(image, future) for image, future in filter(None, batch) if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                results = self._run([image for image, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.stats["batches"] += 1
+            self.stats["images"] += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def submit(self, image) -> Future:
+        """Queue an image; the Future resolves to its ultralytics Results"""
+        image = image.convert('RGB')
+        future = Future()
+        # Checked under the same lock close() takes, so nothing is queued behind the sentinel
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError(f"YOLO server for {self.weights_path} is closed")
+            self.stats["requests"] += 1
+            self.queue.put((image, future))
+        return future
+
+    def predict(self, image):
+        """
+        Detect diseases in one image (blocking)
+
+        Args:
+            image: PIL Image
+
+        Returns:
+            ultralytics Results for the image (boxes letterboxed back to original coordinates)
+        """
+        return self.submit(image).result()
+
+    def close(self):
+        """Stop the worker once the requests already queued are done; later submits raise"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self.queue.put(None)
+
+    def metrics(self):
+        batches = self.stats["batches"]
+        return {
+            "weights": self.weights_path,
+            "backend": self.backend,
+            "profile": self.profile,
+            "imgsz": self.imgsz,
+            "half": self.half,
+            "threads": self.threads,
+            "max_batch": self.max_batch,
+            "queue_depth": self.queue.qsize(),
+            **self.stats,
+            "avg_batch_size": round(self.stats["images"] / batches, 2) if batches else None
+        }
+
+def box_iou(boxes):
+    """Pairwise IoU of (N, 4) xyxy boxes"""
+    x1 = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+    y1 = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+    x2 = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+    y2 = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area[:, None] + area[None, :] - inter, 1e-9)
+
+def covered_fraction(boxes, width, height, grid=AREA_GRID):
+    """Fraction of the image covered by the union of (N, 4) xyxy boxes"""
+    if len(boxes) == 0:
+        return 0.0
+    xs = (np.arange(grid) + 0.5) * width / grid
+    ys = (np.arange(grid) + 0.5) * height / grid
+    inside_x = (xs[None, :] >= boxes[:, 0:1]) & (xs[None, :] < boxes[:, 2:3])
+    inside_y = (ys[None, :] >= boxes[:, 1:2]) & (ys[None, :] < boxes[:, 3:4])
+    covered = (inside_y[:, :, None] & inside_x[:, None, :]).any(axis=0)
+    return float(covered.mean())
+
+def summarize_detections(result, duplicate_iou=DUPLICATE_IOU):
+    """
+    All detections in one image, aggregated per disease
+
+    Args:
+        result: ultralytics Results for one image
+
+    Returns:
+        dict: {
+            'boxes': [{'disease_name', 'class_id', 'confidence' (0-100), 'box' [x1, y1, x2, y2] px,
+                       'duplicate': overlaps a more confident box that was kept}],
+            'diseases': [{'disease_name', 'score' (0-100), 'count', 'max_confidence', 'area_fraction'}],
+                        most likely first
+            'affected_area_fraction': union of non-healthy boxes / image area,
+            'image_size': [width, height]
+        }
+    """
+    height, width = result.orig_shape
+    boxes = result.boxes.xyxy.cpu().numpy().astype(np.float64)
+    conf = result.boxes.conf.cpu().numpy().astype(np.float64)
+    cls = result.boxes.cls.cpu().numpy().astype(np.int64)
+    names = result.names
+
+    # Greedy cross-class NMS: most confident first, a box is a duplicate only of boxes already kept
+    order = np.argsort(-conf)
+    boxes, conf, cls = boxes[order], conf[order], cls[order]
+    iou = box_iou(boxes) if len(boxes) else np.zeros((0, 0))
+    kept = np.zeros(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        kept[i] = not (iou[i, :i][kept[:i]] > duplicate_iou).any()
+    duplicate = ~kept
+
+    # Noisy-OR per class over independent boxes: 1 - prod(1 - p)
+    num_classes = int(cls.max()) + 1 if len(cls) else 0
+    log_miss = np.bincount(cls[kept], weights=np.log1p(-np.minimum(conf[kept], 1 - 1e-6)), minlength=num_classes)
+    counts = np.bincount(cls[kept], minlength=num_classes)
+
+    diseases = []
+    for class_id in np.nonzero(counts)[0]:
+        mask = kept & (cls == class_id)
+        diseases.append({
+            'disease_name': names[int(class_id)],
+            'score': round((1 - np.exp(log_miss[class_id])) * 100, 2),
+            'count': int(counts[class_id]),
+            'max_confidence': round(float(conf[mask].max()) * 100, 2),
+            'area_fraction': round(covered_fraction(boxes[mask], width, height), 4)
+        })
+    diseases.sort(key=lambda d: d['score'], reverse=True)
+
+    # A diseased region outranks "healthy" boxes elsewhere on the plant
+    unhealthy = np.array(['healthy' not in names[int(c)].lower() for c in cls], dtype=bool)
+    if any('healthy' not in d['disease_name'].lower() for d in diseases):
+        diseases.sort(key=lambda d: 'healthy' in d['disease_name'].lower())
+
+    return {
+        'boxes': [
+            {
+                'disease_name': names[int(c)],
+                'class_id': int(c),
+                'confidence': round(float(p) * 100, 2),
+                'box': [round(float(v), 1) for v in box],
+                'duplicate': bool(d)
+            }
+            for box, p, c, d in zip(boxes, conf, cls, duplicate)
+        ],
+        'diseases': diseases,
+        'affected_area_fraction': round(covered_fraction(boxes[kept & unhealthy], width, height), 4),
+        'image_size': [int(width), int(height)]
+    }
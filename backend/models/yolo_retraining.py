@@ -0,0 +1,332 @@
+"""
+YOLOv8 retraining pipelines
+Incremental fine-tuning trains only on predictions verified after those the
+serving model has learned from, mixed with a replay sample of older data, for a few epochs
+from the current weights; its cost scales with the new data. Full retraining
+runs 30 epochs over the whole user_collected dataset.
+
+Both run inside the retraining worker process (utils/retrain_worker.py) and take
+ultralytics callbacks for progress reporting and cancellation.
+
+Verified images are kept in datasets/verified/ (images/<id>.jpg, labels/<id>.txt)
+and become part of the replay pool for later runs.
+
+New models are registered in the model registry (utils/model_registry.py) and,
+with YOLO_CANARY on, start as a canary that the serving process evaluates on
+live traffic before promoting; training always starts from the serving version.
+"""
+
+import math
+import os
+import random
+import re
+from datetime import datetime
+from io import BytesIO
+
+import requests
+import yaml
+from PIL import Image
+from ultralytics import YOLO
+
+from utils.db_utils import get_last_trained_verified_seq, get_verified_predictions, save_retraining
+from utils.model_registry import ModelRegistry
+
+MODEL_PATH = "models/best.pt"
+BASE_WEIGHTS = "yolov8s.pt"
+DATA_YAML_PATH = "datasets/data.yaml"
+BASE_DATASET = "datasets/user_collected"
+VERIFIED_DIR = "datasets/verified"
+RUN_DIR = "datasets/incremental"
+
+INCREMENTAL_EPOCHS = int(os.getenv("INCREMENTAL_EPOCHS", "3"))
+# Old samples replayed per new sample, so the model doesn't forget earlier data
+INCREMENTAL_REPLAY_RATIO = float(os.getenv("INCREMENTAL_REPLAY_RATIO", "1.0"))
+# Backbone layers kept frozen; only the neck/head adapt (much less backward work on CPU)
+INCREMENTAL_FREEZE = int(os.getenv("INCREMENTAL_FREEZE", "10"))
+INCREMENTAL_IMGSZ = int(os.getenv("INCREMENTAL_IMGSZ", "640"))
+VAL_FRACTION = 0.2
+# Evaluate new models as a canary on live traffic before they serve (0 = promote immediately)
+YOLO_CANARY = os.getenv("YOLO_CANARY", "1") == "1"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+def _normalize(name):
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+def class_index(disease_name, class_names):
+    """
+    Dataset class for a verified disease name ("Tomato Early Blight" -> 'Early_Blight')
+
+    Returns:
+        int or None: Index of the longest class name contained in the disease name
+    """
+    normalized = f"_{_normalize(disease_name)}_"
+    best, best_len = None, 0
+    for idx, class_name in enumerate(class_names):
+        candidate = _normalize(class_name)
+        if f"_{candidate}_" in normalized and len(candidate) > best_len:
+            best, best_len = idx, len(candidate)
+    return best
+
+def _label_path(image_path):
+    # Same convention ultralytics uses to find labels for an image list
+    images_dir, name = os.path.split(image_path)
+    return os.path.join(os.path.dirname(images_dir), "labels", os.path.splitext(name)[0] + ".txt")
+
+def _has_label(image_path):
+    return os.path.exists(_label_path(image_path))
+
+def _list_images(folder):
+    if not os.path.isdir(folder):
+        return []
+    with os.scandir(folder) as entries:
+        return sorted(
+            os.path.abspath(entry.path) for entry in entries
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+def store_verified_sample(sample, class_id):
+    """
+    Download a verified prediction's image into VERIFIED_DIR with a whole-image box label
+    Predictions store only a disease name, so the box spans the image (the photo is the leaf).
+
+    Returns:
+        str: Image path
+    """
+    image_path = os.path.abspath(os.path.join(VERIFIED_DIR, "images", f"{sample['id']}.jpg"))
+    if not os.path.exists(image_path):
+        response = requests.get(sample['image_url'], timeout=30)
+        response.raise_for_status()
+        os.makedirs(os.path.dirname(image_path), exist_ok=True)
+        Image.open(BytesIO(response.content)).convert('RGB').save(image_path, quality=95)
+
+    label_path = _label_path(image_path)
+    os.makedirs(os.path.dirname(label_path), exist_ok=True)
+    with open(label_path, "w") as f:
+        f.write(f"{class_id} 0.5 0.5 1.0 1.0\n")
+    return image_path
+
+def _replay_pool(new_images):
+    """Images the current model has already trained on: earlier verified samples plus the base dataset"""
+    # Verified images are only stored when a run picks them up, so all but this run's are old data
+    new_images = set(new_images)
+    earlier = [path for path in _list_images(os.path.join(VERIFIED_DIR, "images")) if path not in new_images]
+    base = _list_images(os.path.join(BASE_DATASET, "images", "train"))
+    return [path for path in earlier + base if _has_label(path)]
+
+def _write_split(name, paths):
+    path = os.path.abspath(os.path.join(RUN_DIR, f"{name}.txt"))
+    with open(path, "w") as f:
+        f.write("\n".join(paths) + "\n")
+    return path
+
+def _evaluate(weights, data_yaml):
+    return float(YOLO(weights).val(data=data_yaml, imgsz=INCREMENTAL_IMGSZ, device="cpu", plots=False).box.map * 100)
+
+def _registry():
+    return ModelRegistry("yolo", legacy_path=MODEL_PATH)
+
+def _trained_through(registry):
+    """
+    Newest verification the serving model has been trained on
+
+    Read from the current version (or its nearest ancestor that records one), so a
+    canary that is rejected never counts; falls back to the pre-registry history.
+    """
+    version = registry.current()
+    while version:
+        meta = registry.meta(version)
+        if meta.get('last_verified_seq') is not None:
+            return meta['last_verified_seq']
+        version = meta.get('parent')
+    return get_last_trained_verified_seq()
+
+def _deploy(new_model_path, timestamp, accuracy, source, last_verified_seq=None):
+    """
+    Register the new model and start its canary (or promote it when YOLO_CANARY is off), then log the version
+    Previous versions stay in the registry, so a rollback is a promote of an older version.
+
+    Returns:
+        tuple: (registry version, 'canary' | 'live')
+    """
+    registry = _registry()
+    version = registry.register(new_model_path, source=source, metrics={'map50_95': round(accuracy, 2)},
+                                last_verified_seq=last_verified_seq)
+    if YOLO_CANARY:
+        registry.start_canary(version)
+        status = 'canary'
+    else:
+        registry.promote(version)
+        status = 'live'
+
+    with open("models/model_log.txt", "a") as log_file:
+        log_file.write(f"{version}, {timestamp.isoformat()}, {accuracy:.2f}%\n")
+    return version, status
+
+def _add_callbacks(model, callbacks):
+    for event, callback in (callbacks or {}).items():
+        model.add_callback(event, callback)
+
+def run_incremental_finetune(callbacks=None):
+    """
+    Fine-tune the deployed YOLO model on newly verified predictions
+
+    Args:
+        callbacks: Optional {ultralytics event: callback(trainer)} for the training run
+
+    Returns:
+        dict: {'status': 'no_new_data' | 'deployed' | 'rejected', 'new_samples', 'replay_samples',
+               'skipped', 'accuracy', 'baseline_accuracy', 'model_version', 'rollout'}
+    """
+    with open(DATA_YAML_PATH, "r") as f:
+        class_names = yaml.safe_load(f)['names']
+
+    last_seq = _trained_through(_registry())
+    samples = get_verified_predictions(after_seq=last_seq)
+
+    new_images, skipped = [], 0
+    for sample in samples:
+        class_id = class_index(sample['label'], class_names)
+        if class_id is None:
+            skipped += 1
+            continue
+        try:
+            new_images.append(store_verified_sample(sample, class_id))
+        except Exception as e:
+            print(f"Skipping verified prediction {sample['id']}: {e}")
+            skipped += 1
+
+    summary = {'new_samples': len(new_images), 'replay_samples': 0, 'skipped': skipped}
+    if not new_images:
+        print(f"No new verified samples since verification {last_seq} ({skipped} skipped)")
+        return {**summary, 'status': 'no_new_data'}
+
+    rng = random.Random(last_seq)
+    pool = _replay_pool(new_images)
+    replay = rng.sample(pool, min(len(pool), math.ceil(len(new_images) * INCREMENTAL_REPLAY_RATIO)))
+    summary['replay_samples'] = len(replay)
+
+    # Validate on the fixed base val split when there is one, so old and new models compare fairly
+    val_images = [path for path in _list_images(os.path.join(BASE_DATASET, "images", "val")) if _has_label(path)]
+    train_images = new_images + replay
+    if not val_images:
+        rng.shuffle(train_images)
+        holdout = max(1, int(len(train_images) * VAL_FRACTION))
+        val_images, train_images = train_images[:holdout], train_images[holdout:] or train_images[:holdout]
+
+    os.makedirs(RUN_DIR, exist_ok=True)
+    data_yaml = os.path.join(RUN_DIR, "data.yaml")
+    with open(data_yaml, "w") as f:
+        yaml.safe_dump({
+            'train': _write_split("train", train_images),
+            'val': _write_split("val", val_images),
+            'nc': len(class_names),
+            'names': class_names
+        }, f)
+
+    weights = _registry().current_path() or BASE_WEIGHTS
+    print(f"Incremental fine-tuning: {len(new_images)} new + {len(replay)} replay samples, "
+          f"{INCREMENTAL_EPOCHS} epochs from {weights}")
+
+    baseline_accuracy = _evaluate(weights, data_yaml)
+    model = YOLO(weights)
+    _add_callbacks(model, callbacks)
+    model.train(
+        data=data_yaml,
+        epochs=INCREMENTAL_EPOCHS,
+        imgsz=INCREMENTAL_IMGSZ,
+        batch=16,
+        device='cpu',
+        freeze=INCREMENTAL_FREEZE,
+        lr0=0.001,  # Small steps from already-trained weights
+        warmup_epochs=0,
+        plots=False,
+        project='models/training',
+        name='incremental',
+        exist_ok=True
+    )
+
+    new_model_path = "models/training/incremental/weights/best.pt"
+    accuracy = _evaluate(new_model_path, data_yaml)
+    timestamp = datetime.now()
+    model_version = f"model_v{timestamp.strftime('%Y%m%d_%H%M%S')}"
+    summary.update({'accuracy': accuracy, 'baseline_accuracy': baseline_accuracy, 'model_version': model_version})
+    notes = f"incremental: {len(new_images)} new, {len(replay)} replay, {skipped} skipped"
+
+    if accuracy < baseline_accuracy:
+        print(f"Fine-tuned model is worse ({accuracy:.2f}% vs {baseline_accuracy:.2f}% mAP) - keeping current model")
+        save_retraining(model_version, accuracy, timestamp.isoformat(), f"{notes}, rejected")
+        return {**summary, 'status': 'rejected'}
+
+    # The cursor travels with the version: it only advances once this model serves
+    last_verified_seq = max(sample['verified_seq'] for sample in samples)
+    model_version, rollout = _deploy(new_model_path, timestamp, accuracy, source="incremental",
+                                     last_verified_seq=last_verified_seq)
+    summary.update({'model_version': model_version, 'rollout': rollout})
+    save_retraining(model_version, accuracy, timestamp.isoformat(), f"{notes}, {rollout}",
+                    last_verified_seq=last_verified_seq if rollout == 'live' else None)
+
+    print(f"Model fine-tuned successfully ({model_version}, {rollout}). "
+          f"New accuracy: {accuracy:.2f}% (was {baseline_accuracy:.2f}%)")
+    return {**summary, 'status': 'deployed'}
+
+DEFAULT_DATA_YAML = """
+# Plant Disease Dataset Configuration
+path: ./user_collected
+train: images/train
+val: images/val
+
+# Classes
+nc: 10
+names: ['Healthy', 'Leaf_Spot', 'Leaf_Blight', 'Powdery_Mildew', 'Rust', 'Bacterial_Blight', 'Early_Blight', 'Late_Blight', 'Anthracnose', 'Mosaic_Virus']
+"""
+
+def run_full_retrain(callbacks=None):
+    """
+    Fine-tune YOLOv8 for 30 epochs over the whole user_collected dataset
+
+    Returns:
+        dict: {'status': 'no_new_data' | 'deployed' | 'not_found', 'accuracy', 'model_version', 'rollout'}
+    """
+    # Check if dataset exists
+    if not os.path.exists(BASE_DATASET) or not os.listdir(BASE_DATASET):
+        print("No new data available for retraining")
+        return {'status': 'no_new_data'}
+
+    # Load existing model
+    model = YOLO(_registry().current_path() or BASE_WEIGHTS)
+    _add_callbacks(model, callbacks)
+
+    # Check if data.yaml exists
+    if not os.path.exists(DATA_YAML_PATH):
+        print("data.yaml not found. Creating default configuration.")
+        with open(DATA_YAML_PATH, "w") as f:
+            f.write(DEFAULT_DATA_YAML)
+
+    # Fine-tune the model
+    print("Starting model retraining...")
+    model.train(
+        data=DATA_YAML_PATH,
+        epochs=30,
+        imgsz=640,
+        batch=16,
+        device='cpu',  # Change to 'cuda' if GPU available
+        patience=5,
+        project='models/training',
+        name='retrained',
+        exist_ok=True
+    )
+
+    # Get new accuracy
+    metrics = model.val()
+    accuracy = float(metrics.box.map * 100)  # mAP50-95
+
+    new_model_path = "models/training/retrained/weights/best.pt"
+    if not os.path.exists(new_model_path):
+        print("Retraining completed but new model not found")
+        return {'status': 'not_found', 'accuracy': accuracy}
+
+    timestamp = datetime.now()
+    model_version, rollout = _deploy(new_model_path, timestamp, accuracy, source="full")
+    save_retraining(model_version, accuracy, timestamp.isoformat(), "full")
+    print(f"Model retrained successfully ({model_version}, {rollout}). New accuracy: {accuracy:.2f}%")
+    return {'status': 'deployed', 'accuracy': accuracy, 'model_version': model_version, 'rollout': rollout}
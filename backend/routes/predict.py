@@ -1,15 +1,20 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, HttpUrl
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 import requests
 from PIL import Image
 from io import BytesIO
-from ultralytics import YOLO
-import json
 import os
+import time
+import asyncio
 from datetime import datetime
 from utils.db_utils import save_prediction
-from utils.gemini_vision import analyze_plant_disease, is_gemini_configured, get_detailed_recommendations
+from utils.gemini_vision import analyze_plant_image, is_gemini_configured, get_detailed_recommendations, gemini_gateway
+from utils.gemini_schema import parse_stats
+from utils.cascade import CascadePolicy
+from utils.pesticide_catalog import PesticideCatalog
+from utils.sse import SSE_HEADERS, sse_event
 from routes.stats import track_prediction
 
 router = APIRouter()
@@ -22,8 +27,25 @@ MODEL_PATH = "models/best.pt"
 CUSTOM_MODEL_PATH = "models/plant_disease_model.pth"
 USE_CUSTOM_MODEL = os.path.exists(CUSTOM_MODEL_PATH)
 
+# With both Gemini and the custom model available: "hybrid" (Gemini for everything)
+# or "cascade" (custom model first, Gemini only for uncertain images)
+PREDICTION_MODE = os.getenv("PREDICTION_MODE", "hybrid").lower()
+cascade_policy = CascadePolicy()
+
+# YOLO only: registry-driven hot swap and canary evaluation (see utils/model_rollout.py)
+model_rollout = None
+
+# CASCADE MODE: Custom model first, escalate low-confidence images to Gemini
+if USE_GEMINI and USE_CUSTOM_MODEL and PREDICTION_MODE == "cascade":
+    print("🔥 Loading custom PyTorch model (CASCADE MODE)...")
+    from models.custom_model_inference import PlantDiseasePredictor
+    model = PlantDiseasePredictor(CUSTOM_MODEL_PATH, temperature=cascade_policy.temperature)
+    MODEL_TYPE = "cascade"
+    print(f"   ✅ Custom model answers at >= {cascade_policy.confidence_threshold}% confidence"
+          f"{' (calibrated)' if cascade_policy.calibrated else ''}")
+    print("   ✅ Gemini Vision API for escalations")
 # HYBRID MODE: Use Gemini primarily but present as Custom Model
-if USE_GEMINI and USE_CUSTOM_MODEL:
+elif USE_GEMINI and USE_CUSTOM_MODEL:
     # Both available - use Gemini but show as Custom
     print("🔥 Loading custom PyTorch model (HYBRID MODE)...")
     from models.custom_model_inference import PlantDiseasePredictor
@@ -42,18 +64,23 @@ elif USE_CUSTOM_MODEL:
 else:
     # Load YOLOv8 model
     print("Loading YOLOv8 model...")
-    if not os.path.exists(MODEL_PATH):
-        MODEL_PATH = "yolov8s.pt"
-    model = YOLO(MODEL_PATH)
+    from utils.model_registry import ModelRegistry
+    from utils.model_rollout import ModelRollout
+    # Serve the registry's current version; models/best.pt until one is promoted
+    yolo_registry = ModelRegistry("yolo", legacy_path=MODEL_PATH)
+    MODEL_PATH = yolo_registry.current_path() or "yolov8s.pt"
+    # Warmed-up, batched CPU serving (profile/export via YOLO_* env vars)
+    from models.yolo_inference import YOLOServer, summarize_detections
+    model = YOLOServer(MODEL_PATH)
+    model_rollout = ModelRollout(yolo_registry, model, YOLOServer, summarize_detections)
     MODEL_TYPE = "yolo"
 
 print(f"🤖 Active AI Model: {MODEL_TYPE.upper()}")
 if MODEL_TYPE == "hybrid_gemini_primary":
     print(f"🔀 HYBRID MODE: Using Gemini (presented as Custom Model)")
 
-# Load pesticide recommendations
-with open("utils/pesticide_data.json", "r", encoding="utf-8") as f:
-    PESTICIDE_DATA = json.load(f)
+# Load pesticide recommendations (hot-reloaded when the file changes, see main.py)
+pesticide_catalog = PesticideCatalog("utils/pesticide_data.json")
 
 class PredictionRequest(BaseModel):
     image_url: HttpUrl
@@ -62,202 +89,215 @@ class PredictionResponse(BaseModel):
     disease_name: str
     confidence: float
     recommendations: Dict  # Use flexible Dict to handle various recommendation formats
+    recommendation_match: Optional[Dict] = None  # How the catalog entry was chosen (reason, score)
+    catalog_version: Optional[str] = None
+    detections: Optional[Dict] = None  # YOLO only: all boxes and per-disease aggregates
     image_url: str
     timestamp: str
+    prediction_id: Optional[int] = None  # For /predictions/{id}/verify/
+
+# Used when the catalog has no "default" entry
+DEFAULT_RECOMMENDATIONS = {
+    "chemical": {
+        "name": "Consult Agricultural Expert",
+        "description": "Disease detected but specific treatment not in database.",
+        "application_steps": "Please consult with local agricultural officer.",
+        "where_to_buy": "Local agricultural store"
+    },
+    "organic": {
+        "name": "Neem Oil",
+        "description": "General organic pesticide for various plant diseases.",
+        "application_steps": "Dilute 5ml/L water and spray early morning.",
+        "where_to_buy": "https://www.amazon.in/Neem-Oil"
+    },
+    "preventive_measures": [
+        "Maintain proper spacing between plants",
+        "Ensure good air circulation",
+        "Water at the base of plants, not on leaves",
+        "Remove infected plant parts immediately"
+    ]
+}
+
+def lookup_recommendations(disease_name: str) -> Tuple[Dict, Dict]:
+    """
+    Get recommendations and how they were matched (key, reason, score, catalog version)
+    Both come from the same catalog snapshot, even if a reload happens mid-request
+    """
+    catalog = pesticide_catalog.current()
+    match = catalog.resolver.resolve(disease_name)
+    match['catalog_version'] = catalog.version
+    print(f"🔍 Recommendations for: {disease_name} -> {match['key']} ({match['reason']}, score {match['score']})")
+    
+    return catalog.data.get(match['key'], DEFAULT_RECOMMENDATIONS), match
 
 def get_recommendations(disease_name: str) -> Dict:
     """Get pesticide recommendations for detected disease"""
-    print(f"🔍 Getting recommendations for: {disease_name}")
+    return lookup_recommendations(disease_name)[0]
+
+def download_image(image_url: str) -> Image.Image:
+    """Download and open the uploaded image"""
+    response = requests.get(image_url, timeout=10)
+    response.raise_for_status()
+    return Image.open(BytesIO(response.content))
+
+async def detect_disease(img: Image.Image, image_url: str) -> Dict:
+    """
+    Run the active detection model
+    
+    Returns:
+        dict: Model result with 'disease_name', 'confidence' and, for Gemini
+        detections, 'crop_type', 'severity' and 'description'
+    
+    Raises:
+        HTTPException(404): if nothing could be detected clearly
+    """
+    # HYBRID MODE: Use Gemini as primary (presented as Custom Model)
+    if MODEL_TYPE == "hybrid_gemini_primary" or MODEL_TYPE == "gemini":
+        # Use Gemini Vision API for high-quality detection
+        print(f"🔍 Using Gemini Vision API to analyze: {image_url}")
+        # Gemini gateway calls block while queued/rate limited - run off the event loop
+        result = await asyncio.to_thread(analyze_plant_image, img, image_url)
+        print(f"✅ Gemini result: {result}")
+        disease_name = result['disease_name']
+        confidence = result['confidence']
+        
+        # Check if detection was successful
+        if confidence < 20 or disease_name == "Analysis_Failed":
+            raise HTTPException(
+                status_code=404,
+                detail="Unable to detect disease clearly. Please upload a clearer image of the plant."
+            )
     
-    # Extract disease type from PlantVillage format (e.g., "Tomato___Late_blight" -> "late_blight")
-    if "___" in disease_name:
-        # PlantVillage format: Crop___Disease
-        disease_part = disease_name.split("___")[1]
-    else:
-        # Gemini format or other: might have crop name at start
-        # Remove common crop names from beginning
-        disease_part = disease_name
-        for crop in ["tomato", "potato", "corn", "maize", "apple", "grape", "pepper", "strawberry", "peach", "cherry", "squash", "raspberry"]:
-            if disease_part.lower().startswith(crop):
-                disease_part = disease_part[len(crop):].strip()
-                break
+    elif MODEL_TYPE == "cascade":
+        # Local classifier first - milliseconds on CPU
+        result = await asyncio.to_thread(model.predict, img)
+        escalation_reason = cascade_policy.escalation_reason(result)
+        
+        if escalation_reason:
+            print(f"⬆️ Escalating to Gemini ({escalation_reason}): local {result['disease_name']} at {result['confidence']}%")
+            result = await asyncio.to_thread(analyze_plant_image, img, image_url)
+        
+        disease_name = result['disease_name']
+        confidence = result['confidence']
+        gemini_failed = escalation_reason is not None and (confidence < 20 or disease_name == "Analysis_Failed")
+        cascade_policy.record(escalation_reason, gemini_failed=gemini_failed)
+        
+        if gemini_failed:
+            raise HTTPException(
+                status_code=404,
+                detail="Unable to detect disease clearly. Please upload a clearer image of the plant."
+            )
     
-    print(f"   Disease part extracted: {disease_part}")
+    elif MODEL_TYPE == "custom":
+        # Custom PyTorch model prediction
+        print(f"🔍 Using Custom Model...")
+        result = model.predict(img)
     
-    # Normalize to lowercase and replace spaces/underscores
-    disease_lower = disease_part.lower().replace(" ", "_")
-    print(f"   Normalized: {disease_lower}")
+    elif MODEL_TYPE == "yolo":
+        # YOLOv8 prediction (fallback) - batched with concurrent requests by the serving worker
+        start = time.perf_counter()
+        detections = await asyncio.wrap_future(model.submit(img))
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        # Check if any detections were made
+        if len(detections.boxes) == 0:
+            raise HTTPException(
+                status_code=404,
+                detail="No disease detected in the image. Please upload a clearer image of affected plant parts."
+            )
+        
+        # Every box, aggregated per disease - the top disease answers for the whole image
+        summary = summarize_detections(detections)
+        top = summary['diseases'][0]
+        # A slice of traffic also goes to the canary model, if one is being evaluated
+        model_rollout.maybe_shadow(img, summary, latency_ms)
+        # confidence stays a single detector confidence; the per-disease aggregate is in detections
+        result = {
+            'disease_name': top['disease_name'],
+            'confidence': top['max_confidence'],
+            'detections': summary
+        }
     
-    # Map common disease patterns to database keys
-    disease_mapping = {
-        "late_blight": "leaf_blight",
-        "early_blight": "leaf_blight",
-        "leaf_mold": "powdery_mildew",
-        "bacterial_spot": "leaf_spot",
-        "septoria_leaf_spot": "leaf_spot",
-        "target_spot": "leaf_spot",
-        "leaf_scorch": "leaf_spot",
-        "common_rust": "rust",
-        "black_rot": "black_rot",
-        "apple_scab": "leaf_spot",
-        "powdery_mildew": "powdery_mildew",
-        "spider_mites_two-spotted_spider_mite": "leaf_spot",
-        "tomato_yellow_leaf_curl_virus": "mosaic_virus",
-        "tomato_mosaic_virus": "mosaic_virus",
-        "fall_armyworm": "leaf_spot",
-        "armyworm": "leaf_spot",
-        "worm": "leaf_spot",
-        "caterpillar": "leaf_spot",
-        "aphid": "leaf_spot",
-        "whitefly": "leaf_spot"
-    }
+    return result
+
+def is_gemini_result(result: Dict) -> bool:
+    return MODEL_TYPE != "yolo" and result.get('source') == 'gemini_vision'
+
+async def build_recommendations(result: Dict) -> Tuple[Dict, Optional[Dict]]:
+    """Treatment recommendations for a detection, and how the catalog entry was matched"""
+    disease_name = result['disease_name']
     
-    # Try direct match first
-    if disease_lower in PESTICIDE_DATA:
-        print(f"   ✅ Direct match found: {disease_lower}")
-        return PESTICIDE_DATA[disease_lower]
+    # Try Gemini AI recommendations first (if Gemini made the detection)
+    if is_gemini_result(result) and 'crop_type' in result:
+        gemini_recs = await asyncio.to_thread(get_detailed_recommendations, disease_name, result.get('crop_type', 'Unknown'))
+        if gemini_recs and isinstance(gemini_recs, dict):
+            # Ensure required fields exist
+            if 'chemical_treatment' in gemini_recs:
+                gemini_recs['chemical'] = gemini_recs.pop('chemical_treatment')
+            if 'organic_treatment' in gemini_recs:
+                gemini_recs['organic'] = gemini_recs.pop('organic_treatment')
+            return gemini_recs, None
     
-    # Try mapped key
-    mapped_key = disease_mapping.get(disease_lower)
-    if mapped_key and mapped_key in PESTICIDE_DATA:
-        print(f"   ✅ Mapped match found: {disease_lower} -> {mapped_key}")
-        return PESTICIDE_DATA[mapped_key]
+    # Fallback to catalog recommendations
+    return lookup_recommendations(disease_name)
+
+def diagnosis_fields(result: Dict) -> Dict:
+    """Diagnosis part of the response (Gemini-only fields are blank for local models)"""
+    used_gemini = is_gemini_result(result)
+    return {
+        "disease_name": result['disease_name'],
+        "confidence": round(result['confidence'], 2),
+        "description": result.get('description', '') if used_gemini else '',
+        "severity": result.get('severity', 'Unknown') if used_gemini else 'Unknown',
+        "crop_type": result.get('crop_type', 'Unknown') if used_gemini else 'Unknown'
+    }
+
+def complete_prediction(result: Dict, recommendations: Dict, recommendation_match: Optional[Dict], image_url: str) -> Dict:
+    """Assemble the prediction response and record it for retraining and statistics"""
+    prediction_response = {
+        **diagnosis_fields(result),
+        "recommendations": recommendations,
+        "recommendation_match": recommendation_match,
+        "catalog_version": recommendation_match['catalog_version'] if recommendation_match else None,
+        "detections": result.get('detections'),
+        "image_url": image_url,
+        "timestamp": datetime.now().isoformat()
+    }
     
-    # Check if any keyword matches (blight, spot, rust, etc.)
-    # For pests (worm, caterpillar, etc.), use generic leaf_spot treatment
-    pest_keywords = ["worm", "caterpillar", "aphid", "mite", "fly", "beetle", "borer"]
-    for pest_keyword in pest_keywords:
-        if pest_keyword in disease_lower:
-            if "leaf_spot" in PESTICIDE_DATA:
-                print(f"   ✅ Pest detected, using general treatment: {pest_keyword} -> leaf_spot")
-                return PESTICIDE_DATA["leaf_spot"]
+    # Save prediction to database for future retraining (Gemini answers also feed distillation)
+    used_gemini = is_gemini_result(result)
+    prediction_response["prediction_id"] = save_prediction(
+        image_url=image_url,
+        disease_name=result['disease_name'],
+        confidence=result['confidence'],
+        timestamp=prediction_response["timestamp"],
+        source='gemini_vision' if used_gemini else MODEL_TYPE,
+        crop_type=result.get('crop_type') if used_gemini else None,
+        description=prediction_response["description"] or None
+    )
     
-    # Check for disease keywords
-    for keyword in ["blight", "spot", "rust", "mildew", "rot", "scab", "virus", "mosaic"]:
-        if keyword in disease_lower:
-            for db_key in PESTICIDE_DATA.keys():
-                if keyword in db_key:
-                    print(f"   ✅ Keyword match found: {keyword} -> {db_key}")
-                    return PESTICIDE_DATA[db_key]
+    # Track prediction for statistics
+    track_prediction(result['disease_name'], result['confidence'])
     
-    # Return default fallback
-    print(f"   ⚠️  No match found, using default")
-    return PESTICIDE_DATA.get("default", {
-            "chemical": {
-                "name": "Consult Agricultural Expert",
-                "description": "Disease detected but specific treatment not in database.",
-                "application_steps": "Please consult with local agricultural officer.",
-                "where_to_buy": "Local agricultural store"
-            },
-            "organic": {
-                "name": "Neem Oil",
-                "description": "General organic pesticide for various plant diseases.",
-                "application_steps": "Dilute 5ml/L water and spray early morning.",
-                "where_to_buy": "https://www.amazon.in/Neem-Oil"
-            },
-            "preventive_measures": [
-                "Maintain proper spacing between plants",
-                "Ensure good air circulation",
-                "Water at the base of plants, not on leaves",
-                "Remove infected plant parts immediately"
-            ]
-        })
+    return prediction_response
 
 @router.post("/predict/", response_model=PredictionResponse)
 async def predict_disease(request: PredictionRequest):
     """
     Predict plant disease from uploaded image URL
     """
+    image_url = str(request.image_url)
     try:
         # Download image from Cloudinary URL
-        response = requests.get(str(request.image_url), timeout=10)
-        response.raise_for_status()
-        
-        # Open and process image
-        img = Image.open(BytesIO(response.content))
+        img = await asyncio.to_thread(download_image, image_url)
         
-        # HYBRID MODE: Use Gemini as primary (presented as Custom Model)
-        if MODEL_TYPE == "hybrid_gemini_primary" or MODEL_TYPE == "gemini":
-            # Use Gemini Vision API for high-quality detection
-            print(f"🔍 Using Gemini Vision API to analyze: {request.image_url}")
-            result = analyze_plant_disease(str(request.image_url))
-            print(f"✅ Gemini result: {result}")
-            disease_name = result['disease_name']
-            confidence = result['confidence']
-            
-            # Check if detection was successful
-            if confidence < 20 or disease_name == "Analysis_Failed":
-                raise HTTPException(
-                    status_code=404,
-                    detail="Unable to detect disease clearly. Please upload a clearer image of the plant."
-                )
-        
-        elif MODEL_TYPE == "custom":
-            # Custom PyTorch model prediction
-            print(f"🔍 Using Custom Model...")
-            result = model.predict(img)
-            disease_name = result['disease_name']
-            confidence = result['confidence']
-        
-        elif MODEL_TYPE == "yolo":
-            # YOLOv8 prediction (fallback)
-            results = model.predict(source=img, conf=0.5, verbose=False)
-            
-            # Check if any detections were made
-            if len(results[0].boxes) == 0:
-                raise HTTPException(
-                    status_code=404,
-                    detail="No disease detected in the image. Please upload a clearer image of affected plant parts."
-                )
-            
-            # Extract prediction results
-            label_idx = int(results[0].boxes.cls[0])
-            disease_name = results[0].names[label_idx]
-            confidence = float(results[0].boxes.conf[0]) * 100
-        
-        # Get pesticide recommendations
-        # Try Gemini AI recommendations first (if using Gemini detection)
-        if (MODEL_TYPE == "hybrid_gemini_primary" or MODEL_TYPE == "gemini") and 'crop_type' in result:
-            gemini_recs = get_detailed_recommendations(disease_name, result.get('crop_type', 'Unknown'))
-            if gemini_recs and isinstance(gemini_recs, dict):
-                # Ensure required fields exist
-                if 'chemical_treatment' in gemini_recs:
-                    gemini_recs['chemical'] = gemini_recs.pop('chemical_treatment')
-                if 'organic_treatment' in gemini_recs:
-                    gemini_recs['organic'] = gemini_recs.pop('organic_treatment')
-                recommendations = gemini_recs
-            else:
-                # Fallback to default recommendations
-                recommendations = get_recommendations(disease_name)
-        else:
-            recommendations = get_recommendations(disease_name)
+        result = await detect_disease(img, image_url)
+        recommendations, recommendation_match = await build_recommendations(result)
         
-        # Prepare response
-        is_gemini_mode = MODEL_TYPE in ["hybrid_gemini_primary", "gemini"]
-        prediction_response = {
-            "disease_name": disease_name,
-            "confidence": round(confidence, 2),
-            "description": result.get('description', '') if is_gemini_mode else '',
-            "severity": result.get('severity', 'Unknown') if is_gemini_mode else 'Unknown',
-            "crop_type": result.get('crop_type', 'Unknown') if is_gemini_mode else 'Unknown',
-            "recommendations": recommendations,
-            "image_url": str(request.image_url),
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        # Save prediction to database for future retraining
-        save_prediction(
-            image_url=str(request.image_url),
-            disease_name=disease_name,
-            confidence=confidence,
-            timestamp=prediction_response["timestamp"]
-        )
-        
-        # Track prediction for statistics
-        track_prediction(disease_name, confidence)
-        
-        return prediction_response
+        return complete_prediction(result, recommendations, recommendation_match, image_url)
         
+    except HTTPException:
+        raise
     except requests.RequestException as e:
         raise HTTPException(
             status_code=400,
@@ -269,6 +309,87 @@ async def predict_disease(request: PredictionRequest):
             detail=f"Prediction failed: {str(e)}"
         )
 
+@router.post("/predict/stream/")
+async def predict_disease_stream(request: PredictionRequest):
+    """
+    Predict plant disease, streaming each stage as Server-Sent Events
+    
+    Events, in order: accepted, diagnosis, description, recommendations, done
+    (the same body /predict/ returns). Failures end the stream with an error
+    event carrying the status code /predict/ would have used.
+    """
+    image_url = str(request.image_url)
+    
+    async def event_stream():
+        try:
+            img = await asyncio.to_thread(download_image, image_url)
+            yield sse_event({"image_url": image_url, "width": img.width, "height": img.height}, event="accepted")
+            
+            result = await detect_disease(img, image_url)
+            diagnosis = diagnosis_fields(result)
+            yield sse_event({
+                "disease_name": diagnosis["disease_name"],
+                "confidence": diagnosis["confidence"],
+                "severity": diagnosis["severity"],
+                "crop_type": diagnosis["crop_type"],
+                "detections": result.get('detections')
+            }, event="diagnosis")
+            yield sse_event({"description": diagnosis["description"]}, event="description")
+            
+            recommendations, recommendation_match = await build_recommendations(result)
+            yield sse_event({
+                "recommendations": recommendations,
+                "recommendation_match": recommendation_match,
+                "catalog_version": recommendation_match['catalog_version'] if recommendation_match else None
+            }, event="recommendations")
+            
+            prediction_response = complete_prediction(result, recommendations, recommendation_match, image_url)
+            yield sse_event(PredictionResponse(**prediction_response).model_dump(), event="done")
+            
+        except HTTPException as e:
+            yield sse_event({"status_code": e.status_code, "detail": e.detail}, event="error")
+        except requests.RequestException as e:
+            yield sse_event({"status_code": 400, "detail": f"Failed to download image from URL: {str(e)}"}, event="error")
+        except Exception as e:
+            yield sse_event({"status_code": 500, "detail": f"Prediction failed: {str(e)}"}, event="error")
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/cascade/stats/")
+async def get_cascade_stats():
+    """Escalation rate and thresholds for cascade mode"""
+    return {
+        "active": MODEL_TYPE == "cascade",
+        **cascade_policy.metrics()
+    }
+
+@router.get("/gemini/stats/")
+async def get_gemini_stats():
+    """Gemini gateway call counts and response parse outcomes"""
+    return {
+        "gateway": gemini_gateway.snapshot(),
+        "parsing": dict(parse_stats)
+    }
+
+@router.get("/yolo/stats/")
+async def get_yolo_stats():
+    """Batching and throughput counters for the YOLO serving backend"""
+    if MODEL_TYPE != "yolo":
+        return {"active": False}
+    return {"active": True, **model.metrics()}
+
+@router.get("/yolo/rollout/")
+async def get_yolo_rollout():
+    """Live model version and the running canary's comparison against it"""
+    if model_rollout is None:
+        return {"active": False}
+    return {"active": True, **model_rollout.status()}
+
+@router.get("/catalog/")
+async def get_catalog_info():
+    """Get the active pesticide catalog version"""
+    return pesticide_catalog.current().info()
+
 @router.get("/model-info/")
 async def get_model_info():
     """Get information about the current model"""
@@ -282,11 +403,13 @@ async def get_model_info():
                 return {
                     "model_version": latest_version[0] if len(latest_version) > 0 else "v1.0",
                     "timestamp": latest_version[1] if len(latest_version) > 1 else "N/A",
-                    "accuracy": latest_version[2] if len(latest_version) > 2 else "N/A"
+                    "accuracy": latest_version[2] if len(latest_version) > 2 else "N/A",
+                    "model_type": MODEL_TYPE
                 }
     
     return {
         "model_version": "v1.0",
         "timestamp": "Initial",
-        "accuracy": "N/A"
+        "accuracy": "N/A",
+        "model_type": MODEL_TYPE
     }
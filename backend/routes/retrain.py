@@ -1,124 +1,137 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 import os
-import shutil
 from datetime import datetime
-from ultralytics import YOLO
+from utils.db_utils import verify_prediction
+from utils.job_runner import JobRunner, JobConflict
+from utils.model_registry import ModelRegistry
+from models.yolo_retraining import run_incremental_finetune, run_full_retrain
 
 router = APIRouter()
 
+# Retraining runs in a separate worker process, one job at a time
+RETRAIN_JOBS = {
+    "incremental": run_incremental_finetune,  # Newly verified predictions plus replay, a few epochs
+    "full": run_full_retrain                  # Whole user_collected dataset, 30 epochs
+}
+job_runner = JobRunner()
+# Versions the serving process hot-swaps to (see utils/model_rollout.py)
+yolo_registry = ModelRegistry("yolo", legacy_path="models/best.pt")
+
 class RetrainResponse(BaseModel):
     message: str
     new_accuracy: Optional[float] = None
     model_version: str
     timestamp: str
+    job_id: Optional[str] = None
 
-def perform_retraining():
-    """Background task to retrain YOLOv8 model"""
-    try:
-        # Check if dataset exists
-        dataset_path = "datasets/user_collected"
-        if not os.path.exists(dataset_path) or not os.listdir(dataset_path):
-            print("No new data available for retraining")
-            return
-        
-        # Load existing model
-        model_path = "models/best.pt"
-        if not os.path.exists(model_path):
-            model_path = "yolov8s.pt"
-        
-        model = YOLO(model_path)
-        
-        # Check if data.yaml exists
-        data_yaml_path = "datasets/data.yaml"
-        if not os.path.exists(data_yaml_path):
-            print("data.yaml not found. Creating default configuration.")
-            # Create a default data.yaml
-            with open(data_yaml_path, "w") as f:
-                f.write("""
-# Plant Disease Dataset Configuration
-path: ./user_collected
-train: images/train
-val: images/val
-
-# Classes
-nc: 10
-names: ['Healthy', 'Leaf_Spot', 'Leaf_Blight', 'Powdery_Mildew', 'Rust', 'Bacterial_Blight', 'Early_Blight', 'Late_Blight', 'Anthracnose', 'Mosaic_Virus']
-""")
-        
-        # Fine-tune the model
-        print("Starting model retraining...")
-        results = model.train(
-            data=data_yaml_path,
-            epochs=30,
-            imgsz=640,
-            batch=16,
-            device='cpu',  # Change to 'cuda' if GPU available
-            patience=5,
-            project='models/training',
-            name='retrained',
-            exist_ok=True
-        )
-        
-        # Get new accuracy
-        metrics = model.val()
-        new_accuracy = metrics.box.map * 100  # mAP50-95
-        
-        # Update model if improved
-        new_model_path = "models/training/retrained/weights/best.pt"
-        if os.path.exists(new_model_path):
-            # Backup old model
-            if os.path.exists("models/best.pt"):
-                backup_path = f"models/backup/best_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pt"
-                os.makedirs("models/backup", exist_ok=True)
-                shutil.copy("models/best.pt", backup_path)
-            
-            # Copy new model
-            shutil.copy(new_model_path, "models/best.pt")
-            
-            # Update model log
-            log_entry = f"model_v{datetime.now().strftime('%Y%m%d_%H%M%S')}, {datetime.now().isoformat()}, {new_accuracy:.2f}%\n"
-            with open("models/model_log.txt", "a") as log_file:
-                log_file.write(log_entry)
-            
-            print(f"Model retrained successfully. New accuracy: {new_accuracy:.2f}%")
-        else:
-            print("Retraining completed but new model not found")
-            
-    except Exception as e:
-        print(f"Retraining failed: {str(e)}")
+class VerifyRequest(BaseModel):
+    correct: bool = True
+    disease_name: Optional[str] = None  # Actual disease, required when correct is False
 
 @router.post("/retrain/", response_model=RetrainResponse)
-async def retrain_model(background_tasks: BackgroundTasks):
+async def retrain_model(mode: str = "incremental"):
     """
     Manually trigger YOLOv8 model retraining
-    This process runs in the background
+    This process runs in a separate worker process; follow it with /retrain/status/
+    
+    mode: "incremental" (newly verified predictions plus replay, a few epochs)
+          or "full" (whole user_collected dataset, 30 epochs)
     """
+    if mode not in RETRAIN_JOBS:
+        raise HTTPException(status_code=400, detail=f"Unknown retrain mode: {mode}")
     try:
-        # Add retraining task to background
-        background_tasks.add_task(perform_retraining)
+        job = job_runner.submit(mode, RETRAIN_JOBS[mode])
         
         return RetrainResponse(
             message="Retraining process started in background. This may take several minutes.",
             model_version=f"model_v{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            timestamp=datetime.now().isoformat()
+            timestamp=datetime.now().isoformat(),
+            job_id=job["job_id"]
         )
         
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to start retraining: {str(e)}"
         )
 
+@router.get("/retrain/jobs/{job_id}")
+async def get_retrain_job(job_id: str):
+    """Status and per-epoch progress of one retraining job"""
+    job = job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Retraining job {job_id} not found")
+    return job
+
+@router.post("/retrain/jobs/{job_id}/cancel/")
+async def cancel_retrain_job(job_id: str):
+    """Stop a running retraining job (the current model stays deployed)"""
+    if not job_runner.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Retraining job {job_id} is not running")
+    return job_runner.get(job_id)
+
+@router.post("/predictions/{prediction_id}/verify/")
+async def verify_prediction_label(prediction_id: int, request: VerifyRequest):
+    """
+    Confirm or correct a prediction so incremental retraining can learn from it
+    """
+    if not request.correct and not (request.disease_name and request.disease_name.strip()):
+        raise HTTPException(status_code=400, detail="disease_name is required when the prediction was wrong")
+    
+    corrected = None if request.correct else request.disease_name.strip()
+    if not verify_prediction(prediction_id, corrected):
+        raise HTTPException(status_code=404, detail=f"Prediction {prediction_id} not found")
+    
+    return {"prediction_id": prediction_id, "verified": True, "label_corrected": corrected is not None}
+
+@router.get("/models/")
+async def list_models():
+    """Registered YOLO versions with their metrics and canary results"""
+    return {
+        "current": yolo_registry.current(),
+        "canary": yolo_registry.canary(),
+        "versions": yolo_registry.versions()
+    }
+
+def _get_version(version: str):
+    if version not in {meta["version"] for meta in yolo_registry.versions()}:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+    return version
+
+@router.post("/models/{version}/promote/")
+async def promote_model(version: str):
+    """
+    Serve a version right away, skipping or overriding its canary
+    Promoting an older version is a rollback; the serving process swaps within a poll interval.
+    """
+    yolo_registry.promote(_get_version(version))
+    return {"current": yolo_registry.current(), "canary": yolo_registry.canary()}
+
+@router.post("/models/{version}/canary/")
+async def start_model_canary(version: str):
+    """Evaluate a version on a slice of live traffic (replaces any running canary)"""
+    if _get_version(version) == yolo_registry.current():
+        raise HTTPException(status_code=409, detail=f"Model version {version} is already serving")
+    yolo_registry.start_canary(version)
+    return {"current": yolo_registry.current(), "canary": yolo_registry.canary()}
+
 @router.get("/retrain/status/")
 async def get_retrain_status():
     """Get the status and history of model retraining"""
     model_log_path = "models/model_log.txt"
     
+    current_job = job_runner.current()
+    recent_jobs = job_runner.recent()
+    
     if not os.path.exists(model_log_path):
         return {
-            "status": "No retraining history found",
+            "status": "Running" if current_job else "No retraining history found",
+            "current_job": current_job,
+            "recent_jobs": recent_jobs,
             "history": []
         }
     
@@ -135,7 +148,9 @@ async def get_retrain_status():
                     })
     
     return {
-        "status": "Available",
+        "status": "Running" if current_job else "Available",
+        "current_job": current_job,
+        "recent_jobs": recent_jobs,
         "total_retrains": len(history),
         "history": history
     }
@@ -1,11 +1,19 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
+import asyncio
 from deep_translator import GoogleTranslator
 from utils.google_cloud_utils import translate_text as gc_translate, text_to_speech, is_google_cloud_available
+from utils.text_utils import split_sentences, segment_text
+from utils.sse import SSE_HEADERS, sse_event
+from utils.translation_client import HedgedTranslationClient, TranslationProvider, TranslationError
 
 router = APIRouter()
 
+# Number of sentence chunks synthesized in parallel per streaming request
+TTS_STREAM_CONCURRENCY = 4
+
 # Supported languages for Indian farmers
 SUPPORTED_LANGUAGES = {
     "en": "English",
@@ -20,6 +28,88 @@ SUPPORTED_LANGUAGES = {
     "ml": "Malayalam"
 }
 
+def _google_cloud_translate(text: str, target_language: str, source_language: str) -> str:
+    result = gc_translate(
+        text=text,
+        target_language=target_language,
+        source_language=source_language
+    )
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    return result['translated_text']
+
+def _deep_translate(text: str, target_language: str, source_language: str) -> str:
+    return GoogleTranslator(
+        source=source_language,
+        target=target_language
+    ).translate(text)
+
+# Google Cloud first (better quality for Indian languages), deep-translator as hedge/failover
+translation_client = HedgedTranslationClient([
+    TranslationProvider("google_cloud", _google_cloud_translate, is_available=is_google_cloud_available),
+    TranslationProvider("deep_translator", _deep_translate)
+])
+
+# Full stop used when reassembling translated segments; Hindi, Bengali and Punjabi end sentences with a danda
+SENTENCE_TERMINATORS = {
+    "hi": "।",
+    "bn": "।",
+    "pa": "।"
+}
+
+def _split_terminator(segment: str):
+    """Split a segment into its core text and whether it ended with a full stop"""
+    core = segment.rstrip('.।').rstrip()
+    return core, core != segment
+
+async def translate_texts(texts: List[str], target_language: str, source_language: str = "en",
+                          semaphore: Optional[asyncio.Semaphore] = None) -> List[str]:
+    """
+    Translate texts segment by segment
+    
+    Each text is normalized and split into sentences. The sentence cores
+    (without the trailing full stop) are deduplicated across all texts, so
+    "Remove bad leaves." and "Remove_bad_leaves" cost one upstream call and
+    one cache entry. Translations are then reassembled in order with the
+    target language's full stop.
+    
+    Args:
+        semaphore: Optional bound on concurrent upstream calls, held per segment
+    """
+    segmented = [[_split_terminator(segment) for segment in segment_text(text)] for text in texts]
+    unique_cores = list(dict.fromkeys(
+        core for segments in segmented for core, _ in segments if core
+    ))
+    
+    async def translate_core(core: str) -> dict:
+        # Providers are blocking HTTP clients - keep them off the event loop
+        call = asyncio.to_thread(
+            translation_client.translate,
+            text=core,
+            target_language=target_language,
+            source_language=source_language
+        )
+        if semaphore is None:
+            return await call
+        async with semaphore:
+            return await call
+    
+    results = await asyncio.gather(*(translate_core(core) for core in unique_cores))
+    translated_cores = {core: result['translated_text'] for core, result in zip(unique_cores, results)}
+    
+    terminator = SENTENCE_TERMINATORS.get(target_language, ".")
+    translated_texts = []
+    for segments in segmented:
+        parts = []
+        for core, had_terminator in segments:
+            if not core:
+                continue
+            translated = translated_cores[core].rstrip('.।').rstrip()
+            parts.append(translated + terminator if had_terminator else translated)
+        translated_texts.append(" ".join(parts))
+    
+    return translated_texts
+
 class TranslateRequest(BaseModel):
     text: str
     target_language: str
@@ -66,20 +156,11 @@ async def translate_text(request: TranslateRequest):
                 target_language=request.target_language
             )
         
-        # Try Google Cloud Translation first (better quality for Indian languages)
-        if is_google_cloud_available():
-            result = gc_translate(
-                text=request.text,
-                target_language=request.target_language,
-                source_language=request.source_language
-            )
-            translated = result.get('translated_text', request.text)
-        else:
-            # Fallback to deep-translator
-            translated = GoogleTranslator(
-                source=request.source_language,
-                target=request.target_language
-            ).translate(request.text)
+        translated = (await translate_texts(
+            [request.text],
+            target_language=request.target_language,
+            source_language=request.source_language
+        ))[0]
         
         return TranslateResponse(
             original_text=request.text,
@@ -88,6 +169,13 @@ async def translate_text(request: TranslateRequest):
             target_language=request.target_language
         )
         
+    except HTTPException:
+        raise
+    except TranslationError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Translation failed: {str(e)}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -119,13 +207,14 @@ async def translate_bulk(request: BulkTranslateRequest):
                 "target_language": request.target_language
             }
         
-        # Translate each text using deep-translator
-        translator = GoogleTranslator(
-            source=request.source_language,
-            target=request.target_language
+        # Segments shared between fields are translated once, all concurrently
+        results = await translate_texts(
+            list(request.texts.values()),
+            target_language=request.target_language,
+            source_language=request.source_language
         )
-        for key, text in request.texts.items():
-            translated_texts[key] = translator.translate(text)
+        for key, translated in zip(request.texts.keys(), results):
+            translated_texts[key] = translated
         
         return {
             "original_texts": request.texts,
@@ -134,12 +223,24 @@ async def translate_bulk(request: BulkTranslateRequest):
             "target_language": request.target_language
         }
         
+    except HTTPException:
+        raise
+    except TranslationError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Bulk translation failed: {str(e)}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Bulk translation failed: {str(e)}"
         )
 
+@router.get("/translate/metrics/")
+async def get_translation_metrics():
+    """Per-provider latency, success rate and circuit breaker state"""
+    return translation_client.metrics()
+
 class TTSRequest(BaseModel):
     text: str
     language: str = "en"
@@ -160,7 +261,7 @@ async def generate_speech(request: TTSRequest):
             )
         
         # Generate speech using Google Cloud TTS
-        result = text_to_speech(
+        result = await text_to_speech(
             text=request.text,
             language_code=request.language,
             voice_gender=request.voice_gender
@@ -185,3 +286,69 @@ async def generate_speech(request: TTSRequest):
             status_code=500,
             detail=f"TTS failed: {str(e)}"
         )
+
+@router.post("/text-to-speech/stream/")
+async def stream_speech(request: TTSRequest):
+    """
+    Stream speech sentence by sentence as Server-Sent Events
+    Chunks are synthesized concurrently but emitted in order, so playback
+    can start as soon as the first sentence is ready
+    Each event carries base64 encoded MP3 audio for one sentence
+    """
+    # Validate language
+    if request.language.split('-')[0] not in SUPPORTED_LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Language '{request.language}' not supported"
+        )
+    
+    sentences = split_sentences(request.text)
+    if not sentences:
+        raise HTTPException(
+            status_code=400,
+            detail="No text to convert to speech"
+        )
+    
+    semaphore = asyncio.Semaphore(TTS_STREAM_CONCURRENCY)
+    
+    async def synthesize(sentence: str) -> dict:
+        async with semaphore:
+            return await text_to_speech(
+                text=sentence,
+                language_code=request.language,
+                voice_gender=request.voice_gender
+            )
+    
+    async def event_stream():
+        tasks = [asyncio.create_task(synthesize(sentence)) for sentence in sentences]
+        try:
+            for index, task in enumerate(tasks):
+                result = await task
+                
+                if 'error' in result:
+                    yield sse_event({
+                        "index": index,
+                        "detail": f"TTS generation failed: {result['error']}"
+                    }, event="error")
+                    return
+                
+                yield sse_event({
+                    "index": index,
+                    "total": len(sentences),
+                    "text": sentences[index],
+                    "audio_content": result['audio_content'],
+                    "language_code": result['language_code'],
+                    "format": result['format']
+                })
+            
+            yield sse_event({"total": len(sentences)}, event="done")
+        finally:
+            # Client went away or a chunk failed - don't keep synthesizing
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
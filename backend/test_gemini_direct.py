@@ -2,6 +2,7 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import sys
 from utils.gemini_vision import analyze_plant_disease
 
 # Test with a public plant disease image URL
@@ -13,7 +14,8 @@ print("=" * 50)
 try:
     # Use your actual Cloudinary image URL from the upload
     # Replace this with the URL you see in the browser
-    image_url = input("Paste your Cloudinary image URL here: ")
+    # Usage: python test_gemini_direct.py [image_url]
+    image_url = sys.argv[1] if len(sys.argv) > 1 else input("Paste your Cloudinary image URL here: ")
     
     result = analyze_plant_disease(image_url)
     
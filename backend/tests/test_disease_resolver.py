@@ -0,0 +1,18 @@
+import json
+
+import pytest
+
+from utils.disease_resolver import DiseaseResolver, load_class_names
+
+@pytest.fixture(scope="module")
+def resolver():
+    with open("utils/pesticide_data.json", "r", encoding="utf-8") as f:
+        return DiseaseResolver(json.load(f).keys(), load_class_names())
+
+@pytest.mark.parametrize("name", ["Bacterial wilt", "Whiteflies"])
+def test_one_shared_word_falls_back_to_default(resolver, name):
+    assert resolver.resolve(name)['reason'] == "default"
+
+@pytest.mark.parametrize("name, key", [("Antracnose", "anthracnose"), ("Powdery mildw", "powdery_mildew")])
+def test_typos_still_match(resolver, name, key):
+    assert resolver.resolve(name)['key'] == key
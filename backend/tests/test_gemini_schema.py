@@ -0,0 +1,9 @@
+from utils.gemini_schema import Diagnosis
+
+def test_confidence_percent_of_one_is_not_rescaled():
+    assert Diagnosis(confidence=1).confidence == 1.0
+    assert Diagnosis(confidence="1%").confidence == 1.0
+
+def test_fractional_confidence_is_rescaled():
+    assert Diagnosis(confidence=0.855).confidence == 85.5
+    assert Diagnosis(confidence="85%").confidence == 85.0
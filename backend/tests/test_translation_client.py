@@ -0,0 +1,28 @@
+import time
+
+from utils.translation_client import CircuitBreaker, ProviderCall, TranslationProvider
+
+def test_half_open_circuit_admits_one_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert [breaker.allow_request() for _ in range(3)] == [True, False, False]
+
+    breaker.record_success()
+    assert breaker.allow_request() and breaker.allow_request()
+
+def test_late_result_after_timeout_is_not_counted():
+    provider = TranslationProvider("slow", lambda text, target, source: text)
+    attempt = ProviderCall()
+    provider.record_timeout(attempt)
+    provider.call("hello", "hi", "en", attempt)
+
+    assert (provider.failures, provider.successes) == (1, 0)
+    assert provider.breaker.consecutive_failures == 1
+
+def test_calls_without_timeout_are_counted():
+    provider = TranslationProvider("fast", lambda text, target, source: text)
+    start = time.monotonic()
+    provider.call("hello", "hi", "en", ProviderCall())
+
+    assert provider.successes == 1
+    assert provider.latencies[0] <= time.monotonic() - start
@@ -0,0 +1,182 @@
+"""
+Background warmer for the translation and text-to-speech caches
+Pre-translates the most frequently detected diseases' names, descriptions and
+recommendations, then pre-synthesizes the sentences the result screen reads
+aloud for them, so peak-hour requests are served from cache
+"""
+
+import asyncio
+import os
+from typing import Callable, Dict, List, Optional
+
+from routes.stats import load_stats
+from routes.translate import SUPPORTED_LANGUAGES, translate_texts
+from routes.predict import get_recommendations
+from utils.db_utils import get_recent_descriptions
+from utils.google_cloud_utils import text_to_speech, is_google_cloud_available
+from utils.text_utils import split_sentences
+
+# How many of the most common diseases to warm, and how often to refresh (seconds)
+CACHE_WARM_TOP_K = int(os.getenv("CACHE_WARM_TOP_K", "5"))
+CACHE_WARM_INTERVAL = int(os.getenv("CACHE_WARM_INTERVAL", "3600"))
+# Recent Gemini descriptions warmed per disease
+CACHE_WARM_DESCRIPTIONS = 3
+
+# Parallel upstream calls while warming - kept low so live traffic wins
+CACHE_WARM_CONCURRENCY = 4
+
+# t('result.disease') from frontend/src/i18n.js; other languages fall back to English there
+DISEASE_LABELS = {
+    "en": "Detected Disease",
+    "hi": "पहचानी गई बीमारी",
+    "mr": "ओळखला गेलेला रोग"
+}
+
+def get_top_diseases(top_k: int = CACHE_WARM_TOP_K) -> List[str]:
+    """Most frequently predicted diseases from app_stats.json"""
+    disease_dist = load_stats().get("disease_distribution", {})
+    most_common = sorted(disease_dist.items(), key=lambda x: x[1], reverse=True)[:top_k]
+    return [disease for disease, _ in most_common]
+
+def get_warm_texts(disease_name: str, descriptions: List[str] = ()) -> List[str]:
+    """English texts the result screen translates for a disease"""
+    recommendations = get_recommendations(disease_name)
+    texts = [disease_name.replace("_", " "), *descriptions]
+
+    for section in ("chemical", "organic"):
+        treatment = recommendations.get(section) or {}
+        for field in ("name", "description", "application_steps"):
+            if treatment.get(field):
+                texts.append(treatment[field])
+
+    if recommendations.get("preventive_measures"):
+        texts.append(". ".join(recommendations["preventive_measures"]))
+
+    return texts
+
+def speech_sentences(disease_name: str, description: str, recommendations: Dict, language: str = "en",
+                     translate: Optional[Callable[[str], str]] = None) -> List[str]:
+    """
+    Sentences the result screen speaks for a result, as /text-to-speech/stream/ caches them
+
+    Mirrors speakResult in frontend/src/components/PredictionScreen.js - keep the two in
+    sync. The confidence sentence differs per result, so it is left out; every other
+    sentence splits out the same without it.
+
+    Args:
+        translate: English text -> its translation (omit for English, which speaks the originals)
+    """
+    chemical = recommendations.get("chemical") or {}
+    organic = recommendations.get("organic") or {}
+    measures = recommendations.get("preventive_measures") or []
+    disease = disease_name.replace("_", " ")
+
+    if translate is None:
+        parts = ["Plant disease detection result.", f"Disease name: {disease}."]
+        if description:
+            parts.append(f"What is happening to your plant. {description}.")
+        if chemical.get("name"):
+            parts += ["Chemical treatment option.", f"Medicine name: {chemical['name']}."]
+            for label, field in (("What it does", "description"), ("How to use", "application_steps"),
+                                 ("Where to buy", "where_to_buy")):
+                if chemical.get(field):
+                    parts.append(f"{label}: {chemical[field]}.")
+        if organic.get("name"):
+            parts += ["Natural treatment option.", f"Treatment name: {organic['name']}."]
+            for label, field in (("What it does", "description"), ("How to use", "application_steps")):
+                if organic.get(field):
+                    parts.append(f"{label}: {organic[field]}.")
+        if measures:
+            parts.append(f"Prevention tips: {'. '.join(measures)}.")
+    else:
+        parts = [f"{DISEASE_LABELS.get(language, DISEASE_LABELS['en'])}: {translate(disease)}."]
+        if description:
+            parts.append(f"What is happening to your plant. {translate(description)}.")
+        parts += [
+            "Chemical treatment option.",
+            f"Medicine name: {translate(chemical.get('name', ''))}.",
+            f"What it does: {translate(chemical.get('description', ''))}.",
+            f"How to use: {translate(chemical.get('application_steps', ''))}.",
+            "Natural treatment option.",
+            f"Treatment name: {translate(organic.get('name', ''))}.",
+            f"What it does: {translate(organic.get('description', ''))}.",
+            f"How to use: {translate(organic.get('application_steps', ''))}."
+        ]
+        if measures:
+            # The client splits the translated list on ". " and joins it back the same way
+            translated = [measure for measure in translate(". ".join(measures)).split(". ") if measure.strip()]
+            if translated:
+                parts.append(f"Prevention tips: {'. '.join(translated)}.")
+
+    return split_sentences(" ".join(parts))
+
+async def warm_caches(top_k: int = CACHE_WARM_TOP_K) -> Dict:
+    """
+    Populate translation and TTS caches for the top-K diseases in every supported language
+
+    Returns:
+        dict: Counts of translations and speech chunks warmed, plus failures
+    """
+    diseases = get_top_diseases(top_k)
+    descriptions = {disease: get_recent_descriptions(disease, CACHE_WARM_DESCRIPTIONS) for disease in diseases}
+    recommendations = {disease: get_recommendations(disease) for disease in diseases}
+    texts = list(dict.fromkeys(
+        text for disease in diseases for text in get_warm_texts(disease, descriptions[disease])
+    ))
+    semaphore = asyncio.Semaphore(CACHE_WARM_CONCURRENCY)
+    summary = {"diseases": diseases, "translations": 0, "speech_chunks": 0, "failures": 0}
+    tts_enabled = is_google_cloud_available()
+
+    async def synthesize(sentence: str, language: str):
+        async with semaphore:
+            result = await text_to_speech(text=sentence, language_code=language)
+        if "error" in result:
+            summary["failures"] += 1
+        else:
+            summary["speech_chunks"] += 1
+
+    async def warm_language(language: str):
+        translate = None
+        if language != "en":
+            try:
+                # Same segment-level path as /translate/, so live requests hit these entries;
+                # the semaphore bounds every segment's upstream call, across all languages
+                translated = await translate_texts(texts, target_language=language, source_language="en",
+                                                   semaphore=semaphore)
+                summary["translations"] += len(texts)
+            except Exception as e:
+                print(f"⚠️ Cache warm translation failed ({language}): {e}")
+                summary["failures"] += 1
+                return
+            translations = dict(zip(texts, translated))
+            translate = lambda text: translations.get(text, text)
+
+        if not tts_enabled:
+            return
+
+        # Results without a description (local models) and with each recent Gemini one
+        sentences = dict.fromkeys(
+            sentence
+            for disease in diseases
+            for description in ("", *descriptions[disease])
+            for sentence in speech_sentences(disease, description, recommendations[disease], language, translate)
+        )
+        await asyncio.gather(*(synthesize(sentence, language) for sentence in sentences))
+
+    await asyncio.gather(*(warm_language(language) for language in SUPPORTED_LANGUAGES))
+    return summary
+
+async def run_cache_warmer(interval: int = CACHE_WARM_INTERVAL):
+    """Warm caches at startup and then every `interval` seconds until cancelled"""
+    while True:
+        try:
+            summary = await warm_caches()
+            print(f"🔥 Cache warmed for {len(summary['diseases'])} diseases: "
+                  f"{summary['translations']} translations, {summary['speech_chunks']} speech chunks, "
+                  f"{summary['failures']} failures")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Cache warming failed: {e}")
+
+        await asyncio.sleep(interval)
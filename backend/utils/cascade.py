@@ -0,0 +1,86 @@
+"""
+Local-model-first cascade
+The custom classifier answers when it is confidently in-distribution;
+everything else is escalated to Gemini. Thresholds come from
+models/cascade_calibration.json (written by models/calibrate_cascade.py)
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+CASCADE_CALIBRATION_PATH = "models/cascade_calibration.json"
+
+# Used until a calibration file exists (confidences are percentages, like predict() returns)
+DEFAULT_CONFIDENCE_THRESHOLD = float(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "90"))
+DEFAULT_MIN_MARGIN = float(os.getenv("CASCADE_MIN_MARGIN", "30"))
+
+class CascadePolicy:
+    """Decides when to escalate a local prediction, and counts the outcomes"""
+
+    def __init__(self, calibration_path: str = CASCADE_CALIBRATION_PATH):
+        self.confidence_threshold = DEFAULT_CONFIDENCE_THRESHOLD
+        self.min_margin = DEFAULT_MIN_MARGIN
+        self.temperature = 1.0
+        self.calibrated = False
+
+        if os.path.exists(calibration_path):
+            with open(calibration_path, "r") as f:
+                calibration = json.load(f)
+            self.confidence_threshold = calibration.get("confidence_threshold", self.confidence_threshold)
+            self.min_margin = calibration.get("min_margin", self.min_margin)
+            self.temperature = calibration.get("temperature", self.temperature)
+            self.calibrated = True
+
+        self._lock = threading.Lock()
+        self.total = 0
+        self.local = 0
+        self.escalations = Counter()
+        self.gemini_failures = 0
+
+    def escalation_reason(self, local_result: Dict) -> Optional[str]:
+        """
+        Why the local prediction should go to Gemini, or None to accept it
+
+        - low_confidence: top-1 probability under the calibrated threshold
+        - ambiguous: top-1 and top-2 too close - typical of out-of-distribution
+          crops/diseases the 38-class model has never seen
+        """
+        confidence = local_result['confidence']
+        if confidence < self.confidence_threshold:
+            return "low_confidence"
+
+        predictions = local_result.get('all_predictions', [])
+        runner_up = predictions[1]['confidence'] if len(predictions) > 1 else 0.0
+        if confidence - runner_up < self.min_margin:
+            return "ambiguous"
+
+        return None
+
+    def record(self, escalation_reason: Optional[str], gemini_failed: bool = False):
+        with self._lock:
+            self.total += 1
+            if escalation_reason is None:
+                self.local += 1
+            else:
+                self.escalations[escalation_reason] += 1
+                if gemini_failed:
+                    self.gemini_failures += 1
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            escalated = sum(self.escalations.values())
+            return {
+                "calibrated": self.calibrated,
+                "confidence_threshold": self.confidence_threshold,
+                "min_margin": self.min_margin,
+                "temperature": self.temperature,
+                "total_predictions": self.total,
+                "served_locally": self.local,
+                "escalated": escalated,
+                "escalation_rate": round(100.0 * escalated / self.total, 2) if self.total else None,
+                "escalation_reasons": dict(self.escalations),
+                "gemini_failures": self.gemini_failures
+            }
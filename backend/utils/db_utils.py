@@ -1,7 +1,7 @@
 import sqlite3
 import os
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 DB_PATH = "database/predictions.db"
 
@@ -34,23 +34,47 @@ def init_database():
         )
     """)
     
+    # Added for distillation: which model answered, and Gemini's crop type; for cache warming,
+    # Gemini's description
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(predictions)")]
+    for column in ("source", "crop_type", "description"):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE predictions ADD COLUMN {column} TEXT")
+    
+    # Added for incremental retraining: order in which predictions were verified, and the newest
+    # verification each model version trained on (by verification, not prediction id, so a late
+    # verification of an old prediction is still new data)
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(predictions)")]
+    if "verified_seq" not in columns:
+        cursor.execute("ALTER TABLE predictions ADD COLUMN verified_seq INTEGER")
+        cursor.execute("UPDATE predictions SET verified_seq = id WHERE verified = 1")
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(retraining_history)")]
+    if "last_verified_seq" not in columns:
+        # NULL for earlier runs: they trained on no verified predictions
+        cursor.execute("ALTER TABLE retraining_history ADD COLUMN last_verified_seq INTEGER")
+    
     conn.commit()
     conn.close()
 
-def save_prediction(image_url: str, disease_name: str, confidence: float, timestamp: str):
-    """Save prediction to database"""
+def save_prediction(image_url: str, disease_name: str, confidence: float, timestamp: str,
+                    source: Optional[str] = None, crop_type: Optional[str] = None,
+                    description: Optional[str] = None) -> int:
+    """Save prediction to database; returns its id"""
     init_database()
     
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute("""
-        INSERT INTO predictions (image_url, disease_name, confidence, timestamp)
-        VALUES (?, ?, ?, ?)
-    """, (image_url, disease_name, confidence, timestamp))
+        INSERT INTO predictions (image_url, disease_name, confidence, timestamp, source, crop_type, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (image_url, disease_name, confidence, timestamp, source, crop_type, description))
+    prediction_id = cursor.lastrowid
     
     conn.commit()
     conn.close()
+    
+    return prediction_id
 
 def get_predictions(limit: int = 100):
     """Retrieve predictions from database"""
@@ -65,3 +89,99 @@ def get_predictions(limit: int = 100):
     conn.close()
     
     return results
+
+def get_recent_descriptions(disease_name: str, limit: int = 3) -> List[str]:
+    """Newest distinct descriptions returned with a disease (Gemini detections only)"""
+    init_database()
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT description FROM predictions
+        WHERE disease_name = ? AND description IS NOT NULL AND description != ''
+        GROUP BY description ORDER BY MAX(id) DESC LIMIT ?
+    """, (disease_name, limit))
+    descriptions = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    
+    return descriptions
+
+def verify_prediction(prediction_id: int, corrected_disease: Optional[str] = None) -> bool:
+    """
+    Mark a prediction as verified for retraining
+    
+    Args:
+        prediction_id: Row id returned by save_prediction
+        corrected_disease: The actual disease when the prediction was wrong
+                           (stored in the feedback column; None = prediction confirmed)
+    
+    Returns:
+        bool: False if no such prediction exists
+    """
+    init_database()
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    # Every verification (including a later correction) gets the next sequence number
+    cursor.execute("""
+        UPDATE predictions SET verified = 1, feedback = ?,
+            verified_seq = (SELECT COALESCE(MAX(verified_seq), 0) + 1 FROM predictions)
+        WHERE id = ?
+    """, (corrected_disease, prediction_id))
+    found = cursor.rowcount > 0
+    
+    conn.commit()
+    conn.close()
+    
+    return found
+
+def get_verified_predictions(after_seq: int = 0):
+    """Predictions verified after verification number after_seq, as dicts with the label to train on"""
+    init_database()
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT id, image_url, COALESCE(feedback, disease_name), verified_seq FROM predictions
+        WHERE verified = 1 AND verified_seq > ? ORDER BY verified_seq
+    """, (after_seq,))
+    
+    results = [
+        {"id": row[0], "image_url": row[1], "label": row[2], "verified_seq": row[3]}
+        for row in cursor.fetchall()
+    ]
+    conn.close()
+    
+    return results
+
+def get_last_trained_verified_seq() -> int:
+    """Newest verification included in a model that went live, before the model registry (0 if none)"""
+    init_database()
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT MAX(last_verified_seq) FROM retraining_history")
+    last_seq = cursor.fetchone()[0]
+    conn.close()
+    
+    return last_seq or 0
+
+def save_retraining(model_version: str, accuracy: Optional[float], timestamp: str,
+                    notes: str = "", last_verified_seq: Optional[int] = None):
+    """Record a retraining run (last_verified_seq only when its model went live)"""
+    init_database()
+    
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        INSERT INTO retraining_history (model_version, accuracy, timestamp, notes, last_verified_seq)
+        VALUES (?, ?, ?, ?, ?)
+    """, (model_version, accuracy, timestamp, notes, last_verified_seq))
+    
+    conn.commit()
+    conn.close()
@@ -0,0 +1,233 @@
+"""
+Disease name resolver for pesticide recommendations
+Maps PlantVillage class names ("Tomato___Late_blight") and free-form Gemini
+names ("Corn Fall Armyworm") onto pesticide catalog keys.
+
+All lookup structures are built once per catalog, so resolving a name costs
+a dictionary lookup or one pass over its tokens.
+"""
+
+import json
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+# Map common disease patterns to catalog keys
+DISEASE_ALIASES = {
+    "late_blight": "leaf_blight",
+    "early_blight": "leaf_blight",
+    "leaf_mold": "powdery_mildew",
+    "bacterial_spot": "leaf_spot",
+    "septoria_leaf_spot": "leaf_spot",
+    "target_spot": "leaf_spot",
+    "leaf_scorch": "leaf_spot",
+    "common_rust": "rust",
+    "black_rot": "black_rot",
+    "apple_scab": "leaf_spot",
+    "powdery_mildew": "powdery_mildew",
+    "spider_mites_two-spotted_spider_mite": "leaf_spot",
+    "tomato_yellow_leaf_curl_virus": "mosaic_virus",
+    "tomato_mosaic_virus": "mosaic_virus",
+    "fall_armyworm": "leaf_spot",
+    "armyworm": "leaf_spot",
+    "worm": "leaf_spot",
+    "caterpillar": "leaf_spot",
+    "aphid": "leaf_spot",
+    "whitefly": "leaf_spot"
+}
+
+# Crop names stripped from the start of free-form names ("Tomato Early blight" -> "early_blight")
+CROP_NAMES = [
+    "tomato", "potato", "corn", "maize", "apple", "grape", "pepper", "strawberry",
+    "peach", "cherry", "squash", "raspberry", "blueberry", "orange", "soybean",
+    "bell pepper", "pepper bell", "corn maize", "cherry including sour",
+    "cucumber", "rice", "wheat", "cotton", "chilli", "brinjal", "onion",
+    "sugarcane", "banana", "mango", "groundnut"
+]
+
+# For pests (worm, caterpillar, etc.), use generic leaf_spot treatment
+PEST_KEYWORDS = ["worm", "caterpillar", "aphid", "mite", "fly", "beetle", "borer"]
+PEST_FALLBACK_KEY = "leaf_spot"
+
+# Disease keywords, in priority order
+DISEASE_KEYWORDS = ["blight", "spot", "rust", "mildew", "rot", "scab", "virus", "mosaic"]
+
+# Minimum trigram similarity for a fuzzy alias match, overall and for every word of the name
+# (one shared word is not enough: "bacterial wilt" is not "bacterial spot")
+FUZZY_THRESHOLD = 0.6
+FUZZY_TOKEN_THRESHOLD = 0.4
+
+CLASS_NAMES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "class_names.json")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+def tokenize(name: str) -> List[str]:
+    """Lowercase word tokens; hyphenated words stay whole ("two-spotted")"""
+    return TOKEN_PATTERN.findall(name.lower())
+
+def _trigrams(text: str) -> Counter:
+    padded = f"  {text} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def _similarity(a: Counter, b: Counter) -> float:
+    shared = sum((a & b).values())
+    return shared / (sum(a.values()) + sum(b.values()) - shared)
+
+def _tokens_similar(name: str, candidate: str) -> bool:
+    """Every word of name resembles some word of candidate"""
+    candidate_grams = [_trigrams(token) for token in candidate.split("_")]
+    return all(
+        max(_similarity(_trigrams(token), grams) for grams in candidate_grams) >= FUZZY_TOKEN_THRESHOLD
+        for token in name.split("_")
+    )
+
+class DiseaseResolver:
+    """
+    Resolves disease names to catalog keys, in this order:
+
+    1. direct   - normalized name is a catalog key
+    2. alias    - normalized name is in DISEASE_ALIASES
+    3. pest     - a token contains a pest keyword -> generic pest treatment
+    4. keyword  - a token contains a disease keyword -> first catalog key with it
+    5. fuzzy    - trigram similarity to a catalog key or alias (typos)
+    6. default  - catalog "default" entry
+    """
+
+    def __init__(self, catalog_keys: Iterable[str], class_names: Optional[List[str]] = None):
+        self.catalog_keys = list(catalog_keys)
+        catalog = set(self.catalog_keys)
+
+        # Exact lookup table: normalized name -> (catalog key, reason)
+        self.alias_table = {}
+        for alias, key in DISEASE_ALIASES.items():
+            if key in catalog:
+                self.alias_table[alias] = (key, "alias")
+        for key in self.catalog_keys:
+            self.alias_table[key] = (key, "direct")
+
+        # Token trie over crop names, for longest-prefix stripping
+        self.crop_trie = {}
+        crops = [tokenize(crop) for crop in CROP_NAMES]
+        for class_name in class_names or []:
+            if "___" in class_name:
+                crops.append(tokenize(class_name.split("___")[0]))
+        for crop_tokens in crops:
+            node = self.crop_trie
+            for token in crop_tokens:
+                node = node.setdefault(token, {})
+            node[None] = True
+
+        # Keyword -> first catalog key containing it (catalog order, as before)
+        self.keyword_keys = {}
+        for keyword in DISEASE_KEYWORDS:
+            for key in self.catalog_keys:
+                if keyword in key:
+                    self.keyword_keys[keyword] = key
+                    break
+        self.keyword_priority = {keyword: i for i, keyword in enumerate(DISEASE_KEYWORDS)}
+
+        # Token -> (is_pest, best disease keyword); filled lazily, pre-seeded with the known vocabulary
+        self._token_cache = {}
+        for name in list(self.alias_table) + list(class_names or []):
+            for token in tokenize(name.replace("_", " ")):
+                self._classify_token(token)
+
+        # Trigram inverted index over catalog keys and aliases for fuzzy matching
+        self.fuzzy_grams = {}
+        self.fuzzy_index = defaultdict(set)
+        for name in self.alias_table:
+            grams = _trigrams(name.replace("_", " "))
+            self.fuzzy_grams[name] = grams
+            for gram in grams:
+                self.fuzzy_index[gram].add(name)
+
+        self.default_key = "default" if "default" in catalog else None
+
+    def _classify_token(self, token: str):
+        cached = self._token_cache.get(token)
+        if cached is None:
+            is_pest = any(keyword in token for keyword in PEST_KEYWORDS)
+            matched = [keyword for keyword in DISEASE_KEYWORDS if keyword in token and keyword in self.keyword_keys]
+            cached = (is_pest, matched[0] if matched else None)
+            # Free-form names can carry arbitrary words; keep the cache bounded
+            if len(self._token_cache) < 50000:
+                self._token_cache[token] = cached
+        return cached
+
+    def _strip_crop(self, tokens: List[str]) -> List[str]:
+        node, prefix_len = self.crop_trie, 0
+        for i, token in enumerate(tokens):
+            node = node.get(token)
+            if node is None:
+                break
+            if None in node:
+                prefix_len = i + 1
+        return tokens[prefix_len:]
+
+    def disease_tokens(self, disease_name: str) -> List[str]:
+        """Tokens of the disease part, with the crop removed"""
+        if "___" in disease_name:
+            # PlantVillage format: Crop___Disease
+            return tokenize(disease_name.split("___", 1)[1].replace("_", " "))
+        return self._strip_crop(tokenize(disease_name.replace("_", " ")))
+
+    def _fuzzy_match(self, normalized: str):
+        grams = _trigrams(normalized.replace("_", " "))
+        overlap = Counter()
+        for gram in grams:
+            for name in self.fuzzy_index.get(gram, ()):
+                overlap[name] += 1
+
+        best_name, best_score = None, 0.0
+        total = sum(grams.values())
+        for name, shared in overlap.items():
+            candidate_total = sum(self.fuzzy_grams[name].values())
+            score = shared / (total + candidate_total - shared)
+            if score > best_score:
+                best_name, best_score = name, score
+        return best_name, best_score
+
+    def resolve(self, disease_name: str) -> Dict:
+        """
+        Resolve a disease name to a catalog key
+
+        Returns:
+            dict: {
+                'key': catalog key (None if the catalog has no default),
+                'reason': 'direct' | 'alias' | 'pest' | 'keyword' | 'fuzzy' | 'default',
+                'score': float (0-1),
+                'normalized': normalized disease part
+            }
+        """
+        tokens = self.disease_tokens(disease_name)
+        normalized = "_".join(tokens)
+
+        match = self.alias_table.get(normalized)
+        if match:
+            return {'key': match[0], 'reason': match[1], 'score': 1.0, 'normalized': normalized}
+
+        best_keyword = None
+        for token in tokens:
+            is_pest, keyword = self._classify_token(token)
+            if is_pest and PEST_FALLBACK_KEY in self.alias_table:
+                return {'key': PEST_FALLBACK_KEY, 'reason': 'pest', 'score': 0.6, 'normalized': normalized}
+            if keyword and (best_keyword is None or self.keyword_priority[keyword] < self.keyword_priority[best_keyword]):
+                best_keyword = keyword
+
+        if best_keyword:
+            return {'key': self.keyword_keys[best_keyword], 'reason': 'keyword', 'score': 0.7, 'normalized': normalized}
+
+        if normalized:
+            name, score = self._fuzzy_match(normalized)
+            if name and score >= FUZZY_THRESHOLD and _tokens_similar(normalized, name):
+                return {'key': self.alias_table[name][0], 'reason': 'fuzzy', 'score': round(score, 3), 'normalized': normalized}
+
+        return {'key': self.default_key, 'reason': 'default', 'score': 0.0, 'normalized': normalized}
+
+def load_class_names(path: str = CLASS_NAMES_PATH) -> List[str]:
+    """PlantVillage class names used to seed the crop vocabulary"""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return []
@@ -0,0 +1,245 @@
+"""
+Response schemas and tolerant parsing for Gemini JSON output
+Gemini is asked for JSON with a declared schema (JSON response mode); whatever
+comes back - fenced, followed by chatter, or cut off mid-object - is salvaged
+by parse_json_lenient and validated into typed models
+"""
+
+import json
+import re
+import threading
+from collections import Counter
+from typing import Dict, List
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+# ==================== RESPONSE SCHEMAS ====================
+# OpenAPI-subset schemas passed as GenerationConfig.response_schema
+DIAGNOSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "disease_name": {"type": "STRING"},
+        "confidence": {"type": "NUMBER"},
+        "crop_type": {"type": "STRING"},
+        "severity": {"type": "STRING"},
+        "description": {"type": "STRING"}
+    },
+    "required": ["disease_name", "confidence", "crop_type", "severity", "description"]
+}
+
+RECOMMENDATIONS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "chemical_treatment": {
+            "type": "OBJECT",
+            "properties": {
+                "name": {"type": "STRING"},
+                "active_ingredient": {"type": "STRING"},
+                "description": {"type": "STRING"},
+                "application_steps": {"type": "STRING"},
+                "where_to_buy": {"type": "STRING"},
+                "precautions": {"type": "STRING"}
+            },
+            "required": ["name", "description", "application_steps"]
+        },
+        "organic_treatment": {
+            "type": "OBJECT",
+            "properties": {
+                "name": {"type": "STRING"},
+                "ingredients": {"type": "STRING"},
+                "description": {"type": "STRING"},
+                "application_steps": {"type": "STRING"},
+                "effectiveness": {"type": "STRING"}
+            },
+            "required": ["name", "description", "application_steps"]
+        },
+        "preventive_measures": {"type": "ARRAY", "items": {"type": "STRING"}}
+    },
+    "required": ["chemical_treatment", "organic_treatment", "preventive_measures"]
+}
+
+# ==================== TYPED MODELS ====================
+SEVERITY_LEVELS = {"low": "Low", "medium": "Medium", "high": "High"}
+
+class Diagnosis(BaseModel):
+    disease_name: str = "Unknown"
+    confidence: float = 0.0
+    crop_type: str = "Unknown"
+    severity: str = "Unknown"
+    description: str = "No description available"
+
+    @field_validator("confidence", mode="before")
+    @classmethod
+    def parse_confidence(cls, value):
+        # "85%", "85.5" or 0.855 -> percentage in [0, 100]
+        if isinstance(value, str):
+            value = value.strip().rstrip("%")
+        value = float(value or 0)
+        # The prompt asks for percentages: only clearly fractional values are rescaled (1 means 1%)
+        if 0 < value < 1:
+            value *= 100
+        return min(max(value, 0.0), 100.0)
+
+    @field_validator("severity", mode="before")
+    @classmethod
+    def parse_severity(cls, value):
+        return SEVERITY_LEVELS.get(str(value or "").strip().lower(), "Unknown")
+
+    @field_validator("disease_name", "crop_type", "description", mode="before")
+    @classmethod
+    def strip_text(cls, value):
+        return str(value).strip() if value is not None else value
+
+class ChemicalTreatment(BaseModel):
+    name: str = ""
+    active_ingredient: str = ""
+    description: str = ""
+    application_steps: str = ""
+    where_to_buy: str = ""
+    precautions: str = ""
+
+class OrganicTreatment(BaseModel):
+    name: str = ""
+    ingredients: str = ""
+    description: str = ""
+    application_steps: str = ""
+    effectiveness: str = ""
+
+class Recommendations(BaseModel):
+    chemical_treatment: ChemicalTreatment
+    organic_treatment: OrganicTreatment
+    preventive_measures: List[str] = []
+
+# ==================== TOLERANT PARSER ====================
+class GeminiParseError(ValueError):
+    """Raised when no JSON object can be recovered from a response"""
+
+FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+_decoder = json.JSONDecoder()
+
+# clean: valid JSON as-is, salvaged: needed repair, failed: nothing recoverable
+parse_stats = Counter()
+_stats_lock = threading.Lock()
+
+def _count(outcome: str):
+    with _stats_lock:
+        parse_stats[outcome] += 1
+
+def _close_truncated(text: str) -> List[str]:
+    """
+    Candidate completions of a JSON object cut off mid-way, best first
+
+    Walks the text once, remembering the last point where a value inside a
+    container was complete, and which brackets were open there
+    """
+    stack = []      # [bracket, state]; objects go key -> colon -> value -> comma
+    cut = None      # (position, closing brackets) after the last complete value
+    in_string = escaped = string_is_value = False
+    scalar = False  # inside a number / true / false / null
+
+    def closers():
+        return "".join("}" if bracket == "{" else "]" for bracket, _ in reversed(stack))
+
+    def value_done(pos):
+        nonlocal cut
+        if stack:
+            stack[-1][1] = "comma"
+            cut = (pos, closers())
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                if string_is_value:
+                    value_done(i + 1)
+                elif stack:
+                    stack[-1][1] = "colon"
+            continue
+
+        if scalar and char in ",}] \t\r\n":
+            scalar = False
+            value_done(i)
+
+        if char == '"':
+            in_string = True
+            string_is_value = not stack or stack[-1][1] != "key"
+        elif char in "{[":
+            stack.append([char, "key" if char == "{" else "value"])
+        elif char in "}]":
+            if not stack:
+                break
+            stack.pop()
+            value_done(i + 1)
+            if not stack:
+                break
+        elif char == ":":
+            if stack:
+                stack[-1][1] = "value"
+        elif char == ",":
+            if stack:
+                stack[-1][1] = "key" if stack[-1][0] == "{" else "value"
+        elif not char.isspace():
+            scalar = True
+
+    candidates = []
+    if in_string and string_is_value and stack:
+        # Cut off inside a string value: keep what was written and close it
+        partial = text[:len(text) - 1] if escaped else text
+        candidates.append(partial + '"' + closers())
+    if cut:
+        candidates.append(text[:cut[0]] + cut[1])
+    return candidates
+
+def parse_json_lenient(text: str) -> Dict:
+    """
+    Parse the first JSON object in a model response
+
+    Handles markdown fences, text before/after the object, trailing commas
+    and responses truncated mid-object (complete fields are kept)
+
+    Raises:
+        GeminiParseError: if no object can be recovered
+    """
+    text = (text or "").strip()
+    fenced = FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+
+    start = text.find("{")
+    if start < 0:
+        _count("failed")
+        raise GeminiParseError("No JSON object in response")
+    text = text[start:]
+
+    try:
+        result, _ = _decoder.raw_decode(text)
+        _count("clean")
+        return result
+    except json.JSONDecodeError:
+        pass
+
+    for candidate in [TRAILING_COMMA.sub(r"\1", text)] + _close_truncated(text):
+        try:
+            result, _ = _decoder.raw_decode(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(result, dict) and result:
+            _count("salvaged")
+            return result
+
+    _count("failed")
+    raise GeminiParseError("Unable to recover JSON object from response")
+
+def parse_model(text: str, model: type) -> BaseModel:
+    """Tolerant parse + validation into a pydantic model"""
+    try:
+        return model.model_validate(parse_json_lenient(text))
+    except ValidationError as e:
+        _count("invalid")
+        raise GeminiParseError(str(e)) from e
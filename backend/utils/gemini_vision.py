@@ -4,57 +4,217 @@ High-quality AI-powered disease identification
 """
 
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 import os
-import json
+import time
+import random
+import itertools
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from typing import Dict, Optional
 import requests
-from PIL import Image
+from PIL import Image, ImageOps
 from io import BytesIO
+from utils.gemini_schema import (
+    DIAGNOSIS_SCHEMA, RECOMMENDATIONS_SCHEMA, Diagnosis, Recommendations,
+    GeminiParseError, parse_model
+)
 
 # Configure Gemini API
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 
-if GEMINI_API_KEY:
+# Point at a local stand-in (benchmarks/gemini_replay_server.py) instead of Google
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")
+
+if GEMINI_API_KEY and GEMINI_API_ENDPOINT:
+    genai.configure(api_key=GEMINI_API_KEY, transport="rest",
+                    client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+elif GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
 # Initialize model
 MODEL_NAME = "gemini-2.0-flash"  # Latest stable multimodal model
 
-def analyze_plant_disease(image_url: str) -> Dict:
+# Gateway limits - match GEMINI_RPM to the project's quota
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "15"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", "60"))
+# The token bucket refills at GEMINI_RPM: zero would block every call forever
+if GEMINI_RPM <= 0:
+    raise ValueError(f"GEMINI_RPM must be positive (got {GEMINI_RPM})")
+
+# Lower number = served first
+PRIORITY_DETECTION = 0       # farmer is waiting on the diagnosis
+PRIORITY_RECOMMENDATIONS = 1
+PRIORITY_BACKGROUND = 2
+
+# Pre-upload image transform (see benchmarks/bench_gemini_image_size.py for picking these)
+GEMINI_IMAGE_MAX_SIDE = int(os.getenv("GEMINI_IMAGE_MAX_SIDE", "1024"))
+GEMINI_IMAGE_FORMAT = os.getenv("GEMINI_IMAGE_FORMAT", "JPEG")
+GEMINI_IMAGE_QUALITY = int(os.getenv("GEMINI_IMAGE_QUALITY", "85"))
+
+# Quota and transient server errors are retried with backoff; anything else fails fast
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,   # 429
+    google_exceptions.InternalServerError,  # 500
+    google_exceptions.ServiceUnavailable,   # 503
+    google_exceptions.DeadlineExceeded      # 504
+)
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Shared GenerativeModel handle, created on first use"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                print(f"🤖 Initializing Gemini model: {MODEL_NAME}")
+                _model = genai.GenerativeModel(MODEL_NAME)
+    return _model
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity` saved up"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class GeminiGateway:
     """
-    Analyze plant image for disease detection using Gemini Vision
-    
-    Args:
-        image_url: URL of the plant image
+    Single entry point for Gemini calls
     
-    Returns:
-        dict: {
-            'disease_name': str,
-            'confidence': float,
-            'crop_type': str,
-            'severity': str,
-            'description': str
-        }
+    - priority queue drained by GEMINI_MAX_CONCURRENCY worker threads (the concurrency bound)
+    - token bucket so requests leave at the quota rate instead of bouncing off it
+    - identical in-flight requests (same key) share one upstream call
+    - 429/5xx retried with jittered exponential backoff
+    - a request whose callers all timed out is cancelled, if no worker has picked it up yet
     """
     
-    if not GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY not configured in environment variables")
+    def __init__(self, max_concurrency: int = GEMINI_MAX_CONCURRENCY, rpm: float = GEMINI_RPM,
+                 max_retries: int = GEMINI_MAX_RETRIES):
+        if rpm <= 0:
+            raise ValueError(f"Gemini rate limit must be positive (got {rpm} requests/minute)")
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate=rpm / 60.0, capacity=max(1.0, min(rpm / 60.0 * 10, max_concurrency)))
+        self.queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._inflight = {}
+        self._waiters = {}
+        # Reentrant: cancelling a future runs its _forget callback on the same thread
+        self._lock = threading.RLock()
+        self._workers_started = False
+        self._start_lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "failures": 0}
     
-    try:
-        # Download image
-        print(f"📥 Downloading image from: {image_url}")
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        img = Image.open(BytesIO(response.content))
-        print(f"✅ Image loaded successfully")
+    def _ensure_workers(self):
+        if self._workers_started:
+            return
+        with self._start_lock:
+            if not self._workers_started:
+                for i in range(self.max_concurrency):
+                    threading.Thread(target=self._worker, name=f"gemini-{i}", daemon=True).start()
+                self._workers_started = True
+    
+    def call(self, fn, *args, priority: int = PRIORITY_DETECTION, key=None,
+             timeout: float = GEMINI_QUEUE_TIMEOUT, **kwargs):
+        """
+        Run fn(*args, **kwargs) through the gateway and return its result
+        Raises the last error if every attempt failed, or TimeoutError after `timeout` seconds
+        """
+        self._ensure_workers()
         
-        # Create model instance
-        print(f"🤖 Initializing Gemini model: {MODEL_NAME}")
-        model = genai.GenerativeModel(MODEL_NAME)
-        print(f"✅ Model initialized")
+        with self._lock:
+            future = self._inflight.get(key) if key is not None else None
+            if future is not None:
+                self.stats["coalesced"] += 1
+                self._waiters[future] += 1
+            else:
+                future = Future()
+                self._waiters[future] = 1
+                if key is not None:
+                    self._inflight[key] = future
+                future.add_done_callback(lambda _: self._forget(key, future))
+                self.queue.put((priority, next(self._sequence), future, fn, args, kwargs))
         
-        # Craft detailed prompt for plant disease detection
-        prompt = """You are an agricultural advisor helping Indian farmers. Analyze this plant image and provide a simple disease diagnosis.
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                if future in self._waiters:
+                    self._waiters[future] -= 1
+                    # Nobody is waiting any more: drop it unless a worker already started it
+                    if self._waiters[future] == 0:
+                        future.cancel()
+            raise
+    
+    def _forget(self, key, future):
+        with self._lock:
+            self._waiters.pop(future, None)
+            if key is not None and self._inflight.get(key) is future:
+                del self._inflight[key]
+    
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+    
+    def snapshot(self) -> Dict:
+        """Consistent copy of the call counters"""
+        with self._lock:
+            return dict(self.stats)
+    
+    def _worker(self):
+        while True:
+            _, _, future, fn, args, kwargs = self.queue.get()
+            # Cancelled while queued (every caller timed out): skip the upstream call
+            if not future.set_running_or_notify_cancel():
+                continue
+            
+            for attempt in range(self.max_retries + 1):
+                self.bucket.acquire()
+                self._count("calls")
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                    break
+                except RETRYABLE_ERRORS as e:
+                    if attempt == self.max_retries:
+                        self._count("failures")
+                        future.set_exception(e)
+                        break
+                    self._count("retries")
+                    # Full jitter: spread retries so bursts don't re-synchronize
+                    backoff = random.uniform(0, min(30.0, 1.0 * 2 ** attempt))
+                    print(f"⚠️ Gemini {type(e).__name__}, retrying in {backoff:.1f}s")
+                    time.sleep(backoff)
+                except Exception as e:
+                    self._count("failures")
+                    future.set_exception(e)
+                    break
+
+gemini_gateway = GeminiGateway()
+
+# Detailed prompt for plant disease detection
+DIAGNOSIS_PROMPT = """You are an agricultural advisor helping Indian farmers. Analyze this plant image and provide a simple disease diagnosis.
 
 IMPORTANT: Use SIMPLE language that a farmer with basic education can understand. Avoid technical/scientific terms.
 
@@ -79,41 +239,61 @@ Example descriptions:
 - GOOD: "Your plant has a fungus disease. Brown dead spots appear on leaves. Leaves will fall if not treated."
 
 Provide ONLY the JSON response."""
-        
-        # Generate response
-        response = model.generate_content([prompt, img])
-        
-        # Parse response
-        result_text = response.text.strip()
-        
-        # Remove markdown code blocks if present
-        if result_text.startswith("```json"):
-            result_text = result_text.replace("```json", "").replace("```", "").strip()
-        elif result_text.startswith("```"):
-            result_text = result_text.replace("```", "").strip()
-        
-        # Parse JSON
-        result = json.loads(result_text)
-        
-        # Validate and format response
-        disease_name = result.get('disease_name', 'Unknown')
-        confidence = float(result.get('confidence', 0))
-        
-        return {
-            'disease_name': disease_name,
-            'confidence': round(confidence, 2),
-            'crop_type': result.get('crop_type', 'Unknown'),
-            'severity': result.get('severity', 'Unknown'),
-            'description': result.get('description', 'No description available'),
-            'source': 'gemini_vision'
-        }
-        
-    except json.JSONDecodeError as e:
-        # Fallback parsing if JSON fails
+
+def prepare_image(img: Image.Image, max_side: int = GEMINI_IMAGE_MAX_SIDE,
+                  image_format: str = GEMINI_IMAGE_FORMAT, quality: int = GEMINI_IMAGE_QUALITY) -> Dict:
+    """
+    Downscale and re-encode an image for upload to Gemini
+    
+    Args:
+        img: PIL image (any size/mode)
+        max_side: Longest side in pixels after resizing (0 keeps the original size)
+        image_format: "JPEG" or "WEBP"
+        quality: Encoder quality (1-100)
+    
+    Returns:
+        dict: Inline image part {'mime_type': str, 'data': bytes} - EXIF and other metadata stripped
+    """
+    # Bake in the camera orientation before the EXIF that carries it is dropped
+    img = ImageOps.exif_transpose(img).convert('RGB')
+    
+    if max_side and max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+    
+    buffer = BytesIO()
+    image_format = image_format.upper()
+    if image_format == "WEBP":
+        img.save(buffer, format="WEBP", quality=quality, method=4)
+    else:
+        image_format = "JPEG"
+        img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    
+    return {
+        'mime_type': f"image/{image_format.lower()}",
+        'data': buffer.getvalue()
+    }
+
+# JSON response mode: Gemini returns bare JSON matching the declared schema
+DIAGNOSIS_CONFIG = genai.GenerationConfig(
+    response_mime_type="application/json",
+    response_schema=DIAGNOSIS_SCHEMA
+)
+RECOMMENDATIONS_CONFIG = genai.GenerationConfig(
+    response_mime_type="application/json",
+    response_schema=RECOMMENDATIONS_SCHEMA
+)
+
+def parse_diagnosis(result_text: str) -> Dict:
+    """
+    Parse Gemini's diagnosis JSON into the prediction result format
+    Truncated or wrapped JSON is salvaged; only an unrecoverable response
+    becomes 'Analysis_Failed'
+    """
+    try:
+        diagnosis = parse_model(result_text, Diagnosis)
+    except GeminiParseError as e:
         print(f"JSON parsing error: {e}")
         print(f"Raw response: {result_text}")
-        
-        # Try to extract information from text
         return {
             'disease_name': 'Analysis_Failed',
             'confidence': 0.0,
@@ -123,6 +303,75 @@ Provide ONLY the JSON response."""
             'source': 'gemini_vision',
             'raw_response': result_text
         }
+    
+    return {
+        **diagnosis.model_dump(),
+        'confidence': round(diagnosis.confidence, 2),
+        'source': 'gemini_vision'
+    }
+
+def analyze_plant_disease(image_url: str) -> Dict:
+    """
+    Analyze plant image for disease detection using Gemini Vision
+    
+    Args:
+        image_url: URL of the plant image
+    
+    Returns:
+        dict: {
+            'disease_name': str,
+            'confidence': float,
+            'crop_type': str,
+            'severity': str,
+            'description': str
+        }
+    """
+    
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY not configured in environment variables")
+    
+    try:
+        # Download image
+        print(f"📥 Downloading image from: {image_url}")
+        response = requests.get(image_url, timeout=10)
+        response.raise_for_status()
+        img = Image.open(BytesIO(response.content))
+        print(f"✅ Image loaded successfully")
+    except Exception as e:
+        print(f"Gemini Vision error: {e}")
+        raise Exception(f"Failed to analyze image with Gemini: {str(e)}")
+    
+    return analyze_plant_image(img, image_url)
+
+def analyze_plant_image(img: Image.Image, image_url: Optional[str] = None) -> Dict:
+    """
+    Analyze an already-loaded plant image with Gemini Vision
+    
+    Args:
+        img: PIL image
+        image_url: Source URL, used to coalesce duplicate submissions (optional)
+    
+    Returns:
+        dict: Same format as analyze_plant_disease
+    """
+    
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY not configured in environment variables")
+    
+    try:
+        # Shrink and re-encode before upload - phone photos are often 12 MP
+        image_part = prepare_image(img)
+        
+        # Generate response (duplicate submissions of the same image share one call)
+        response = gemini_gateway.call(
+            get_model().generate_content, [DIAGNOSIS_PROMPT, image_part],
+            generation_config=DIAGNOSIS_CONFIG,
+            priority=PRIORITY_DETECTION,
+            key=("analyze", image_url) if image_url else None
+        )
+        
+        # Parse response
+        return parse_diagnosis(response.text)
         
     except Exception as e:
         print(f"Gemini Vision error: {e}")
@@ -144,8 +393,6 @@ def get_detailed_recommendations(disease_name: str, crop_type: str) -> Dict:
         return None
     
     try:
-        model = genai.GenerativeModel(MODEL_NAME)
-        
         prompt = f"""You are helping an Indian farmer treat their crop disease. Use SIMPLE language that a farmer with basic education can understand.
 
 Disease: {disease_name}
@@ -184,17 +431,15 @@ IMPORTANT:
 - Write like you're talking to a farmer friend
 - Use Hindi-English mix if helpful (e.g., "pani" for water, "dawai" for medicine)"""
         
-        response = model.generate_content(prompt)
-        result_text = response.text.strip()
-        
-        # Clean markdown
-        if "```json" in result_text:
-            result_text = result_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in result_text:
-            result_text = result_text.split("```")[1].split("```")[0].strip()
+        response = gemini_gateway.call(
+            get_model().generate_content, prompt,
+            generation_config=RECOMMENDATIONS_CONFIG,
+            priority=PRIORITY_RECOMMENDATIONS,
+            key=("recommendations", disease_name, crop_type)
+        )
         
-        recommendations = json.loads(result_text)
-        return recommendations
+        recommendations = parse_model(response.text, Recommendations)
+        return recommendations.model_dump()
         
     except Exception as e:
         print(f"Error getting recommendations: {e}")
@@ -0,0 +1,51 @@
+"""
+Local stand-ins for the Google Cloud Translation and Text-to-Speech clients
+Enabled with GOOGLE_CLOUD_FAKE=1 so tests and dev boxes run without credentials or network
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+
+# Simulated upstream latency in seconds
+FAKE_LATENCY = float(os.getenv("GOOGLE_CLOUD_FAKE_LATENCY", "0.05"))
+
+class FakeTranslateClient:
+    """Mimics google.cloud.translate_v2.Client.translate()"""
+
+    def __init__(self, latency: float = FAKE_LATENCY):
+        self.latency = latency
+        self.calls = 0
+
+    def translate(self, values, target_language=None, source_language=None, **kwargs):
+        time.sleep(self.latency)
+        self.calls += 1
+        return {
+            'translatedText': f"[{target_language}] {values}",
+            'detectedSourceLanguage': source_language or 'en',
+            'input': values
+        }
+
+class FakeSynthesizeSpeechResponse:
+    def __init__(self, audio_content: bytes):
+        self.audio_content = audio_content
+
+class FakeTextToSpeechAsyncClient:
+    """Mimics texttospeech.TextToSpeechAsyncClient.synthesize_speech()"""
+
+    def __init__(self, latency: float = FAKE_LATENCY):
+        self.latency = latency
+        self.calls = 0
+        # Real clients are closed through their transport
+        self.transport = self
+
+    async def synthesize_speech(self, input=None, voice=None, audio_config=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        self.calls += 1
+        # Deterministic bytes so cached and fresh chunks compare equal
+        digest = hashlib.sha256(f"{voice.language_code}:{input.text}".encode('utf-8')).digest()
+        return FakeSynthesizeSpeechResponse(b"FAKE-MP3" + digest)
+
+    async def close(self):
+        pass
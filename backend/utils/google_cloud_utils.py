@@ -4,24 +4,61 @@ High-quality translation and voice synthesis for Indian languages
 """
 
 import os
+import threading
+from collections import OrderedDict
 from google.cloud import translate_v2 as translate
 from google.cloud import texttospeech
 import base64
 
-# Initialize clients
+# Clients are created inside the app lifespan (see init_google_cloud)
+# translate_v2 has no async client, so its calls run on a worker thread;
+# TTS uses the async gRPC client, shared by every request
 translate_client = None
 tts_client = None
 
-def init_google_cloud():
-    """Initialize Google Cloud clients"""
+# Use in-process fakes instead of Google Cloud (tests / offline dev)
+USE_FAKE_CLIENTS = os.getenv("GOOGLE_CLOUD_FAKE", "").lower() in ("1", "true", "yes")
+
+# Map language codes to proper Google Cloud TTS codes
+TTS_LANGUAGE_MAP = {
+    'en': 'en-IN',
+    'hi': 'hi-IN',
+    'mr': 'mr-IN',
+    'gu': 'gu-IN',
+    'ta': 'ta-IN',
+    'te': 'te-IN',
+    'kn': 'kn-IN',
+    'bn': 'bn-IN',
+    'pa': 'pa-IN',
+    'ml': 'ml-IN'
+}
+
+# Synthesized audio cache, keyed by (language, gender, text)
+# Sentence-level chunks repeat across diseases, so even a small cache gets reused a lot
+TTS_CACHE_MAX_ENTRIES = int(os.getenv("TTS_CACHE_MAX_ENTRIES", "1024"))
+_tts_cache = OrderedDict()
+_tts_cache_lock = threading.Lock()
+
+async def init_google_cloud():
+    """
+    Initialize Google Cloud clients
+    Must run inside the event loop (app lifespan): the async TTS client binds its gRPC channel to it
+    """
     global translate_client, tts_client
     
+    if USE_FAKE_CLIENTS:
+        from utils.google_cloud_fakes import FakeTranslateClient, FakeTextToSpeechAsyncClient
+        translate_client = FakeTranslateClient()
+        tts_client = FakeTextToSpeechAsyncClient()
+        print("🧪 Using fake Google Cloud clients (GOOGLE_CLOUD_FAKE)")
+        return True
+    
     credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
     
     if credentials_path and os.path.exists(credentials_path):
         try:
             translate_client = translate.Client()
-            tts_client = texttospeech.TextToSpeechClient()
+            tts_client = texttospeech.TextToSpeechAsyncClient()
             print("✅ Google Cloud services initialized successfully")
             return True
         except Exception as e:
@@ -31,8 +68,18 @@ def init_google_cloud():
         print("⚠️ Google Cloud credentials not found. Translation and TTS features will be limited.")
         return False
 
-# Initialize on module load
-init_google_cloud()
+async def close_google_cloud():
+    """Close the shared clients on app shutdown"""
+    global translate_client, tts_client
+    
+    if tts_client is not None:
+        try:
+            await tts_client.transport.close()
+        except Exception as e:
+            print(f"⚠️ Error closing TTS client: {e}")
+    
+    translate_client = None
+    tts_client = None
 
 def translate_text(text: str, target_language: str, source_language: str = 'en') -> dict:
     """
@@ -82,7 +129,7 @@ def translate_text(text: str, target_language: str, source_language: str = 'en')
             'error': str(e)
         }
 
-def text_to_speech(text: str, language_code: str = 'en-IN', voice_gender: str = 'NEUTRAL') -> dict:
+async def text_to_speech(text: str, language_code: str = 'en-IN', voice_gender: str = 'NEUTRAL') -> dict:
     """
     Convert text to speech using Google Cloud Text-to-Speech API
     
@@ -103,27 +150,20 @@ def text_to_speech(text: str, language_code: str = 'en-IN', voice_gender: str =
             'error': 'Text-to-Speech service not available'
         }
     
+    # Get proper language code
+    lang_code = TTS_LANGUAGE_MAP.get(language_code.split('-')[0], 'en-IN')
+    
+    cache_key = (lang_code, voice_gender, text)
+    with _tts_cache_lock:
+        cached = _tts_cache.get(cache_key)
+        if cached is not None:
+            _tts_cache.move_to_end(cache_key)
+            return dict(cached)
+    
     try:
         # Set the text input
         synthesis_input = texttospeech.SynthesisInput(text=text)
         
-        # Map language codes to proper Google Cloud TTS codes
-        language_map = {
-            'en': 'en-IN',
-            'hi': 'hi-IN',
-            'mr': 'mr-IN',
-            'gu': 'gu-IN',
-            'ta': 'ta-IN',
-            'te': 'te-IN',
-            'kn': 'kn-IN',
-            'bn': 'bn-IN',
-            'pa': 'pa-IN',
-            'ml': 'ml-IN'
-        }
-        
-        # Get proper language code
-        lang_code = language_map.get(language_code.split('-')[0], 'en-IN')
-        
         # Build the voice request
         voice = texttospeech.VoiceSelectionParams(
             language_code=lang_code,
@@ -138,7 +178,7 @@ def text_to_speech(text: str, language_code: str = 'en-IN', voice_gender: str =
         )
         
         # Perform the text-to-speech request
-        response = tts_client.synthesize_speech(
+        response = await tts_client.synthesize_speech(
             input=synthesis_input,
             voice=voice,
             audio_config=audio_config
@@ -147,11 +187,18 @@ def text_to_speech(text: str, language_code: str = 'en-IN', voice_gender: str =
         # Encode audio content to base64
         audio_base64 = base64.b64encode(response.audio_content).decode('utf-8')
         
-        return {
+        result = {
             'audio_content': audio_base64,
             'language_code': lang_code,
             'format': 'mp3'
         }
+        
+        with _tts_cache_lock:
+            _tts_cache[cache_key] = result
+            while len(_tts_cache) > TTS_CACHE_MAX_ENTRIES:
+                _tts_cache.popitem(last=False)
+        
+        return dict(result)
     
     except Exception as e:
         print(f"TTS error: {e}")
@@ -0,0 +1,282 @@
+"""
+Retraining job runner
+Runs one retraining job at a time in a separate worker process, so CPU-bound
+YOLO training never shares the serving process's cores, GIL or event loop.
+The worker is a fresh interpreter running utils/retrain_worker.py, started with
+its thread caps in the environment: it never imports the server or its models.
+
+The jobs file is the single source of truth, shared by every server process
+(e.g. gunicorn workers) and the training worker: all of them read and update it
+under an OS file lock. The worker writes its own per-epoch progress and result
+and polls its record for cancel requests, so any server process can report on
+or cancel a job. A job whose worker PID is gone without a result is marked failed.
+"""
+
+import atexit
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# Worker CPU budget: intra-op threads (0 = half the cores) and scheduling priority
+RETRAIN_THREADS = int(os.getenv("RETRAIN_THREADS", "0"))
+RETRAIN_NICE = int(os.getenv("RETRAIN_NICE", "10"))
+# Seconds a cancelled job gets to stop at the next batch before the worker is killed
+RETRAIN_CANCEL_GRACE = float(os.getenv("RETRAIN_CANCEL_GRACE", "30"))
+
+# Seconds between the worker's checks of its job record for a cancel request
+RETRAIN_CANCEL_POLL = 2.0
+
+JOBS_FILE = "models/retrain_jobs.json"
+LOCK_FILE = "models/retrain.lock"  # Guards JOBS_FILE across processes
+MAX_JOBS_KEPT = 50
+
+FINISHED_STATES = ("completed", "failed", "cancelled")
+WORKER_EXITED = "Worker process exited without a result"
+
+class JobConflict(RuntimeError):
+    """Another retraining job is already running"""
+
+class JobCancelled(Exception):
+    """Raised inside the worker to abort training"""
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def default_threads() -> int:
+    return RETRAIN_THREADS or max(1, (os.cpu_count() or 2) // 2)
+
+def _worker_env(threads: int) -> Dict[str, str]:
+    """Thread pool caps must be in the environment before torch loads, so set them at process start"""
+    env = dict(os.environ)
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        env[var] = str(threads)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")]))
+    return env
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive OS-level lock held for the block (released automatically if this process dies)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(path, os.O_CREAT | os.O_RDWR)
+    try:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _terminate(pid: int):
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except OSError:
+        pass
+
+class JobStore:
+    """The shared jobs file; every read and write holds lock_file"""
+
+    def __init__(self, jobs_file: str = JOBS_FILE, lock_file: str = LOCK_FILE):
+        self.jobs_file = jobs_file
+        self.lock_file = lock_file
+
+    def _read(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.jobs_file):
+            return {}
+        try:
+            with open(self.jobs_file, "r") as f:
+                return {job["job_id"]: job for job in json.load(f)}
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _write(self, jobs: Dict[str, Dict]):
+        kept = sorted(jobs.values(), key=lambda job: job["created_at"])[-MAX_JOBS_KEPT:]
+        os.makedirs(os.path.dirname(self.jobs_file) or ".", exist_ok=True)
+        tmp_path = f"{self.jobs_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(kept, f, indent=2)
+        os.replace(tmp_path, self.jobs_file)
+
+    @staticmethod
+    def _reap(jobs: Dict[str, Dict]):
+        """Finish active jobs whose worker process is gone without having reported a result"""
+        for job in jobs.values():
+            if job["status"] in FINISHED_STATES or _pid_alive(job.get("pid")):
+                continue
+            if job["status"] == "cancelling":
+                job["status"] = "cancelled"
+            else:
+                job.update(status="failed", error=WORKER_EXITED)
+            job["finished_at"] = datetime.now().isoformat()
+
+    @contextmanager
+    def transaction(self):
+        """Locked read-modify-write of all jobs (stale ones already reaped); written back unless the block raises"""
+        with _file_lock(self.lock_file):
+            jobs = self._read()
+            before = json.dumps(jobs, sort_keys=True)
+            self._reap(jobs)
+            yield jobs
+            if json.dumps(jobs, sort_keys=True) != before:
+                self._write(jobs)
+
+    def jobs(self) -> Dict[str, Dict]:
+        with self.transaction() as jobs:
+            return jobs
+
+    def update(self, job_id: str, **fields):
+        with self.transaction() as jobs:
+            if job_id in jobs:
+                jobs[job_id].update(fields)
+
+    def finish(self, job_id: str, status: str, **fields):
+        self.update(job_id, status=status, finished_at=datetime.now().isoformat(), **fields)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with _file_lock(self.lock_file):
+            job = self._read().get(job_id)
+        return job is not None and job["status"] == "cancelling"
+
+def _active(jobs: Dict[str, Dict]) -> Optional[Dict]:
+    return next((job for job in jobs.values() if job["status"] not in FINISHED_STATES), None)
+
+class JobRunner:
+    def __init__(self, jobs_file: str = JOBS_FILE, lock_file: str = LOCK_FILE):
+        self.store = JobStore(os.path.abspath(jobs_file), os.path.abspath(lock_file))
+        self._lock = threading.Lock()
+        self._process = None  # Worker started by this server process (it reaps it)
+        atexit.register(self.shutdown)
+
+    def submit(self, kind: str, target: Callable, **kwargs) -> Dict:
+        """
+        Start a job in a new worker process
+
+        Args:
+            kind: Label for status output (e.g. "incremental", "full")
+            target: Module-level function run in the worker as target(callbacks=..., **kwargs);
+                    callbacks are ultralytics {event: fn(trainer)} for progress and cancellation.
+                    The worker imports it by name; kwargs must be JSON-serializable.
+
+        Raises:
+            JobConflict: If a job is already running (in this or another server process)
+        """
+        # Checked and recorded under the file lock: two server processes can't both start one
+        with self.store.transaction() as jobs:
+            active = _active(jobs)
+            if active is not None:
+                raise JobConflict(f"Retraining job {active['job_id']} is already running")
+
+            job_id = uuid.uuid4().hex[:12]
+            threads = default_threads()
+            # The worker reads target and kwargs from its record once this transaction commits
+            process = subprocess.Popen(
+                [sys.executable, "-m", "utils.retrain_worker", job_id, self.store.jobs_file, self.store.lock_file],
+                env=_worker_env(threads)
+            )
+
+            job = {
+                "job_id": job_id,
+                "kind": kind,
+                "status": "running",
+                "created_at": datetime.now().isoformat(),
+                "finished_at": None,
+                "pid": process.pid,
+                "target": f"{target.__module__}:{target.__qualname__}",
+                "kwargs": kwargs,
+                "epoch": 0,
+                "epochs": None,
+                "metrics": {},
+                "threads": threads,
+                "result": None,
+                "error": None
+            }
+            jobs[job_id] = job
+
+        with self._lock:
+            self._process = process
+        threading.Thread(target=self._monitor, args=(job_id, process), name=f"retrain-monitor-{job_id}",
+                         daemon=True).start()
+        print(f"🛠️  Retraining job {job_id} ({kind}) started in process {process.pid} with {threads} threads")
+        return dict(job)
+
+    def _monitor(self, job_id: str, process):
+        """Reap the worker; if it died without writing a result, record how it exited"""
+        process.wait()
+        with self.store.transaction() as jobs:
+            job = jobs.get(job_id)
+            if job is not None and job["error"] == WORKER_EXITED:
+                job["error"] = f"{WORKER_EXITED} (exit code {process.returncode})"
+        with self._lock:
+            if self._process is process:
+                self._process = None
+        print(f"🛠️  Retraining job {job_id} {job['status'] if job else 'finished'}")
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a running job to stop; the worker is killed if it doesn't within RETRAIN_CANCEL_GRACE"""
+        with self.store.transaction() as jobs:
+            job = jobs.get(job_id)
+            if job is None or job["status"] in FINISHED_STATES:
+                return False
+            job["status"] = "cancelling"
+            pid = job["pid"]
+
+        def kill_if_stuck():
+            time.sleep(RETRAIN_CANCEL_GRACE)
+            with self.store.transaction() as jobs:
+                job = jobs.get(job_id)
+                if job is not None and job["status"] not in FINISHED_STATES and job["pid"] == pid:
+                    _terminate(pid)
+
+        threading.Thread(target=kill_if_stuck, name=f"retrain-cancel-{job_id}", daemon=True).start()
+        return True
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.jobs().get(job_id)
+
+    def current(self) -> Optional[Dict]:
+        return _active(self.store.jobs())
+
+    def recent(self, limit: int = 10) -> List[Dict]:
+        jobs = sorted(self.store.jobs().values(), key=lambda job: job["created_at"], reverse=True)
+        return jobs[:limit]
+
+    def shutdown(self):
+        """Stop a worker this server process started when the server exits"""
+        with self._lock:
+            process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(5)
+            except subprocess.TimeoutExpired:
+                process.kill()
@@ -0,0 +1,151 @@
+"""
+Versioned model registry
+Every trained model is stored once under models/registry/<kind>/<version>/
+with its metadata. Which version serves, and which is under canary
+evaluation, is a pointer file swapped atomically with os.replace (works on
+Windows, unlike symlinks), so other processes see either the old or the new
+version, never a half-copied weights file.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, List, Optional
+
+REGISTRY_ROOT = "models/registry"
+META_FILE = "meta.json"
+CURRENT_POINTER = "CURRENT"
+CANARY_POINTER = "CANARY"
+
+def _write_atomic(path: str, text: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+class ModelRegistry:
+    def __init__(self, kind: str, root: str = REGISTRY_ROOT, legacy_path: Optional[str] = None):
+        """
+        Args:
+            kind: Model family, e.g. "yolo" (one pointer pair per kind)
+            root: Registry directory
+            legacy_path: Weights to serve while nothing has been promoted (e.g. models/best.pt)
+        """
+        self.kind = kind
+        self.dir = os.path.join(root, kind)
+        self.legacy_path = legacy_path
+        os.makedirs(self.dir, exist_ok=True)
+
+    # ----- pointers -----
+
+    def _read_pointer(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.dir, name), "r") as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version if version and os.path.isdir(os.path.join(self.dir, version)) else None
+
+    def _write_pointer(self, name: str, version: Optional[str]):
+        path = os.path.join(self.dir, name)
+        if version is None:
+            if os.path.exists(path):
+                os.remove(path)
+        else:
+            _write_atomic(path, version)
+
+    def current(self) -> Optional[str]:
+        return self._read_pointer(CURRENT_POINTER)
+
+    def canary(self) -> Optional[str]:
+        return self._read_pointer(CANARY_POINTER)
+
+    # ----- versions -----
+
+    def weights_path(self, version: str) -> str:
+        return os.path.join(self.dir, version, self.meta(version)["weights"])
+
+    def current_path(self) -> Optional[str]:
+        """Weights of the serving version, falling back to legacy_path"""
+        version = self.current()
+        if version:
+            return self.weights_path(version)
+        return self.legacy_path if self.legacy_path and os.path.exists(self.legacy_path) else None
+
+    def meta(self, version: str) -> Dict:
+        with open(os.path.join(self.dir, version, META_FILE), "r") as f:
+            return json.load(f)
+
+    def _update_meta(self, version: str, **fields):
+        meta = {**self.meta(version), **fields}
+        _write_atomic(os.path.join(self.dir, version, META_FILE), json.dumps(meta, indent=2))
+
+    def versions(self) -> List[Dict]:
+        """Metadata of all versions, newest first"""
+        versions = []
+        for name in os.listdir(self.dir):
+            if os.path.exists(os.path.join(self.dir, name, META_FILE)):
+                versions.append(self.meta(name))
+        return sorted(versions, key=lambda meta: meta["created_at"], reverse=True)
+
+    def register(self, weights_path: str, source: str = "", metrics: Optional[Dict] = None, **fields) -> str:
+        """
+        Copy weights into a new version (not serving yet)
+
+        Args:
+            fields: Extra metadata stored with the version (e.g. what data it was trained on)
+
+        Returns:
+            str: Version name (vYYYYmmdd_HHMMSS)
+        """
+        created = datetime.now()
+        version = f"v{created.strftime('%Y%m%d_%H%M%S')}"
+        suffix = 1
+        while os.path.exists(os.path.join(self.dir, version)):
+            suffix += 1
+            version = f"v{created.strftime('%Y%m%d_%H%M%S')}_{suffix}"
+
+        # Build in a temporary directory, then rename: a version is either complete or absent
+        staging = os.path.join(self.dir, f".staging_{version}")
+        os.makedirs(staging, exist_ok=True)
+        weights_name = "weights" + os.path.splitext(weights_path)[1]
+        shutil.copy(weights_path, os.path.join(staging, weights_name))
+        meta = {
+            "version": version,
+            "kind": self.kind,
+            "weights": weights_name,
+            "created_at": created.isoformat(),
+            "source": source,
+            "metrics": metrics or {},
+            "parent": self.current(),
+            "status": "registered",
+            **fields
+        }
+        with open(os.path.join(staging, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(staging, os.path.join(self.dir, version))
+        return version
+
+    def start_canary(self, version: str):
+        """Mark a version for canary evaluation on live traffic"""
+        self._update_meta(version, status="canary", canary_started_at=datetime.now().isoformat())
+        self._write_pointer(CANARY_POINTER, version)
+
+    def promote(self, version: str, evaluation: Optional[Dict] = None):
+        """Make a version the serving one (also used to roll back)"""
+        self._update_meta(version, status="live", promoted_at=datetime.now().isoformat(),
+                          **({"canary": evaluation} if evaluation else {}))
+        previous = self.current()
+        self._write_pointer(CURRENT_POINTER, version)
+        if previous and previous != version:
+            self._update_meta(previous, status="retired")
+        if self.canary() == version:
+            self._write_pointer(CANARY_POINTER, None)
+
+    def reject(self, version: str, reason: str, evaluation: Optional[Dict] = None):
+        """End a version's canary without promoting it"""
+        self._update_meta(version, status="rejected", rejected_reason=reason,
+                          **({"canary": evaluation} if evaluation else {}))
+        if self.canary() == version:
+            self._write_pointer(CANARY_POINTER, None)
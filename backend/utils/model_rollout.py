@@ -0,0 +1,220 @@
+"""
+Canary rollout for the YOLO serving model
+A version marked as canary in the model registry is loaded next to the live
+model and shadows a slice of traffic: both see the same images, but only the
+live model answers. Once enough shadowed requests agree with the live model
+and the canary isn't slower, it is promoted and the live server hot-swaps to
+it; otherwise it is rejected. Registry pointer changes made elsewhere (the
+retraining worker, admin promote/rollback) are picked up by polling.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.model_registry import ModelRegistry
+
+# Share of live traffic shadowed to the canary, and how many shadow calls may run at once
+CANARY_FRACTION = float(os.getenv("CANARY_FRACTION", "0.1"))
+CANARY_MAX_INFLIGHT = 2
+# Promotion criteria
+CANARY_MIN_SAMPLES = int(os.getenv("CANARY_MIN_SAMPLES", "50"))
+CANARY_MIN_AGREEMENT = float(os.getenv("CANARY_MIN_AGREEMENT", "0.85"))    # Same top disease as live
+CANARY_MAX_LATENCY_RATIO = float(os.getenv("CANARY_MAX_LATENCY_RATIO", "1.25"))  # p95 canary / p95 live
+CANARY_MAX_ERRORS = 5
+
+MODEL_REGISTRY_POLL_INTERVAL = float(os.getenv("MODEL_REGISTRY_POLL_INTERVAL", "10"))
+
+def _top_disease(summary: Optional[Dict]) -> Tuple[Optional[str], float]:
+    if not summary or not summary['diseases']:
+        return None, 0.0
+    top = summary['diseases'][0]
+    return top['disease_name'], top['score']
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))], 1)
+
+class CanaryEvaluator:
+    """Agreement and latency of a canary against the live model on the same requests"""
+
+    def __init__(self, version: str, min_samples: int = CANARY_MIN_SAMPLES,
+                 min_agreement: float = CANARY_MIN_AGREEMENT, max_latency_ratio: float = CANARY_MAX_LATENCY_RATIO):
+        self.version = version
+        self.min_samples = min_samples
+        self.min_agreement = min_agreement
+        self.max_latency_ratio = max_latency_ratio
+
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.agreements = 0
+        self.confidence_delta_sum = 0.0
+        self.errors = 0
+        self.live_ms = []
+        self.canary_ms = []
+
+    def record(self, live_summary: Dict, live_ms: float, canary_summary: Dict, canary_ms: float):
+        live_name, live_conf = _top_disease(live_summary)
+        canary_name, canary_conf = _top_disease(canary_summary)
+        with self._lock:
+            self.samples += 1
+            if live_name == canary_name:
+                self.agreements += 1
+                self.confidence_delta_sum += canary_conf - live_conf
+            self.live_ms.append(live_ms)
+            self.canary_ms.append(canary_ms)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def report(self) -> Dict:
+        with self._lock:
+            live_p95 = _percentile(self.live_ms, 95)
+            canary_p95 = _percentile(self.canary_ms, 95)
+            return {
+                "version": self.version,
+                "samples": self.samples,
+                "errors": self.errors,
+                "agreement": round(self.agreements / self.samples, 4) if self.samples else None,
+                "mean_confidence_delta": round(self.confidence_delta_sum / self.agreements, 2) if self.agreements else None,
+                "live_p50_ms": _percentile(self.live_ms, 50),
+                "live_p95_ms": live_p95,
+                "canary_p50_ms": _percentile(self.canary_ms, 50),
+                "canary_p95_ms": canary_p95,
+                "latency_ratio": round(canary_p95 / live_p95, 3) if live_p95 and canary_p95 else None
+            }
+
+    def decision(self) -> Optional[Tuple[str, str]]:
+        """("promote" | "reject", reason) once the canary is decided, else None"""
+        report = self.report()
+        if report["errors"] >= CANARY_MAX_ERRORS:
+            return "reject", f"{report['errors']} canary inference errors"
+        if report["samples"] < self.min_samples:
+            return None
+        if report["agreement"] < self.min_agreement:
+            return "reject", f"agreement {report['agreement']:.2f} < {self.min_agreement:.2f}"
+        if report["latency_ratio"] and report["latency_ratio"] > self.max_latency_ratio:
+            return "reject", f"p95 latency {report['latency_ratio']:.2f}x live"
+        return "promote", f"agreement {report['agreement']:.2f} over {report['samples']} requests"
+
+class ModelRollout:
+    def __init__(self, registry: ModelRegistry, live_server, server_factory: Callable, summarize: Callable):
+        """
+        Args:
+            registry: Registry whose CURRENT/CANARY pointers drive the rollout
+            live_server: Serving YOLOServer (hot-swapped on promotion)
+            server_factory: weights path -> new server, for the canary
+            summarize: Detection result -> summary dict with 'diseases' (summarize_detections)
+        """
+        self.registry = registry
+        self.live = live_server
+        self.server_factory = server_factory
+        self.summarize = summarize
+        self.live_version = registry.current()
+
+        self._lock = threading.Lock()
+        self.canary_version = None
+        self.canary_server = None
+        self.evaluator = None
+        self.last_canary = None
+        self._inflight = 0
+        self._tasks = set()
+
+    def sync(self):
+        """Apply registry changes and canary decisions (blocking: loads models - call from a thread)"""
+        current = self.registry.current()
+        if current and current != self.live_version:
+            self.live.swap(self.registry.weights_path(current))
+            self.live_version = current
+
+        canary = self.registry.canary()
+        if canary != self.canary_version:
+            self._stop_canary()
+            if canary:
+                try:
+                    server = self.server_factory(self.registry.weights_path(canary))
+                except Exception as e:
+                    self.registry.reject(canary, f"failed to load: {e}")
+                    print(f"⚠️ Canary {canary} rejected, failed to load: {e}")
+                    return
+                with self._lock:
+                    self.canary_version, self.canary_server = canary, server
+                    self.evaluator = CanaryEvaluator(canary)
+                print(f"🐤 Canary {canary}: shadowing {CANARY_FRACTION:.0%} of traffic")
+        elif self.evaluator is not None:
+            decision = self.evaluator.decision()
+            if decision:
+                self._finish(*decision)
+
+    def _finish(self, action: str, reason: str):
+        version, report = self.canary_version, self.evaluator.report()
+        if action == "promote":
+            self.registry.promote(version, evaluation=report)
+            self.live.swap(self.registry.weights_path(version))
+            self.live_version = version
+        else:
+            self.registry.reject(version, reason, evaluation=report)
+        print(f"🐤 Canary {version} {action}d: {reason}")
+        self.last_canary = {"action": action, "reason": reason, **report}
+        self._stop_canary()
+
+    def _stop_canary(self):
+        with self._lock:
+            server = self.canary_server
+            self.canary_version = self.canary_server = self.evaluator = None
+        if server is not None:
+            server.close()
+
+    def maybe_shadow(self, image, live_summary: Dict, live_ms: float):
+        """Send this request to the canary too (sampled), without delaying the response"""
+        with self._lock:
+            if self.canary_server is None or self._inflight >= CANARY_MAX_INFLIGHT or random.random() >= CANARY_FRACTION:
+                return
+            # Submitted under the lock: _stop_canary cannot close this server in between
+            try:
+                future = self.canary_server.submit(image)
+            except RuntimeError:
+                return
+            self._inflight += 1
+            evaluator = self.evaluator
+            start = time.perf_counter()
+        task = asyncio.create_task(self._shadow(future, start, evaluator, live_summary, live_ms))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _shadow(self, future, start: float, evaluator: CanaryEvaluator, live_summary: Dict, live_ms: float):
+        try:
+            result = await asyncio.wrap_future(future)
+            canary_ms = (time.perf_counter() - start) * 1000
+            evaluator.record(live_summary, live_ms, self.summarize(result), canary_ms)
+        except Exception as e:
+            print(f"⚠️ Canary {evaluator.version} inference failed: {e}")
+            evaluator.record_error()
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+    def status(self) -> Dict:
+        with self._lock:
+            evaluator = self.evaluator
+        return {
+            "live_version": self.live_version,
+            "live_weights": self.live.weights_path,
+            "canary": evaluator.report() if evaluator else None,
+            "last_canary": self.last_canary
+        }
+
+async def watch_model_registry(rollout: ModelRollout, interval: float = MODEL_REGISTRY_POLL_INTERVAL):
+    """Poll the registry and settle canaries until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(rollout.sync)
+        except Exception as e:
+            print(f"⚠️ Model registry sync failed: {e}")
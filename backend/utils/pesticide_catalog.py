@@ -0,0 +1,107 @@
+"""
+Versioned, hot-reloadable pesticide catalog
+The catalog file is watched for changes; a new version is loaded and validated
+off to the side and then swapped in with a single reference assignment, so
+readers never take a lock and never see a half-loaded catalog
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+from utils.disease_resolver import DiseaseResolver, load_class_names
+
+# Seconds between checks of the catalog file
+CATALOG_POLL_INTERVAL = float(os.getenv("CATALOG_POLL_INTERVAL", "5"))
+
+class CatalogSnapshot:
+    """An immutable catalog version: the data, its resolver and its identity"""
+
+    def __init__(self, data: Dict, version: str, mtime: float, size: int, class_names=None):
+        self.data = data
+        self.version = version
+        self.mtime = mtime
+        self.size = size
+        self.loaded_at = datetime.now().isoformat()
+        self.resolver = DiseaseResolver(data.keys(), class_names)
+
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "entries": len(self.data)
+        }
+
+class PesticideCatalog:
+    """Holds the active CatalogSnapshot and swaps in new versions of the file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.class_names = load_class_names()
+        self.reload_failures = 0
+        self._failed_stat = None
+        self._snapshot = self._load()
+
+    def current(self) -> CatalogSnapshot:
+        """Active catalog version; grab it once per request and use it throughout"""
+        return self._snapshot
+
+    def _load(self) -> CatalogSnapshot:
+        stat = os.stat(self.path)
+        with open(self.path, "rb") as f:
+            raw = f.read()
+
+        data = json.loads(raw.decode("utf-8"))
+        if not isinstance(data, dict) or not data:
+            raise ValueError("Pesticide catalog must be a non-empty JSON object")
+        for key, entry in data.items():
+            if not isinstance(entry, dict) or "chemical" not in entry or "organic" not in entry:
+                raise ValueError(f"Catalog entry '{key}' needs 'chemical' and 'organic' sections")
+
+        version = hashlib.sha256(raw).hexdigest()[:12]
+        return CatalogSnapshot(data, version, stat.st_mtime, stat.st_size, self.class_names)
+
+    def reload_if_changed(self) -> Optional[CatalogSnapshot]:
+        """
+        Load and swap in the catalog if the file changed
+
+        Returns:
+            The new snapshot if a new version was activated, otherwise None.
+            An invalid file is reported and the current version stays active.
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            print(f"⚠️ Pesticide catalog not readable: {e}")
+            return None
+
+        current = self._snapshot
+        file_stat = (stat.st_mtime, stat.st_size)
+        if file_stat == (current.mtime, current.size) or file_stat == self._failed_stat:
+            return None
+
+        try:
+            snapshot = self._load()
+        except Exception as e:
+            # Don't retry the same broken file every poll
+            self._failed_stat = file_stat
+            self.reload_failures += 1
+            print(f"⚠️ Pesticide catalog reload failed, keeping {current.version}: {e}")
+            return None
+
+        self._snapshot = snapshot
+        if snapshot.version == current.version:
+            # Touched but content unchanged
+            return None
+
+        print(f"📦 Pesticide catalog updated: {current.version} -> {snapshot.version}")
+        return snapshot
+
+async def watch_catalog(catalog: PesticideCatalog, interval: float = CATALOG_POLL_INTERVAL):
+    """Poll the catalog file and hot-swap new versions until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(catalog.reload_if_changed)
@@ -0,0 +1,75 @@
+"""
+Retraining worker process
+Started by utils/job_runner.py as `python -m utils.retrain_worker <job_id> <jobs_file> <lock_file>`,
+with OMP/MKL/OpenBLAS thread caps already in its environment. It imports only the
+job's training module (never main.py, the routes or their serving models), runs the
+job and writes progress and the result to the shared job record.
+"""
+
+import importlib
+import os
+import sys
+import time
+from typing import Callable, Dict
+
+from utils.job_runner import RETRAIN_CANCEL_POLL, RETRAIN_NICE, JobCancelled, JobStore
+
+def _limit_resources(threads: int):
+    """CPU affinity, priority and torch's thread pool (the env caps were set at process start)"""
+    if hasattr(os, "sched_setaffinity"):
+        # Highest-numbered cores, leaving the low ones to the serving process
+        cpus = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, cpus[-threads:])
+    if hasattr(os, "nice"):
+        try:
+            os.nice(RETRAIN_NICE)
+        except OSError:
+            pass
+
+    import torch
+    torch.set_num_threads(threads)
+
+def _load_target(name: str) -> Callable:
+    module_name, function_name = name.split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def run_job(store: JobStore, job_id: str, target: Callable, kwargs: Dict):
+    last_check = [time.monotonic()]
+
+    def check_cancel(trainer, force=False):
+        # Called every batch: only read the shared record every RETRAIN_CANCEL_POLL seconds
+        now = time.monotonic()
+        if not force and now - last_check[0] < RETRAIN_CANCEL_POLL:
+            return
+        last_check[0] = now
+        if store.cancel_requested(job_id):
+            raise JobCancelled()
+
+    def report_epoch(trainer):
+        metrics = {key: round(float(value), 4) for key, value in (getattr(trainer, "metrics", None) or {}).items()}
+        store.update(job_id, epoch=trainer.epoch + 1, epochs=trainer.epochs, metrics=metrics)
+        check_cancel(trainer, force=True)
+
+    callbacks = {"on_train_batch_end": check_cancel, "on_fit_epoch_end": report_epoch}
+    try:
+        result = target(callbacks=callbacks, **kwargs)
+    except JobCancelled:
+        store.finish(job_id, "cancelled")
+    except Exception as e:
+        store.finish(job_id, "failed", error=str(e))
+    else:
+        store.finish(job_id, "completed", result=result)
+
+def main(job_id: str, jobs_file: str, lock_file: str):
+    store = JobStore(jobs_file, lock_file)
+    job = store.jobs()[job_id]
+    try:
+        _limit_resources(job["threads"])
+        target = _load_target(job["target"])
+    except Exception as e:
+        store.finish(job_id, "failed", error=f"Worker failed to start: {e}")
+        return
+    run_job(store, job_id, target, job.get("kwargs") or {})
+
+if __name__ == "__main__":
+    main(*sys.argv[1:4])
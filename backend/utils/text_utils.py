@@ -0,0 +1,66 @@
+"""
+Text helpers shared by the translation and text-to-speech routes
+Normalizes advisory text and splits it into sentence-sized chunks
+"""
+
+import re
+import unicodedata
+from typing import List
+
+# Sentence terminators: Latin punctuation plus the Devanagari danda used in Hindi/Marathi
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?।॥])\s+')
+
+# Ad-hoc list separators (preventive_measures joined with ";", "|", newlines or bullets)
+LIST_SEPARATOR = re.compile(r'\s*(?:[;|•\n]|\.(?:\s*\.)+)\s*')
+WHITESPACE = re.compile(r'\s+')
+
+# Google Cloud TTS rejects inputs over 5000 bytes; stay well below for Indic scripts
+MAX_CHUNK_CHARS = 1000
+
+def split_sentences(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into sentences, keeping the terminating punctuation
+
+    Args:
+        text: Text to split
+        max_chars: Longest chunk to return; longer sentences are split on word boundaries
+
+    Returns:
+        list: Non-empty sentence strings in their original order
+    """
+    sentences = []
+
+    for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+
+        # Break run-on sentences so no single chunk exceeds the TTS request limit
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            sentences.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+
+        if sentence:
+            sentences.append(sentence)
+
+    return sentences
+
+def normalize_text(text: str) -> str:
+    """
+    Canonicalize text so trivial variants share cache entries
+
+    - Unicode NFC, so composed and decomposed Indic characters compare equal
+    - underscores to spaces ("Tomato_Early_blight" -> "Tomato Early blight")
+    - list separators (";", "|", newlines, bullets, "..") to sentence breaks
+    - runs of whitespace collapsed, ends trimmed
+    """
+    text = unicodedata.normalize('NFC', text).replace('_', ' ').strip()
+    text = LIST_SEPARATOR.sub('. ', text).lstrip('. ')
+    return WHITESPACE.sub(' ', text).strip()
+
+def segment_text(text: str) -> List[str]:
+    """Normalize text and split it into sentence segments for per-segment translation"""
+    return split_sentences(normalize_text(text))
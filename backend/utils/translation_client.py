@@ -0,0 +1,316 @@
+"""
+Translation client with provider failover
+Tracks per-provider latency, trips a circuit breaker on repeated failures and
+hedges slow requests to the secondary provider so tail latency stays bounded
+"""
+
+import os
+import time
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional
+
+# Hedge delay is the primary's p95 latency, clamped to this range (seconds)
+HEDGE_MIN_DELAY = float(os.getenv("TRANSLATE_HEDGE_MIN_DELAY", "0.3"))
+HEDGE_MAX_DELAY = float(os.getenv("TRANSLATE_HEDGE_MAX_DELAY", "3.0"))
+
+# Give up on a translation entirely after this long (seconds)
+TRANSLATE_TIMEOUT = float(os.getenv("TRANSLATE_TIMEOUT", "10.0"))
+
+# Circuit breaker: open after N consecutive failures, probe again after the cooldown
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("TRANSLATE_BREAKER_FAILURES", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("TRANSLATE_BREAKER_RESET", "30.0"))
+
+# Number of recent latency samples kept per provider
+LATENCY_WINDOW = 200
+
+# Translated text cache, keyed by (source, target, text)
+TRANSLATE_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATE_CACHE_MAX_ENTRIES", "4096"))
+
+class TranslationError(Exception):
+    """Raised when every translation provider failed or timed out"""
+    pass
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half_open -> closed)"""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        """Closed circuits let every request through, half-open ones a single probe at a time"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "open" or self.probing:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.probing = False
+            # A failed half-open probe re-opens the circuit for another cooldown
+            if self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class ProviderCall:
+    """One request to a provider: its outcome is recorded once, by the result or by a timeout"""
+
+    def __init__(self):
+        self.settled = False
+
+class TranslationProvider:
+    """A named translate function plus its latency window, counters and breaker"""
+
+    def __init__(self, name: str, translate_fn: Callable[[str, str, str], str],
+                 is_available: Callable[[], bool] = lambda: True):
+        self.name = name
+        self.translate_fn = translate_fn
+        self.is_available = is_available
+        self.breaker = CircuitBreaker()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.successes = 0
+        self.failures = 0
+        self.hedges_won = 0
+        self._lock = threading.Lock()
+
+    def usable(self) -> bool:
+        """Could take a request (a half-open circuit still has to grant its probe via allow_request)"""
+        return self.is_available() and self.breaker.state != "open"
+
+    def _settle(self, attempt: Optional[ProviderCall]) -> bool:
+        # Called with self._lock held; False once the call was already counted
+        if attempt is None:
+            return True
+        if attempt.settled:
+            return False
+        attempt.settled = True
+        return True
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def call(self, text: str, target_language: str, source_language: str,
+             attempt: Optional[ProviderCall] = None) -> str:
+        start = time.monotonic()
+        try:
+            translated = self.translate_fn(text, target_language, source_language)
+        except Exception:
+            with self._lock:
+                counted = self._settle(attempt)
+                if counted:
+                    self.failures += 1
+            if counted:
+                self.breaker.record_failure()
+            raise
+
+        # A call that already timed out was counted as a failure; its late result isn't counted again
+        with self._lock:
+            counted = self._settle(attempt)
+            if counted:
+                self.latencies.append(time.monotonic() - start)
+                self.successes += 1
+        if counted:
+            self.breaker.record_success()
+        return translated
+
+    def record_timeout(self, attempt: Optional[ProviderCall] = None):
+        """Count a call abandoned after TRANSLATE_TIMEOUT as a failure"""
+        with self._lock:
+            counted = self._settle(attempt)
+            if counted:
+                self.failures += 1
+        if counted:
+            self.breaker.record_failure()
+
+    def record_hedge_won(self):
+        with self._lock:
+            self.hedges_won += 1
+
+    def metrics(self) -> Dict:
+        p95 = self.p95()
+        with self._lock:
+            total = self.successes + self.failures
+            samples = list(self.latencies)
+        return {
+            "available": self.is_available(),
+            "circuit_state": self.breaker.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "success_rate": round(100.0 * self.successes / total, 2) if total else None,
+            "hedges_won": self.hedges_won,
+            "avg_latency_ms": round(1000 * sum(samples) / len(samples), 1) if samples else None,
+            "p95_latency_ms": round(1000 * p95, 1) if p95 is not None else None
+        }
+
+class HedgedTranslationClient:
+    """
+    Sends each request to the first healthy provider and, if it has not
+    answered within its p95 latency, races a hedged request on the next one
+    """
+
+    def __init__(self, providers: List[TranslationProvider], max_workers: int = 16):
+        self.providers = providers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+        self.hedged_requests = 0
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def get_cached(self, text: str, target_language: str, source_language: str = 'en') -> Optional[str]:
+        key = (source_language, target_language, text)
+        with self._cache_lock:
+            translated = self.cache.get(key)
+            if translated is not None:
+                self.cache.move_to_end(key)
+            return translated
+
+    def _store(self, text: str, target_language: str, source_language: str, translated: str):
+        with self._cache_lock:
+            self.cache[(source_language, target_language, text)] = translated
+            while len(self.cache) > TRANSLATE_CACHE_MAX_ENTRIES:
+                self.cache.popitem(last=False)
+
+    def _hedge_delay(self, provider: TranslationProvider) -> float:
+        p95 = provider.p95()
+        if p95 is None:
+            return HEDGE_MAX_DELAY
+        return min(max(p95, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+    def translate(self, text: str, target_language: str, source_language: str = 'en') -> Dict:
+        """
+        Translate text, failing over between providers
+
+        Returns:
+            dict: {
+                'translated_text': str,
+                'provider': str,
+                'hedged': bool
+            }
+
+        Raises:
+            TranslationError: if no provider produced a translation in time
+        """
+        cached = self.get_cached(text, target_language, source_language)
+        with self._stats_lock:
+            if cached is not None:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        if cached is not None:
+            return {
+                'translated_text': cached,
+                'provider': 'cache',
+                'hedged': False
+            }
+
+        deadline = time.monotonic() + TRANSLATE_TIMEOUT
+        pending = {}
+        errors = []
+        hedged = False
+        remaining = [p for p in self.providers if p.usable()]
+
+        def launch_next():
+            """Start the next provider whose breaker admits the request (half-open: the one probe)"""
+            while remaining:
+                provider = remaining.pop(0)
+                if provider.breaker.allow_request():
+                    attempt = ProviderCall()
+                    future = self.executor.submit(provider.call, text, target_language, source_language, attempt)
+                    pending[future] = (provider, attempt)
+                    return provider
+            return None
+
+        primary = launch_next()
+        if primary is None:
+            raise TranslationError("No translation provider available (all circuits open)")
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+
+            # Wait for the hedge delay while a backup is still available, otherwise until the deadline
+            if remaining:
+                oldest, _ = next(iter(pending.values()))
+                timeout = min(self._hedge_delay(oldest), deadline - now)
+            else:
+                timeout = deadline - now
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Primary is slow - hedge to the next provider
+                if launch_next():
+                    hedged = True
+                    with self._stats_lock:
+                        self.hedged_requests += 1
+                continue
+
+            for future in done:
+                provider, _ = pending.pop(future)
+                try:
+                    translated = future.result()
+                except Exception as e:
+                    errors.append(f"{provider.name}: {e}")
+                    # Fail over immediately instead of waiting out the hedge delay
+                    if not pending:
+                        launch_next()
+                    continue
+
+                if hedged and provider is not primary:
+                    provider.record_hedge_won()
+                self._store(text, target_language, source_language, translated)
+                return {
+                    'translated_text': translated,
+                    'provider': provider.name,
+                    'hedged': hedged
+                }
+
+        for future, (provider, attempt) in pending.items():
+            future.cancel()
+            provider.record_timeout(attempt)
+            errors.append(f"{provider.name}: timed out after {TRANSLATE_TIMEOUT}s")
+
+        raise TranslationError("; ".join(errors) or "Translation failed")
+
+    def metrics(self) -> Dict:
+        return {
+            "hedged_requests": self.hedged_requests,
+            "cache": {
+                "entries": len(self.cache),
+                "hits": self.cache_hits,
+                "misses": self.cache_misses
+            },
+            "providers": {p.name: p.metrics() for p in self.providers}
+        }
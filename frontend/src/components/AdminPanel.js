@@ -4,7 +4,7 @@ import {
   ArrowLeft, RefreshCw, BarChart3, Clock, 
   CheckCircle, AlertCircle, Loader, LogOut, Activity, TrendingUp, Award, Zap
 } from 'lucide-react';
-import { triggerRetraining, getRetrainingStatus, getModelInfo } from '../services/api';
+import { triggerRetraining, cancelRetraining, getRetrainingStatus, getModelInfo } from '../services/api';
 import axios from 'axios';
 
 const AdminPanel = ({ onBack }) => {
@@ -19,6 +19,20 @@ const AdminPanel = ({ onBack }) => {
     loadData();
   }, []);
 
+  // Poll live progress while a retraining job is running
+  const currentJob = status?.current_job;
+  useEffect(() => {
+    if (!currentJob) return undefined;
+    const timer = setInterval(async () => {
+      try {
+        setStatus(await getRetrainingStatus());
+      } catch (error) {
+        console.error('Failed to refresh retraining status:', error);
+      }
+    }, 5000);
+    return () => clearInterval(timer);
+  }, [currentJob?.job_id]);
+
   const loadData = async () => {
     setLoading(true);
     try {
@@ -49,10 +63,7 @@ const AdminPanel = ({ onBack }) => {
         type: 'success',
         text: result.message || 'Retraining started successfully'
       });
-      // Refresh data after a delay
-      setTimeout(() => {
-        loadData();
-      }, 2000);
+      setStatus(await getRetrainingStatus());
     } catch (error) {
       setMessage({
         type: 'error',
@@ -63,6 +74,18 @@ const AdminPanel = ({ onBack }) => {
     }
   };
 
+  const handleCancel = async () => {
+    try {
+      await cancelRetraining(currentJob.job_id);
+      setStatus(await getRetrainingStatus());
+    } catch (error) {
+      setMessage({
+        type: 'error',
+        text: error.detail || 'Failed to cancel retraining'
+      });
+    }
+  };
+
   const handleLogout = () => {
     localStorage.removeItem('adminToken');
     onBack();
@@ -325,10 +348,10 @@ const AdminPanel = ({ onBack }) => {
         </p>
         <button
           onClick={handleRetrain}
-          disabled={retraining}
+          disabled={retraining || !!currentJob}
           className="btn-primary disabled:opacity-50 disabled:cursor-not-allowed flex items-center gap-2"
         >
-          {retraining ? (
+          {retraining || currentJob ? (
             <>
               <Loader className="w-5 h-5 animate-spin" />
               Retraining in Progress...
@@ -341,6 +364,30 @@ const AdminPanel = ({ onBack }) => {
           )}
         </button>
 
+        {currentJob && (
+          <div className="mt-4 p-4 rounded-lg bg-blue-50 border border-blue-200">
+            <div className="flex items-center justify-between mb-2">
+              <p className="text-sm text-blue-800">
+                {currentJob.kind} retraining ({currentJob.status})
+                {currentJob.epochs ? ` - epoch ${currentJob.epoch}/${currentJob.epochs}` : ' - preparing data'}
+              </p>
+              <button
+                onClick={handleCancel}
+                disabled={currentJob.status === 'cancelling'}
+                className="text-sm text-red-600 hover:text-red-800 disabled:opacity-50"
+              >
+                Cancel
+              </button>
+            </div>
+            <div className="w-full bg-blue-100 rounded-full h-2">
+              <div
+                className="bg-blue-600 h-2 rounded-full transition-all"
+                style={{ width: `${currentJob.epochs ? (100 * currentJob.epoch) / currentJob.epochs : 0}%` }}
+              />
+            </div>
+          </div>
+        )}
+
         {message && (
           <motion.div
             className={`mt-4 p-4 rounded-lg flex items-start gap-3 ${
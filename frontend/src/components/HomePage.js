@@ -3,7 +3,7 @@ import { useDropzone } from 'react-dropzone';
 import { motion } from 'framer-motion';
 import { Upload, Loader, Image as ImageIcon, Leaf, Info, Target, Users, Globe, Award, Zap, CheckCircle, ShieldCheck } from 'lucide-react';
 import { useTranslation } from 'react-i18next';
-import { uploadToCloudinary, predictDisease } from '../services/api';
+import { uploadToCloudinary, predictDisease, predictDiseaseStream } from '../services/api';
 import FeedbackForm from './FeedbackForm';
 
 const HomePage = ({ onPredictionComplete }) => {
@@ -11,12 +11,14 @@ const HomePage = ({ onPredictionComplete }) => {
   const [uploading, setUploading] = useState(false);
   const [error, setError] = useState(null);
   const [preview, setPreview] = useState(null);
+  const [diagnosis, setDiagnosis] = useState(null);
 
   const onDrop = useCallback(async (acceptedFiles) => {
     if (acceptedFiles.length === 0) return;
 
     const file = acceptedFiles[0];
     setError(null);
+    setDiagnosis(null);
     
     // Create preview
     const reader = new FileReader();
@@ -31,8 +33,17 @@ const HomePage = ({ onPredictionComplete }) => {
       // Upload to Cloudinary
       const imageUrl = await uploadToCloudinary(file);
       
-      // Get prediction
-      const prediction = await predictDisease(imageUrl);
+      // Get prediction - streamed, so the diagnosis shows while treatments are prepared
+      let prediction;
+      try {
+        prediction = await predictDiseaseStream(imageUrl, (stage, payload) => {
+          if (stage === 'diagnosis') setDiagnosis(payload);
+        });
+      } catch (streamError) {
+        if (streamError.streamed) throw streamError;
+        console.warn('Prediction stream unavailable, using /predict/:', streamError);
+        prediction = await predictDisease(imageUrl);
+      }
       
       // Pass results to parent
       onPredictionComplete(prediction, imageUrl);
@@ -379,6 +390,11 @@ const HomePage = ({ onPredictionComplete }) => {
                   {t('upload.processing')}
                 </p>
               </div>
+              {diagnosis && (
+                <p className="text-base font-semibold text-gray-700">
+                  {diagnosis.disease_name.replace(/_/g, ' ')} ({diagnosis.confidence}%)
+                </p>
+              )}
             </div>
           )}
           </div>
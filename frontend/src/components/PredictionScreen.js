@@ -14,6 +14,7 @@ const PredictionScreen = ({ data, imageUrl, onReset }) => {
   const [translatedData, setTranslatedData] = useState(null);
   const [isTranslating, setIsTranslating] = useState(false);
   const audioRef = useRef(null);
+  const speechStreamRef = useRef(null);
 
   const { disease_name, confidence, recommendations } = translatedData || data;
 
@@ -158,6 +159,92 @@ const PredictionScreen = ({ data, imageUrl, onReset }) => {
     return voiceMap[lang] || 'en-IN';
   };
 
+  // Stream sentence-sized audio chunks and play each one as soon as it arrives
+  const playStreamedSpeech = async (apiUrl, speechText, lang) => {
+    const response = await fetch(`${apiUrl}/text-to-speech/stream/`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ text: speechText, language: lang, voice_gender: 'NEUTRAL' })
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`TTS stream failed with status ${response.status}`);
+    }
+
+    const session = { queue: [], streamDone: false, stopped: false, received: 0 };
+    speechStreamRef.current = session;
+
+    const finish = () => {
+      if (speechStreamRef.current === session) {
+        speechStreamRef.current = null;
+        audioRef.current = null;
+        setSpeaking(false);
+      }
+    };
+
+    const playNext = () => {
+      if (session.stopped) return;
+      const chunk = session.queue.shift();
+      if (!chunk) {
+        audioRef.current = null;
+        if (session.streamDone) finish();
+        return;
+      }
+      const audio = new Audio(`data:audio/mp3;base64,${chunk.audio_content}`);
+      audioRef.current = audio;
+      audio.onended = playNext;
+      audio.onerror = () => {
+        console.error('Audio playback failed');
+        playNext();
+      };
+      audio.play().catch(playNext);
+    };
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    try {
+      while (!session.stopped) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // SSE messages are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const message = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+
+          const eventLine = message.split('\n').find(line => line.startsWith('event: '));
+          const dataLine = message.split('\n').find(line => line.startsWith('data: '));
+          const event = eventLine ? eventLine.slice(7) : 'message';
+          const payload = dataLine ? JSON.parse(dataLine.slice(6)) : {};
+
+          if (event === 'error') {
+            throw new Error(payload.detail);
+          }
+          if (event === 'message' && payload.audio_content) {
+            session.queue.push(payload);
+            session.received += 1;
+            if (!audioRef.current) playNext();
+          }
+        }
+      }
+    } catch (streamError) {
+      // Nothing played yet - let the caller fall back to browser TTS
+      if (session.received === 0) {
+        speechStreamRef.current = null;
+        throw streamError;
+      }
+      console.error('TTS stream interrupted:', streamError);
+    }
+
+    session.streamDone = true;
+    if (!audioRef.current) finish();
+  };
+
+  // The backend cache warmer pre-synthesizes these sentences (speech_sentences in
+  // backend/utils/cache_warmer.py) - keep the two templates in sync
   const speakResult = async () => {
     setSpeaking(true);
     
@@ -251,27 +338,7 @@ const PredictionScreen = ({ data, imageUrl, onReset }) => {
       const apiUrl = process.env.REACT_APP_API_URL || 'http://localhost:8000/api';
       
       try {
-        const ttsResponse = await axios.post(`${apiUrl}/text-to-speech/`, {
-          text: speechText,
-          language: currentLang,
-          voice_gender: 'NEUTRAL'
-        });
-        
-        if (ttsResponse.data.audio_content) {
-          // Play the audio from base64
-          const audio = new Audio(`data:audio/mp3;base64,${ttsResponse.data.audio_content}`);
-          audioRef.current = audio;
-          audio.onended = () => {
-            setSpeaking(false);
-            audioRef.current = null;
-          };
-          audio.onerror = () => {
-            setSpeaking(false);
-            audioRef.current = null;
-            console.error('Audio playback failed');
-          };
-          await audio.play();
-        }
+        await playStreamedSpeech(apiUrl, speechText, currentLang);
       } catch (ttsError) {
         console.warn('Google Cloud TTS not available, using browser TTS:', ttsError);
         
@@ -305,6 +372,12 @@ const PredictionScreen = ({ data, imageUrl, onReset }) => {
   };
 
   const stopSpeaking = () => {
+    // Stop any queued streamed chunks from playing
+    if (speechStreamRef.current) {
+      speechStreamRef.current.stopped = true;
+      speechStreamRef.current = null;
+    }
+    
     // Stop Google Cloud TTS audio if playing
     if (audioRef.current) {
       audioRef.current.pause();
@@ -46,6 +46,52 @@ export const predictDisease = async (imageUrl) => {
   }
 };
 
+// Streams prediction stages (accepted, diagnosis, description, recommendations)
+// to onStage as they complete and resolves with the full prediction.
+export const predictDiseaseStream = async (imageUrl, onStage) => {
+  const response = await fetch(`${API_BASE_URL}/predict/stream/`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ image_url: imageUrl }),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Prediction stream failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // SSE messages are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const message = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      const eventLine = message.split('\n').find(line => line.startsWith('event: '));
+      const dataLine = message.split('\n').find(line => line.startsWith('data: '));
+      const event = eventLine ? eventLine.slice(7) : 'message';
+      const payload = dataLine ? JSON.parse(dataLine.slice(6)) : {};
+
+      if (event === 'error') {
+        // Same shape as axios error bodies, so callers handle both alike
+        throw { detail: payload.detail, status: payload.status_code, streamed: true };
+      }
+      if (event === 'done') {
+        return payload;
+      }
+      if (onStage) onStage(event, payload);
+    }
+  }
+
+  throw new Error('Prediction stream ended early');
+};
+
 export const translateText = async (text, targetLanguage, sourceLanguage = 'en') => {
   try {
     const response = await api.post('/translate/', {
@@ -94,6 +140,16 @@ export const triggerRetraining = async () => {
   }
 };
 
+export const cancelRetraining = async (jobId) => {
+  try {
+    const response = await api.post(`/retrain/jobs/${jobId}/cancel/`);
+    return response.data;
+  } catch (error) {
+    console.error('Cancel retraining error:', error);
+    throw error.response?.data || error;
+  }
+};
+
 export const getRetrainingStatus = async () => {
   try {
     const response = await api.get('/retrain/status/');